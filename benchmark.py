@@ -0,0 +1,868 @@
+"""Benchmarks for the voice volume controller.
+
+Usage:
+    python benchmark.py backends [--calls N]
+    python benchmark.py smoothers [--samples N]
+    python benchmark.py render [--frames N]
+    python benchmark.py history [--hours H] [--rate HZ] [--frames N]
+    python benchmark.py startup [--budget SECONDS] [--runs N]
+    python benchmark.py renderer [--seconds S] [--rate HZ] [--fps N] [--full-redraw]
+    python benchmark.py handoff [--seconds S] [--rate HZ]
+    python benchmark.py metrics [--blocks N]
+    python benchmark.py channels [--blocks N]
+    python benchmark.py raw [--blocks N]
+    python benchmark.py session [--hours H]
+    python benchmark.py server [--clients N] [--slow-fraction F] [--seconds S] [--rate HZ]
+    python benchmark.py supervisor [--faults N] [--open-failure-rate F]
+    python benchmark.py streams [--ticks N] [--streams N] [--churn F]
+    python benchmark.py pipeline [--seconds S] [--repeat N] [--save-baseline PATH] [--baseline PATH --tolerance F]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from main import (
+    CAPTURE_PRESETS, HISTORY_SPANS, PLOT_RENDERERS, SMOOTHING_METHODS, SYNTHETIC_SIGNALS, VOLUME_BACKENDS, Config,
+    HistoryBuffer, HistoryPyramid, IntensityAnalyzer, MemorySinkInputMixer, MemoryVolumeController,
+    RawIntensityAnalyzer, ReplaySession, SessionRecorder, SharedTelemetryRing, SinkInputVolumeBackend,
+    StreamSupervisor, TelemetryRing, TelemetryServer, VolumeEngine, VolumeFilter, capture_settings, load_session,
+    logger, synthetic_signal, to_int16
+)
+
+
+def make_config():
+    """Default settings, never read from or saved to the user's config file"""
+    return Config(os.path.join(tempfile.mkdtemp(), "volume_control_config.json"))
+
+
+class ListVolumeFilter:
+    """The original list-based moving average, kept as a reference point"""
+    def __init__(self, window_size=5):
+        self.window_size = window_size
+        self.volume_history = []
+
+    def smooth_volume(self, new_volume):
+        self.volume_history.append(new_volume)
+        if len(self.volume_history) > self.window_size:
+            self.volume_history.pop(0)
+        return sum(self.volume_history) / len(self.volume_history)
+
+
+def bench_backends(args):
+    """Measure set_volume calls per second for every backend that can start here"""
+    print(f"{'backend':<16}{'calls/s':>12}{'us/call':>12}")
+    for name, backend_class in VOLUME_BACKENDS.items():
+        try:
+            backend = backend_class()
+            initial = backend.get_volume()
+        except Exception as e:
+            print(f"{name:<16}{'unavailable':>12}  ({e})")
+            continue
+
+        try:
+            levels = [initial, min(1.0, initial + 0.01)]
+            start = time.perf_counter()
+            for i in range(args.calls):
+                backend.set_volume(levels[i % 2])
+            elapsed = time.perf_counter() - start
+            backend.set_volume(initial)
+            print(f"{name:<16}{args.calls / elapsed:>12.1f}{elapsed / args.calls * 1e6:>12.1f}")
+        finally:
+            backend.close()
+
+
+def bench_smoothers(args):
+    """Per-sample cost of every smoothing method across window sizes"""
+    samples = [random.random() for _ in range(args.samples)]
+    window_sizes = [5, 50, 500, 5000, 10000]
+    methods = ["list (original)"] + SMOOTHING_METHODS
+
+    print(f"{'method':<18}" + "".join(f"{f'w={w}':>12}" for w in window_sizes) + "   (ns/sample)")
+    for method in methods:
+        row = f"{method:<18}"
+        for window_size in window_sizes:
+            if method == "list (original)":
+                volume_filter = ListVolumeFilter(window_size)
+            else:
+                volume_filter = VolumeFilter(window_size=window_size, method=method)
+            smooth = volume_filter.smooth_volume
+            start = time.perf_counter()
+            for sample in samples:
+                smooth(sample)
+            elapsed = time.perf_counter() - start
+            row += f"{elapsed / len(samples) * 1e9:>12.0f}"
+        print(row)
+
+
+def bench_render(args):
+    """Frames per second and CPU per frame for each visualization mode, blitted vs full redraw"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    history = HistoryBuffer(100)
+    for i in range(history.capacity):
+        history.append(random.uniform(0, 90), random.random())
+
+    print(f"{'mode':<12}{'path':<14}{'fps':>10}{'cpu ms/frame':>15}")
+    for mode, renderer_class in PLOT_RENDERERS.items():
+        for path in ("blit", "full redraw"):
+            figure = Figure(figsize=(8, 4), dpi=100)
+            FigureCanvasAgg(figure)
+            renderer = renderer_class(figure, history)
+
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            for frame in range(args.frames):
+                history.append(random.uniform(0, 90), random.random())
+                if path == "blit":
+                    renderer.render(random.uniform(0, 90), random.random())
+                else:
+                    renderer._update_artists(random.uniform(0, 90), random.random())
+                    figure.canvas.draw()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            renderer.close()
+            print(f"{mode:<12}{path:<14}{args.frames / wall:>10.1f}{cpu / args.frames * 1e3:>15.2f}")
+
+
+def bench_history(args):
+    """Fill the history pyramid with H hours of telemetry, then render each zoom span against raw history"""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    count = int(args.hours * 3600 * args.rate)
+    times = np.arange(count) / args.rate
+    intensities = np.random.uniform(0, 90, count)
+    volumes = np.random.uniform(0, 1, count)
+    pyramid = HistoryPyramid()
+    batch = max(1, int(args.rate * 0.05))  # what the GUI drains every 50 ms
+    start = time.perf_counter()
+    for offset in range(0, count, batch):
+        pyramid.extend(times[offset:offset + batch], intensities[offset:offset + batch],
+                       volumes[offset:offset + batch])
+    elapsed = time.perf_counter() - start
+    print(f"extend: {count} samples in batches of {batch}, {elapsed / (count / batch) * 1e6:.1f} us/batch; "
+          f"{pyramid.nbytes() / 1024:.0f} KiB for {len(pyramid.resolutions)} levels")
+
+    print(f"{'span':<10}{'history':<10}{'points':>9}{'ms/frame':>10}")
+    for name, span in HISTORY_SPANS.items():
+        if not span or span > args.hours * 3600:
+            continue
+        for kind in ("pyramid", "raw"):
+            raw = int(span * args.rate)
+            history = HistoryBuffer(raw if kind == "raw" else 100, 0, pyramid if kind == "pyramid" else None)
+            history.extend(intensities[-raw:], volumes[-raw:])
+            figure = Figure(figsize=(8, 4), dpi=100)
+            FigureCanvasAgg(figure)
+            renderer = PLOT_RENDERERS["Line Graph"](figure, history, span if kind == "pyramid" else 0)
+            renderer.render(0, 0)
+            points = len(renderer.intensity_line.get_xdata())
+            frames = args.frames if kind == "pyramid" or raw <= 100000 else max(1, args.frames // 10)
+            start = time.perf_counter()
+            for _ in range(frames):
+                renderer.render(0, 0)
+            cost = (time.perf_counter() - start) / frames
+            renderer.close()
+            print(f"{name:<10}{kind:<10}{points:>9}{cost * 1e3:>10.2f}")
+
+
+def render_offscreen(ring, fps, full_redraw, stop):
+    """Render the line graph from `ring` with Agg at `fps` until `stop` is set; returns frames drawn"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    reader = ring.reader()
+    history = HistoryBuffer(100)
+    figure = Figure(figsize=(8, 4), dpi=100)
+    FigureCanvasAgg(figure)
+    renderer = PLOT_RENDERERS["Line Graph"](figure, history)
+    frames = 0
+    while not stop.wait(1.0 / fps):
+        records = reader.read()
+        if len(records):
+            history.extend(records['intensity'], records['volume'])
+            if full_redraw:
+                renderer._update_artists(float(records['intensity'][-1]), float(records['volume'][-1]))
+                figure.canvas.draw()
+            else:
+                renderer.render(float(records['intensity'][-1]), float(records['volume'][-1]))
+            frames += 1
+    renderer.close()
+    return frames
+
+
+def render_in_child(ring_name, capacity, fps, full_redraw, stop, results):
+    ring = SharedTelemetryRing(capacity, name=ring_name)
+    results.put(render_offscreen(ring, fps, full_redraw, stop))
+    ring.close()
+
+
+def bench_renderer(args):
+    """Audio callback jitter with no plot, the plot rendered in-process and in a separate process"""
+    config = make_config()
+    config.settings["renderer_process"] = True
+    engine = VolumeEngine(config, volume_controller=MemoryVolumeController())
+    engine.is_monitoring = True
+    drive_callbacks(engine, 0.5, args.rate)  # warm up
+    results = {}
+
+    results["no renderer"] = drive_callbacks(engine, args.seconds, args.rate) + (0,)
+
+    stop = threading.Event()
+    frames = []
+    thread = threading.Thread(target=lambda: frames.append(
+        render_offscreen(engine.telemetry, args.fps, args.full_redraw, stop)))
+    thread.start()
+    time.sleep(1.0)  # matplotlib import and first draw
+    results["in-process"] = drive_callbacks(engine, args.seconds, args.rate)
+    stop.set()
+    thread.join()
+    results["in-process"] += (frames[0],)
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    frame_count = context.Queue()
+    child = context.Process(target=render_in_child, args=(
+        engine.telemetry.name, engine.telemetry.capacity, args.fps, args.full_redraw, stop, frame_count))
+    child.start()
+    time.sleep(3.0)  # interpreter start, imports and first draw
+    results["out-of-process"] = drive_callbacks(engine, args.seconds, args.rate)
+    stop.set()
+    results["out-of-process"] += (frame_count.get(),)
+    child.join()
+    engine.close()
+
+    # Out of process, the renderer stops competing for the GIL but still competes for CPU
+    print(f"{os.cpu_count()} CPU(s); {args.fps:g} fps target, "
+          f"{'full redraw' if args.full_redraw else 'blitting'}")
+    print(f"{'renderer':<16}{'frames':>8}{'callback p99 us':>17}{'lag p50 ms':>12}{'lag p99 ms':>12}"
+          f"{'lag max ms':>12}")
+    for label, (durations, lags, frames) in results.items():
+        print(f"{label:<16}{frames:>8}{durations[int(len(durations) * 0.99)] * 1e6:>17.1f}"
+              f"{lags[len(lags) // 2] * 1000:>12.2f}{lags[int(len(lags) * 0.99)] * 1000:>12.2f}"
+              f"{lags[-1] * 1000:>12.2f}")
+
+
+HEAVY_MODULES = ("numpy", "sounddevice", "tkinter", "matplotlib", "asyncio")
+
+
+def bench_startup(args):
+    """Cold `import main` time in fresh interpreters; fails if over budget or if heavy modules load eagerly"""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import main\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    timings = []
+    eager = set()
+    for _ in range(args.runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), text=True
+        ).splitlines()
+        timings.append(float(output[0]))
+        eager.update(filter(None, output[1].split(",")))
+
+    median = statistics.median(timings)
+    print(f"cold import: median {median * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms "
+          f"(budget {args.budget * 1000:.0f} ms)")
+    failed = False
+    if eager:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(sorted(eager))}")
+        failed = True
+    if median > args.budget:
+        print("FAIL: cold import exceeds budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+def bench_handoff(args):
+    """Drive the audio callback at a 1 kHz block rate while a GUI-like consumer drains telemetry"""
+    import numpy as np
+
+    engine = VolumeEngine(make_config(), volume_controller=MemoryVolumeController())
+    engine.is_monitoring = True
+    reader = engine.telemetry.reader()
+    frames = max(1, int(engine.samplerate / args.rate))
+    block = (np.random.randn(frames, 1) * 0.05).astype(np.float32)
+
+    delivered = 0
+    running = True
+
+    def consume():
+        nonlocal delivered
+        while running:
+            time.sleep(0.01)
+            delivered += len(reader.read())
+        delivered += len(reader.read())
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+
+    blocks = int(args.seconds * args.rate)
+    durations = []
+    period = 1.0 / args.rate
+    start = time.perf_counter()
+    for i in range(blocks):
+        t0 = time.perf_counter()
+        engine._audio_callback(block, frames, None, None)
+        durations.append(time.perf_counter() - t0)
+        delay = start + (i + 1) * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - start
+
+    running = False
+    consumer.join()
+    engine.close()
+
+    durations.sort()
+    actuator = engine.volume_actuator.stats()
+    print(f"blocks produced   {blocks} at {blocks / elapsed:.0f} Hz")
+    print(f"records delivered {delivered}, dropped {reader.dropped}")
+    print(f"callback time     p50 {durations[len(durations) // 2] * 1e6:.1f} us, "
+          f"p99 {durations[int(len(durations) * 0.99)] * 1e6:.1f} us, max {durations[-1] * 1e6:.1f} us")
+    print(f"volume writes     {actuator['writes_issued']} issued, {actuator['writes_coalesced']} coalesced")
+    if delivered + reader.dropped != blocks or reader.dropped:
+        print("FAIL: telemetry records were lost")
+        sys.exit(1)
+    print("OK")
+
+
+# Subscriber process for the server load test: argv = socket path, client count, slow client
+# count. Fast clients count telemetry frames; slow ones connect and never read. Prints the
+# per-client frame counts as JSON once stdin is closed.
+SUBSCRIBER_SCRIPT = """
+import asyncio, json, struct, sys
+HEADER = struct.Struct("<BI")
+
+async def subscribe(path, slow, counts, index):
+    reader, writer = await asyncio.open_unix_connection(path)
+    if slow:
+        await asyncio.Event().wait()
+    while True:
+        frame_type, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+        await reader.readexactly(length)
+        counts[index] += 1
+
+async def main(path, clients, slow):
+    counts = [0] * clients
+    tasks = [asyncio.ensure_future(subscribe(path, i < slow, counts, i)) for i in range(clients)]
+    print("connected", flush=True)
+    await asyncio.get_running_loop().run_in_executor(None, sys.stdin.read)
+    for task in tasks:
+        task.cancel()
+    print(json.dumps(counts[slow:]))
+
+asyncio.run(main(sys.argv[1], int(sys.argv[2]), int(sys.argv[3])))
+"""
+
+
+def drive_callbacks(engine, seconds, rate):
+    """Call the audio callback at `rate` Hz; return sorted callback durations and start lags"""
+    import numpy as np
+
+    frames = max(1, int(engine.samplerate / rate))
+    block = (np.random.randn(frames, 1) * 0.05).astype(np.float32)
+    period = 1.0 / rate
+    durations = []
+    lags = []
+    start = time.perf_counter()
+    for i in range(int(seconds * rate)):
+        t0 = time.perf_counter()
+        lags.append(max(0.0, t0 - (start + i * period)))
+        engine._audio_callback(block, frames, None, None)
+        durations.append(time.perf_counter() - t0)
+        delay = start + (i + 1) * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    durations.sort()
+    lags.sort()
+    return durations, lags
+
+
+def bench_server(args):
+    """Audio callback timing with no subscribers vs hundreds of (partly stalled) socket subscribers"""
+    engine = VolumeEngine(make_config(), volume_controller=MemoryVolumeController())
+    engine.is_monitoring = True
+    drive_callbacks(engine, 0.5, args.rate)  # warm up
+
+    def p99(values):
+        return values[int(len(values) * 0.99)]
+
+    def describe(label, durations, lags):
+        print(f"{label:<22} callback p50 {durations[len(durations) // 2] * 1e6:6.1f} us, "
+              f"p99 {p99(durations) * 1e6:6.1f} us  |  schedule lag p99 {p99(lags) * 1000:5.2f} ms, "
+              f"max {lags[-1] * 1000:6.2f} ms")
+
+    baseline, baseline_lags = drive_callbacks(engine, args.seconds, args.rate)
+    describe("no subscribers", baseline, baseline_lags)
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "telemetry.sock")
+    server = TelemetryServer(engine.telemetry, f"unix:{path}", engine.handle_command).start()
+    slow = int(args.clients * args.slow_fraction)
+    subscribers = subprocess.Popen(
+        [sys.executable, "-c", SUBSCRIBER_SCRIPT, path, str(args.clients), str(slow)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    subscribers.stdout.readline()
+    while len(server.clients) < args.clients:
+        time.sleep(0.01)
+
+    loaded, loaded_lags = drive_callbacks(engine, args.seconds, args.rate)
+    stats = server.stats()
+    subscribers.stdin.close()
+    counts = json.loads(subscribers.stdout.readline())
+    subscribers.wait()
+    server.stop()
+    engine.close()
+    os.rmdir(directory)
+
+    describe(f"{args.clients} subscribers", loaded, loaded_lags)
+    print(f"frames broadcast       {stats['telemetry_frames_broadcast']}; fast clients received "
+          f"min {min(counts)}, max {max(counts)}")
+    print(f"stalled clients        {slow}, frames dropped for them {stats['telemetry_client_dropped_frames']}")
+    # Schedule lag also includes the subscriber process competing for CPU, so only the
+    # callback's own cost is gated
+    if p99(loaded) > max(2 * p99(baseline), p99(baseline) + 100e-6):
+        print("FAIL: subscribers slowed the capture path")
+        sys.exit(1)
+    if min(counts) < stats["telemetry_frames_broadcast"] * 0.9:
+        print("FAIL: fast subscribers missed frames")
+        sys.exit(1)
+    print("OK")
+
+
+def bench_metrics(args):
+    """Per-block cost of process_block with instrumentation off and on"""
+    import numpy as np
+
+    engine = VolumeEngine(make_config(), volume_controller=MemoryVolumeController())
+    engine.is_monitoring = True
+    block = (np.random.randn(engine.blocksize, 1) * 0.05).astype(np.float32)
+    costs = {}
+    for enabled in (False, True, False, True):
+        engine.metrics.enabled = enabled
+        start = time.perf_counter()
+        for _ in range(args.blocks):
+            engine.process_block(block)
+        cost = (time.perf_counter() - start) / args.blocks
+        costs[enabled] = min(cost, costs.get(enabled, cost))
+    engine.close()
+
+    print(f"disabled  {costs[False] * 1e6:8.2f} us/block")
+    print(f"enabled   {costs[True] * 1e6:8.2f} us/block  (+{(costs[True] - costs[False]) * 1e6:.2f} us)")
+    print(engine.metrics.summary())
+
+
+def bench_channels(args):
+    """Per-block analysis cost for N channels: one vectorised reduction vs a per-channel loop"""
+    import numpy as np
+
+    print(f"{'channels':<10}{'vectorised us':>15}{'per-channel us':>16}")
+    for preset in ("default", "low_latency"):
+        settings = CAPTURE_PRESETS[preset]
+        analyzer = IntensityAnalyzer(settings["hop_size"], settings["decimation"])
+        print(f"{preset}:")
+        for channels in (1, 2, 4, 8):
+            block = (np.random.randn(settings["blocksize"], channels) * 0.05).astype(np.float32)
+            start = time.perf_counter()
+            for _ in range(args.blocks):
+                analyzer.analyze_channels(block)
+            vectorised = (time.perf_counter() - start) / args.blocks
+            start = time.perf_counter()
+            for _ in range(args.blocks):
+                for channel in range(channels):
+                    analyzer.analyze(block[:, channel])
+            looped = (time.perf_counter() - start) / args.blocks
+            print(f"{channels:<10}{vectorised * 1e6:>15.1f}{looped * 1e6:>16.1f}")
+
+
+# Transient bytes one raw analysis may allocate: numpy's per-call ufunc bookkeeping, well
+# below a single block of samples, so any copy of the block or its hop windows exceeds it
+RAW_ANALYZER_BUDGET = 2048
+
+
+def peak_allocation(function, *args, calls=500):
+    """Largest transient allocation (bytes, per tracemalloc) of any one of `calls` calls"""
+    import tracemalloc
+
+    tracemalloc.start()
+    transient = 0
+    for _ in range(calls):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        function(*args)
+        transient = max(transient, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return transient
+
+
+def bench_raw(args):
+    """Per-callback CPU time and allocations for float32 vs raw int16 capture, and their dB agreement;
+    fails if the raw analyzer allocates more than numpy's per-call bookkeeping"""
+    import numpy as np
+
+    print(f"{'preset':<13}{'channels':<10}{'dtype':<9}{'us/callback':>12}{'bytes/callback':>16}"
+          f"{'net blocks':>12}{'analyzer bytes':>16}")
+    worst = 0.0
+    allocating = []
+    for preset in CAPTURE_PRESETS:
+        for channels in (1, 2):
+            settings = CAPTURE_PRESETS[preset]
+            # Identical samples on both paths: int16 as the driver delivers them, and PortAudio's float view of it
+            raw = to_int16(np.random.randn(settings["blocksize"], channels) * 0.05)
+            samples = raw.astype(np.float32) / 32768
+            buffer = memoryview(raw.tobytes())
+            frames = len(raw)
+            levels = {}
+            for dtype in ("float32", "int16"):
+                config = make_config()
+                config.settings.update(capture_preset=preset, capture_dtype=dtype,
+                                       inputs=[{"device": None, "channels": list(range(1, channels + 1))}])
+                engine = VolumeEngine(config, volume_controller=MemoryVolumeController())
+                engine.is_monitoring = True
+                if dtype == "int16":
+                    callback, indata = engine._raw_audio_callback, buffer
+                else:
+                    callback, indata = engine._audio_callback, samples
+                for _ in range(100):  # warm-up sizes the scratch buffers
+                    callback(indata, frames, None, None)
+
+                start = time.perf_counter()
+                for _ in range(args.blocks):
+                    callback(indata, frames, None, None)
+                cost = (time.perf_counter() - start) / args.blocks
+
+                blocks_before = sys.getallocatedblocks()
+                transient = peak_allocation(callback, indata, frames, None, None, calls=min(args.blocks, 500))
+                net = sys.getallocatedblocks() - blocks_before
+
+                block = raw if dtype == "int16" else samples
+                analyzer = engine.analyzer
+                analyze = analyzer.analyze_channels if channels > 1 else analyzer.analyze
+                analyzer_bytes = peak_allocation(analyze, block)
+                if dtype == "int16" and analyzer_bytes > RAW_ANALYZER_BUDGET:
+                    allocating.append(f"{preset}/{channels}ch: {analyzer_bytes} bytes")
+                levels[dtype] = np.array(analyzer.analyze_channels(block))
+                engine.close()
+                print(f"{preset:<13}{channels:<10}{dtype:<9}{cost * 1e6:>12.1f}{transient:>16}{net:>12}"
+                      f"{analyzer_bytes:>16}")
+            worst = max(worst, float(np.abs(levels["float32"] - levels["int16"]).max()))
+
+    print(f"max dB difference between paths: {worst:.5f}")
+    failed = False
+    if worst > 0.01:
+        print("FAIL: raw capture changes the dB scale; stored calibrations would be off")
+        failed = True
+    if allocating:
+        print(f"FAIL: raw analysis allocates more than {RAW_ANALYZER_BUDGET} bytes per block: "
+              f"{', '.join(allocating)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+def bench_session(args):
+    """Record H hours of telemetry at the default block rate, then reload and scan it"""
+    import numpy as np
+
+    settings = capture_settings(make_config().settings)
+    records = int(args.hours * 3600 * settings["samplerate"] / settings["blocksize"])
+    ring = TelemetryRing(4096)
+    path = os.path.join(tempfile.mkdtemp(), "session.bin")
+    recorder = SessionRecorder(path, ring.reader())
+    levels = np.random.rand(ring.capacity // 2)
+    push = ring.push
+    batch = len(levels)
+
+    start = time.perf_counter()
+    written = 0
+    while written < records:
+        for level in levels.tolist()[:records - written]:
+            push(time.perf_counter(), level * 100, level, None, level, 0.01)
+        written += batch
+        recorder.drain()
+    recorder.close()
+    record_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    session = load_session(path)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    mean_volume = float(session["volume"].mean())
+    scan_seconds = time.perf_counter() - start
+
+    size = os.path.getsize(path)
+    print(f"records      {len(session)} ({args.hours:g} h), {size / 1e6:.1f} MB, "
+          f"{size / max(1, len(session)):.0f} bytes/record")
+    print(f"record       {len(session) / record_seconds:,.0f} records/s (including ring pushes)")
+    print(f"load         {load_seconds * 1000:.2f} ms")
+    print(f"scan volume  {scan_seconds * 1000:.2f} ms (mean {mean_volume:.3f})")
+    del session
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+class FakeStream:
+    """Stands in for an InputStream and tracks how many are open at once"""
+    open_count = 0
+    max_open = 0
+
+    def __init__(self):
+        self.active = True
+        FakeStream.open_count += 1
+        FakeStream.max_open = max(FakeStream.max_open, FakeStream.open_count)
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        FakeStream.open_count -= 1
+
+
+def bench_supervisor(args):
+    """Inject faults from a callback-like thread while stream opens fail at random"""
+    failures = []
+    logging.getLogger("VolumeControl").setLevel(logging.CRITICAL)  # every injected fault logs a warning
+
+    def open_streams():
+        time.sleep(0.001)  # opening a device takes a moment
+        if random.random() < args.open_failure_rate:
+            raise OSError("device unavailable")
+        return [FakeStream()]
+
+    supervisor = StreamSupervisor(open_streams, on_failure=failures.append,
+                                  initial_backoff=0.005, max_backoff=0.05, max_attempts=20)
+    while True:
+        try:
+            supervisor.ensure_running()
+            break
+        except OSError:
+            pass
+
+    for _ in range(args.faults):
+        # Several callbacks may report the same breakage; only one restart should follow
+        for _ in range(random.randint(1, 3)):
+            supervisor.fault("injected")
+        deadline = time.perf_counter() + 2.0
+        while supervisor._fault_reason is not None or not supervisor.active:
+            if time.perf_counter() > deadline or failures:
+                break
+            time.sleep(0.0005)
+    stats = supervisor.stats()
+    supervisor.close()
+
+    print(f"faults injected      {args.faults}")
+    print(f"restarts             {stats['stream_restart_attempts']} attempts, "
+          f"{stats['stream_recoveries']} recoveries")
+    print(f"recovery time        last {stats['stream_last_recovery_time'] * 1000:.1f} ms, "
+          f"max {stats['stream_max_recovery_time'] * 1000:.1f} ms")
+    print(f"streams open at once max {FakeStream.max_open}, open after close {FakeStream.open_count}")
+    if FakeStream.max_open > 1 or FakeStream.open_count or failures or stats["stream_recoveries"] != args.faults:
+        print("FAIL: duplicate streams, leaked streams or unrecovered faults")
+        sys.exit(1)
+    print("OK")
+
+
+def bench_streams(args):
+    """Per-application volume against the stand-in mixer while streams come and go"""
+    mixer = MemorySinkInputMixer()
+    background = ["Firefox", "Notifications", "Discord", "System Sounds"]
+    targeted = [("Spotify", None), ("mpv", None), ("game", 4242)]
+    for i in range(args.streams):
+        mixer.add(background[i % len(background)], pid=1000 + i)
+    for name, pid in targeted:
+        mixer.add(name, pid=pid)
+    backend = SinkInputVolumeBackend(["spotify", "MPV", 4242], mixer)
+
+    added = 0
+    cost = 0.0
+    for tick in range(args.ticks):
+        if random.random() < args.churn:
+            live = list(mixer.sink_inputs)
+            if random.random() < 0.5 and len(live) > 1:
+                mixer.remove(random.choice(live))
+            else:
+                name, pid = random.choice(targeted) if random.random() < 0.3 else (random.choice(background), None)
+                mixer.add(name, pid=pid)
+                added += 1
+        start = time.perf_counter()
+        backend.set_volume(random.random())
+        cost += time.perf_counter() - start
+        time.sleep(0.0002)  # leave the index thread room to follow events, as the 20 Hz actuator would
+
+    # Let the index catch up, set a final level, then start one more targeted stream
+    time.sleep(0.2)
+    backend.set_volume(0.37)
+    late = mixer.add("Spotify")
+    time.sleep(0.2)
+    index = backend.index
+    streams = mixer.list_sink_inputs()
+    backend.close()
+
+    wrong = [s for s in streams.values() if index.matches(s) and abs(s.volume - 0.37) > 1e-9]
+    touched = [s for s in streams.values() if not index.matches(s) and s.volume != 1.0]
+    print(f"ticks                {args.ticks} ({cost / args.ticks * 1e6:.1f} us/tick)")
+    print(f"mixer transactions   {mixer.transactions} for {len(index.targets)} targeted of {len(streams)} streams")
+    print(f"re-lists             {index.relists} for {added + 1} streams started after launch")
+    print(f"late stream          {'at level' if streams[late].volume == 0.37 else 'NOT at level'}")
+    # One list at start, one for the streams queued before it, then one per later burst of new streams
+    if wrong or touched or streams[late].volume != 0.37 or index.relists > added + 3:
+        print(f"FAIL: {len(wrong)} targeted streams off level, {len(touched)} other streams changed, "
+              f"the late stream was missed, or streams were re-listed per write")
+        sys.exit(1)
+    print("OK")
+
+
+def bench_pipeline(args):
+    """Offline replay of synthetic signals through every capture preset, optionally checked against a baseline"""
+    print(f"{'signal':<8}{'preset':<13}{'blocks/s':>10}{'realtime':>10}{'analyze':>9}{'map':>7}"
+          f"{'smooth':>8}{'actuate':>9}{'telem':>7}{'allocs':>8}{'skipped':>9}   (us/block, net blocks, deadband)")
+    results = {}
+    for preset in CAPTURE_PRESETS:
+        for kind in SYNTHETIC_SIGNALS:
+            config = make_config()
+            config.settings["capture_preset"] = preset
+            session = ReplaySession(config)
+            signal = synthetic_signal(kind, args.seconds, session.engine.samplerate)
+            session.run(signal[:session.engine.blocksize * 50])  # warm-up
+            # Best of several runs, so a baseline check is not tripped by scheduler noise
+            stats = max((session.run(signal, trace_allocations=args.trace) for _ in range(args.repeat)),
+                        key=lambda run: run["blocks_per_second"])
+            session.close()
+
+            stage = stats["stage_us"]
+            print(f"{kind:<8}{preset:<13}{stats['blocks_per_second']:>10.0f}{stats['realtime_factor']:>9.0f}x"
+                  f"{stage['analyze']:>9.1f}{stage['map']:>7.1f}{stage['smooth']:>8.1f}"
+                  f"{stage['actuate']:>9.1f}{stage['telemetry']:>7.1f}{stats['net_allocated_blocks']:>8}"
+                  f"{stats['deadband_avoided_percent']:>8.1f}%")
+            results[f"{kind}/{preset}"] = stats["blocks_per_second"]
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = [
+            f"{name}: {results[name]:.0f} blocks/s vs baseline {expected:.0f}"
+            for name, expected in sorted(baseline.items())
+            if name in results and results[name] < expected * (1 - args.tolerance)
+        ]
+        if slower:
+            print(f"FAIL: slower than baseline by more than {args.tolerance:.0%}")
+            for line in slower:
+                print(f"  {line}")
+            sys.exit(1)
+        print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Voice volume controller benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backends = subparsers.add_parser("backends", help="mixer backend write throughput")
+    backends.add_argument("--calls", type=int, default=200)
+    backends.set_defaults(func=bench_backends)
+
+    smoothers = subparsers.add_parser("smoothers", help="VolumeFilter per-sample cost")
+    smoothers.add_argument("--samples", type=int, default=50000)
+    smoothers.set_defaults(func=bench_smoothers)
+
+    render = subparsers.add_parser("render", help="plot renderer frame rate per mode")
+    render.add_argument("--frames", type=int, default=200)
+    render.set_defaults(func=bench_render)
+
+    history = subparsers.add_parser("history", help="zoomed line graph cost: history pyramid vs raw samples")
+    history.add_argument("--hours", type=float, default=8.0)
+    history.add_argument("--rate", type=float, default=10.0, help="telemetry records per second")
+    history.add_argument("--frames", type=int, default=50)
+    history.set_defaults(func=bench_history)
+
+    startup = subparsers.add_parser("startup", help="cold import time against a budget")
+    startup.add_argument("--budget", type=float, default=0.25, help="seconds (default: %(default)s)")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+
+    handoff = subparsers.add_parser("handoff", help="audio callback to GUI handoff stress test")
+    handoff.add_argument("--seconds", type=float, default=5.0)
+    handoff.add_argument("--rate", type=float, default=1000.0, help="block rate in Hz")
+    handoff.set_defaults(func=bench_handoff)
+
+    metrics = subparsers.add_parser("metrics", help="instrumentation overhead per block")
+    metrics.add_argument("--blocks", type=int, default=20000)
+    metrics.set_defaults(func=bench_metrics)
+
+    channels = subparsers.add_parser("channels", help="multi-channel intensity analysis cost")
+    channels.add_argument("--blocks", type=int, default=2000)
+    channels.set_defaults(func=bench_channels)
+
+    raw = subparsers.add_parser("raw", help="float32 vs raw int16 capture cost and allocations")
+    raw.add_argument("--blocks", type=int, default=5000)
+    raw.set_defaults(func=bench_raw)
+
+    renderer = subparsers.add_parser("renderer", help="callback jitter with the plot in- vs out-of-process")
+    renderer.add_argument("--seconds", type=float, default=5.0)
+    renderer.add_argument("--rate", type=float, default=1000.0)
+    renderer.add_argument("--fps", type=float, default=30.0)
+    renderer.add_argument("--full-redraw", action="store_true",
+                          help="redraw the whole figure every frame instead of blitting")
+    renderer.set_defaults(func=bench_renderer)
+
+    session = subparsers.add_parser("session", help="session recorder append and reload speed")
+    session.add_argument("--hours", type=float, default=8.0)
+    session.set_defaults(func=bench_session)
+
+    server = subparsers.add_parser("server", help="capture timing with many telemetry subscribers")
+    server.add_argument("--clients", type=int, default=300)
+    server.add_argument("--slow-fraction", type=float, default=0.1)
+    server.add_argument("--seconds", type=float, default=5.0)
+    server.add_argument("--rate", type=float, default=1000.0)
+    server.set_defaults(func=bench_server)
+
+    supervisor = subparsers.add_parser("supervisor", help="stream restart stress test")
+    supervisor.add_argument("--faults", type=int, default=200)
+    supervisor.add_argument("--open-failure-rate", type=float, default=0.3)
+    supervisor.set_defaults(func=bench_supervisor)
+
+    streams = subparsers.add_parser("streams", help="per-application volume with stream churn")
+    streams.add_argument("--ticks", type=int, default=5000)
+    streams.add_argument("--streams", type=int, default=40, help="untargeted background streams")
+    streams.add_argument("--churn", type=float, default=0.05, help="chance per tick of a stream starting or ending")
+    streams.set_defaults(func=bench_streams)
+
+    pipeline = subparsers.add_parser("pipeline", help="offline replay throughput with baselines")
+    pipeline.add_argument("--seconds", type=float, default=30.0, help="audio per signal")
+    pipeline.add_argument("--repeat", type=int, default=3)
+    pipeline.add_argument("--trace", action="store_true", help="also run tracemalloc (slower)")
+    pipeline.add_argument("--save-baseline", metavar="PATH")
+    pipeline.add_argument("--baseline", metavar="PATH", help="fail if slower than this baseline")
+    pipeline.add_argument("--tolerance", type=float, default=0.25,
+                          help="allowed fractional slowdown (default: %(default)s)")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args()
+    logger.setLevel("WARNING")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
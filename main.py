@@ -1,249 +1,4167 @@
-import sounddevice as sd
-import numpy as np
+import time
+
+_import_started = time.perf_counter()
+
 import math
-import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib as plt
+import bisect
+import heapq
 import threading
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import queue
-import time
+import collections
 import json
+import mmap
 import os
+import re
 import platform
+import select
+import shutil
 import subprocess
-from pygame import mixer
 import logging
+import logging.handlers
+import queue
+import atexit
+import argparse
+import contextlib
+import concurrent.futures
+import functools
+import importlib
+import signal
+import stat
+import struct
+import sys
+import tracemalloc
+import wave
+
+
+class StartupProfiler:
+    """Collects per-phase import and initialisation times (--profile-startup)"""
+    def __init__(self):
+        self.enabled = False
+        self.phases = []
+        self.reported = False
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self):
+        """Log the collected timings once; lazy imports are nested inside phases"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        total = time.perf_counter() - _import_started
+        lines = [f"  {name:<40}{seconds * 1000:9.1f} ms" for name, seconds in self.phases]
+        logger.info("Startup profile:\n" + "\n".join(lines) +
+                    f"\n  {'total since import':<40}{total * 1000:9.1f} ms")
+
+
+startup_profiler = StartupProfiler()
+
+
+class LazyModule:
+    """Module proxy that defers the import until an attribute is first used.
+
+    Heavy dependencies go through this so each is only loaded by the feature
+    that needs it: the headless daemon never loads Tk or matplotlib.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            startup_profiler.record(f"import {self._name}", time.perf_counter() - start)
+            # Rebind our module-level alias so later lookups skip the proxy
+            for alias, value in list(globals().items()):
+                if value is self:
+                    globals()[alias] = self._module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def preload(*modules):
+    """Import lazy modules now, e.g. before entering a real-time callback"""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            module._load()
+
+
+np = LazyModule("numpy")
+sd = LazyModule("sounddevice")
+tk = LazyModule("tkinter")
+ttk = LazyModule("tkinter.ttk")
+messagebox = LazyModule("tkinter.messagebox")
+mpl_figure = LazyModule("matplotlib.figure")
+mpl_patches = LazyModule("matplotlib.patches")
+backend_tkagg = LazyModule("matplotlib.backends.backend_tkagg")
+ctypes = LazyModule("ctypes")
+asyncio = LazyModule("asyncio")
+socket = LazyModule("socket")
+multiprocessing = LazyModule("multiprocessing")
+shared_memory = LazyModule("multiprocessing.shared_memory")
+
+
+LOG_FILE = os.environ.get("VOLUME_CONTROL_LOG", "volume_control.log")  # empty: stderr only
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUP_COUNT = 3
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records untouched; formatting happens on the listener thread"""
+    def prepare(self, record):
+        return record
+
+
+# Set up logging
+def setup_logging():
+    """Route all records through a queue so callers never format or do file/terminal I/O.
+
+    A QueueListener thread formats the records and writes them to a size-rotated
+    log file and to stderr.
+    """
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler()]
+    if LOG_FILE:
+        handlers.insert(0, logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flushes anything still queued
+
+    logging.basicConfig(level=logging.INFO, handlers=[_DeferredQueueHandler(log_queue)])
+    return logging.getLogger('VolumeControl')
+
+logger = setup_logging()
+
+
+class LogAggregator:
+    """Collapses a repeated hot-path message into at most one line per `interval` seconds.
+
+    The first occurrence is logged straight away; repeats are counted per
+    detail string and reported with their count once the interval has passed,
+    or on flush().
+    """
+    def __init__(self, message, level=logging.WARNING, interval=5.0):
+        self.message = message
+        self.level = level
+        self.interval = interval
+        self.counts = {}
+        self.last_emit = -math.inf
+
+    def __call__(self, detail):
+        self.counts[detail] = self.counts.get(detail, 0) + 1
+        if time.monotonic() - self.last_emit >= self.interval:
+            self.flush()
+
+    def flush(self):
+        counts, self.counts = self.counts, {}
+        for detail, count in counts.items():
+            if count == 1:
+                logger.log(self.level, "%s: %s", self.message, detail)
+            else:
+                logger.log(self.level, "%s: %s (%d times since the last report)",
+                           self.message, detail, count)
+        self.last_emit = time.monotonic()
+
+
+class ConfigFileWatcher:
+    """Calls on_change() when the config file is written or replaced on disk.
+
+    On Linux this uses inotify through ctypes, watching the directory so
+    atomic renames are seen too; elsewhere, or if inotify is unavailable, it
+    polls the file's stat every `poll_interval` seconds.
+    """
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+
+    def __init__(self, path, on_change, poll_interval=1.0):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._inotify_fd = None
+        self._wake_read, self._wake_write = os.pipe()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        try:
+            self._open_inotify()
+            target = self._run_inotify
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable, polling the config file instead: {e}")
+            target = self._run_polling
+        self._running = True
+        self._thread = threading.Thread(target=target, name="ConfigFileWatcher", daemon=True)
+        self._thread.start()
+
+    def _open_inotify(self):
+        if platform.system() != "Linux":
+            raise OSError("not Linux")
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, "inotify_add_watch failed")
+        self._inotify_fd = fd
+
+    def _run_inotify(self):
+        name = os.path.basename(self.path).encode()
+        while self._running:
+            readable, _, _ = select.select([self._inotify_fd, self._wake_read], [], [])
+            if self._wake_read in readable:
+                break
+            try:
+                data = os.read(self._inotify_fd, 4096)
+            except BlockingIOError:
+                continue
+            # struct inotify_event: int wd; uint32 mask, cookie, len; char name[len]
+            changed = False
+            offset = 0
+            while offset + 16 <= len(data):
+                name_length = int.from_bytes(data[offset + 12:offset + 16], sys.byteorder)
+                event_name = data[offset + 16:offset + 16 + name_length].rstrip(b"\0")
+                changed |= event_name == name
+                offset += 16 + name_length
+            if changed:
+                self._notify()
+
+    def _run_polling(self):
+        last_signature = file_signature(self.path)
+        while self._running:
+            readable, _, _ = select.select([self._wake_read], [], [], self.poll_interval)
+            if readable:
+                break
+            signature = file_signature(self.path)
+            if signature != last_signature:
+                last_signature = signature
+                self._notify()
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            logger.error(f"Config reload failed: {e}")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        os.write(self._wake_write, b"\0")
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+
+def file_signature(path):
+    """(inode, mtime, size) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class Config:
+    """Typed settings store with change subscriptions and background persistence.
+
+    `settings` holds the current values. Changes made through set()/update()
+    are validated against the type of the default, delivered to subscribers
+    of that key, and written to disk by a background thread once no further
+    change has arrived for `save_delay` seconds (temp file plus rename, so
+    the file is never truncated). start_watching() reloads the file when it
+    is edited on disk and notifies subscribers of the keys that changed.
+    Subscribers run on the thread that made the change.
+    """
+    # Settings whose default is None, so their type cannot be inferred
+    optional_types = {"metrics_export_path": str, "session_record_path": str, "telemetry_server": str}
+    # Numeric settings clamped to a range
+    ranges = {"sensitivity": (0.1, 2.0)}
+
+    def __init__(self, config_file="volume_control_config.json", save_delay=1.0):
+        self.config_file = config_file
+        self.save_delay = save_delay
+        self.defaults = {
+            "sensitivity": 1.0,
+            "max_history": 100,
+            "update_interval": 100,
+            "target_fps": 10,
+            "telemetry_capacity": 4096,
+            "continuous_calibration": False,
+            "noise_tracking_step": 0.05,
+            "capture_preset": "default",
+            "capture": {},
+            "capture_dtype": "float32",
+            "visualization_mode": "Line Graph",
+            "history_span": "Recent",
+            "volume_backend": "auto",
+            "volume_targets": [],
+            "max_write_rate": 20,
+            "volume_poll_interval": 1.0,
+            "metrics_enabled": False,
+            "metrics_export_path": None,
+            "metrics_export_interval": 10.0,
+            "show_stats_panel": False,
+            "renderer_process": False,
+            "session_record_path": None,
+            "telemetry_server": None,
+            "telemetry_server_interval": 0.05,
+            "telemetry_client_buffer": 64,
+            "inputs": [],
+            "fusion": {
+                "policy": "max",
+                "weights": [],
+                "priority": []
+            },
+            "channel_calibrations": [],
+            "mapping": {
+                "curve": "linear",
+                "points": [],
+                "lut_size": 1024,
+                "deadband": 0.01,
+                "hysteresis": 0.005
+            },
+            "smoothing": {
+                "method": "moving_average",
+                "window_size": 5
+            },
+            "calibration": {
+                "min": 0,
+                "max": 100
+            }
+        }
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._subscribers = collections.defaultdict(list)
+        self._dirty = False
+        self._closed = False
+        self._save_requested = threading.Event()
+        self._writer = None
+        self._written_signature = None
+        self.watcher = None
+        self.settings = self.load_config()
+
+    def coerce(self, key, value):
+        """Validate `value` against the type of the default for `key`; raises TypeError"""
+        if key not in self.defaults:
+            return value
+        default = self.defaults[key]
+        if default is None:
+            if value is None or isinstance(value, self.optional_types.get(key, object)):
+                return value
+        elif isinstance(default, bool):
+            if isinstance(value, bool):
+                return value
+        elif isinstance(default, (int, float)):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if isinstance(default, float):
+                    value = float(value)
+                elif isinstance(value, float):
+                    # Integer settings take floats only when they are exact integers (2.0, not 2.5)
+                    if not value.is_integer():
+                        raise TypeError(f"Setting {key!r} expects an integer, got {value!r}")
+                    value = int(value)
+                if key in self.ranges:
+                    low, high = self.ranges[key]
+                    value = max(low, min(high, value))
+                return value
+        elif isinstance(default, dict):
+            # Partial sections are completed from the defaults
+            if isinstance(value, dict):
+                return {**default, **value}
+        elif isinstance(value, type(default)):
+            return value
+        raise TypeError(f"Setting {key!r} expects {type(default).__name__}, got {value!r}")
+
+    def load_config(self):
+        """Read the file; invalid values fall back to their defaults"""
+        settings = json.loads(json.dumps(self.defaults))
+        try:
+            with open(self.config_file, 'r') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return settings
+        for key, value in stored.items():
+            try:
+                settings[key] = self.coerce(key, value)
+            except TypeError as e:
+                logger.warning(f"Ignoring invalid config value: {e}")
+        return settings
+
+    def get(self, key):
+        return self.settings[key]
+
+    def subscribe(self, key, callback):
+        """Call callback(value) whenever `key` changes"""
+        self._subscribers[key].append(callback)
+
+    def unsubscribe(self, key, callback):
+        if callback in self._subscribers[key]:
+            self._subscribers[key].remove(callback)
+
+    def set(self, key, value, save=True):
+        self.update({key: value}, save=save)
+
+    def update(self, values, save=True):
+        """Apply several settings, notify subscribers of the ones that changed, and schedule a save"""
+        values = {key: self.coerce(key, value) for key, value in values.items()}
+        with self._lock:
+            changed = {key: value for key, value in values.items() if self.settings.get(key) != value}
+            self.settings.update(changed)
+        if not changed:
+            return
+        for key, value in changed.items():
+            for callback in list(self._subscribers[key]):
+                callback(value)
+        if save:
+            self.save_config()
+
+    def save_config(self):
+        """Schedule a debounced background write of the current settings"""
+        self._dirty = True
+        if self._closed:
+            self.flush()
+            return
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name="ConfigWriter", daemon=True)
+            self._writer.start()
+        self._save_requested.set()
+
+    def _run_writer(self):
+        while not self._closed:
+            self._save_requested.wait()
+            # Wait for a quiet period so a burst of changes becomes one write
+            while not self._closed:
+                self._save_requested.clear()
+                if not self._save_requested.wait(self.save_delay):
+                    break
+            self.flush()
+
+    def flush(self):
+        """Write pending changes now (temp file, fsync, rename)"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                text = json.dumps(self.settings, indent=4)
+            # Setters only wait for the snapshot above, never for the disk
+            try:
+                temp_file = f"{self.config_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.config_file)
+                self._written_signature = file_signature(self.config_file)
+            except Exception as e:
+                logger.error(f"Failed to save config: {e}")
+
+    def start_watching(self, poll_interval=1.0):
+        """Reload the file whenever it changes on disk"""
+        if self.watcher is None:
+            self.watcher = ConfigFileWatcher(self.config_file, self.reload, poll_interval)
+            self.watcher.start()
+
+    def reload(self):
+        """Apply the file's current contents, ignoring our own writes"""
+        if file_signature(self.config_file) == self._written_signature:
+            return
+        try:
+            settings = self.load_config()
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable config file: {e}")
+            return
+        logger.info(f"Reloading {self.config_file}")
+        self.update(settings, save=False)
+
+    def close(self):
+        """Stop watching and write any pending changes"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self._closed = True
+        self._save_requested.set()
+        if self._writer is not None:
+            self._writer.join(timeout=2)
+            self._writer = None
+        self.flush()
+
+
+class MovingAverageSmoother:
+    """Moving average over a preallocated ring buffer with a running sum (O(1))"""
+    def __init__(self, window_size=5):
+        self.window_size = max(1, int(window_size))
+        self.buffer = [0.0] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, value):
+        if self.count < self.window_size:
+            self.count += 1
+        else:
+            self.total -= self.buffer[self.index]
+        self.buffer[self.index] = value
+        self.total += value
+        self.index += 1
+        if self.index == self.window_size:
+            self.index = 0
+            # Resynchronise once per lap so floating-point drift cannot accumulate
+            self.total = sum(self.buffer[:self.count])
+        return self.total / self.count
+
+    def reset(self):
+        self.buffer = [0.0] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+
+class ExponentialSmoother:
+    """Exponential moving average (O(1))"""
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+
+class RunningMedianSmoother:
+    """Sliding-window median using two heaps with lazy deletion.
+
+    Samples leaving the window are only marked in `delayed` and popped once
+    they reach a heap top. When stale entries make the heaps hold more than
+    twice the window, both are rebuilt from the window itself, so memory
+    stays bounded and each sample costs O(log window) amortized.
+    """
+    def __init__(self, window_size=5):
+        self.window_size = max(1, int(window_size))
+        self.reset()
+
+    def reset(self):
+        self.buffer = [0.0] * self.window_size
+        self.index = 0
+        self.count = 0
+        self.low = []   # max-heap of the lower half (values negated)
+        self.high = []  # min-heap of the upper half
+        self.low_size = 0
+        self.high_size = 0
+        self.delayed = {}
+
+    def _prune(self, heap, sign):
+        while heap:
+            value = sign * heap[0]
+            pending = self.delayed.get(value)
+            if not pending:
+                break
+            if pending == 1:
+                del self.delayed[value]
+            else:
+                self.delayed[value] = pending - 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+            self._prune(self.low, -1)
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.high_size -= 1
+            self.low_size += 1
+            self._prune(self.high, 1)
+
+    def _insert(self, value):
+        if not self.low or value <= -self.low[0]:
+            heapq.heappush(self.low, -value)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, value)
+            self.high_size += 1
+        self._rebalance()
+
+    def _remove(self, value):
+        self.delayed[value] = self.delayed.get(value, 0) + 1
+        if value <= -self.low[0]:
+            self.low_size -= 1
+            if value == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.high_size -= 1
+            if self.high and value == self.high[0]:
+                self._prune(self.high, 1)
+        self._rebalance()
+
+    def _compact(self):
+        """Rebuild both heaps from the window, dropping every stale entry"""
+        ordered = sorted(self.buffer[:self.count])
+        half = (self.count + 1) // 2
+        # An ascending list is already a min-heap, and so is the lower half negated in reverse
+        self.low = [-value for value in reversed(ordered[:half])]
+        self.high = ordered[half:]
+        self.low_size = half
+        self.high_size = self.count - half
+        self.delayed.clear()
+
+    def update(self, value):
+        if self.count == self.window_size:
+            self._remove(self.buffer[self.index])
+        else:
+            self.count += 1
+        self.buffer[self.index] = value
+        self.index = (self.index + 1) % self.window_size
+        self._insert(value)
+        if len(self.low) + len(self.high) > 2 * self.window_size:
+            self._compact()
+
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+
+class OneEuroSmoother:
+    """One-euro adaptive low-pass filter (O(1)).
+
+    Smooths heavily while the signal is steady and follows it quickly when it
+    moves; `rate` is the number of samples per second.
+    """
+    def __init__(self, rate=10.0, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.rate = rate
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = 0.0
+
+    def _alpha(self, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau * self.rate)
+
+    def update(self, value):
+        if self.value is None:
+            self.value = value
+            return value
+        derivative = (value - self.value) * self.rate
+        self.derivative += self._alpha(self.d_cutoff) * (derivative - self.derivative)
+        cutoff = self.min_cutoff + self.beta * abs(self.derivative)
+        self.value += self._alpha(cutoff) * (value - self.value)
+        return self.value
+
+
+SMOOTHING_METHODS = ["moving_average", "ema", "median", "one_euro"]
+
+
+class VolumeFilter:
+    """Smooths volume targets with one of the SMOOTHING_METHODS"""
+    def __init__(self, window_size=5, method="moving_average", alpha=0.3,
+                 min_cutoff=1.0, beta=0.0, d_cutoff=1.0, rate=10.0):
+        self.window_size = window_size
+        self.method = method
+        if method == "moving_average":
+            self.smoother = MovingAverageSmoother(window_size)
+        elif method == "ema":
+            self.smoother = ExponentialSmoother(alpha)
+        elif method == "median":
+            self.smoother = RunningMedianSmoother(window_size)
+        elif method == "one_euro":
+            self.smoother = OneEuroSmoother(rate, min_cutoff, beta, d_cutoff)
+        else:
+            raise ValueError(f"Unknown smoothing method: {method}")
+
+    def smooth_volume(self, new_volume):
+        return self.smoother.update(new_volume)
+
+    def reset(self):
+        self.smoother.reset()
+
+
+class VolumeBackend:
+    """Base class for the mixer backends driven by VolumeController"""
+    name = "base"
+
+    def set_volume(self, volume_level):
+        """Set mixer volume (0.0 to 1.0)"""
+        raise NotImplementedError
+
+    def get_volume(self):
+        """Get mixer volume (0.0 to 1.0)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend"""
+
+
+class ShellVolumeBackend(VolumeBackend):
+    """Original shell-out implementation, kept as a portable fallback"""
+    name = "shell"
+
+    def __init__(self, system=None):
+        self.system = system or platform.system()
+
+    def set_volume(self, volume_level):
+        volume_level_percent = int(volume_level * 100)
+        if self.system == "Darwin":  # macOS
+            os.system(f"osascript -e 'set volume output volume {volume_level_percent}'")
+        elif self.system == "Linux":
+            os.system(f"amixer -D pulse sset Master {volume_level_percent}%")
+
+    def get_volume(self):
+        if self.system == "Darwin":  # macOS
+            cmd = "osascript -e 'output volume of (get volume settings)'"
+            result = subprocess.check_output(cmd, shell=True).strip()
+            return float(result) / 100.0
+        elif self.system == "Linux":
+            cmd = "amixer -D pulse sget Master | grep 'Left:' | awk -F'[][]' '{ print $2 }'"
+            result = subprocess.check_output(cmd, shell=True).strip()
+            return float(result.decode('utf-8').replace('%', '')) / 100.0
+        return 0.0
+
+
+class PycawVolumeBackend(VolumeBackend):
+    """Windows endpoint volume through pycaw (already a persistent COM handle)"""
+    name = "pycaw"
+
+    def __init__(self):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        devices = AudioUtilities.GetSpeakers()
+        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.volume = cast(interface, POINTER(IAudioEndpointVolume))
+
+    def set_volume(self, volume_level):
+        self.volume.SetMasterVolumeLevelScalar(volume_level, None)
+
+    def get_volume(self):
+        return self.volume.GetMasterVolumeLevelScalar()
+
+
+class AmixerWorkerBackend(VolumeBackend):
+    """Linux backend holding one long-lived `amixer --stdin` process.
+
+    Writes are a single line on the worker's stdin instead of a shell plus
+    an amixer process per call. The worker is restarted once if it dies.
+    """
+    name = "amixer-worker"
+    _level_pattern = re.compile(r"\[(\d+)%\]")
+
+    def __init__(self, device="pulse", control="Master"):
+        if shutil.which("amixer") is None:
+            raise RuntimeError("amixer not found")
+        self.device = device
+        self.control = control
+        self.process = None
+        self._start_worker()
+
+    def _start_worker(self):
+        self.process = subprocess.Popen(
+            ["amixer", "-D", self.device, "-q", "--stdin"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+
+    def _send(self, command):
+        self.process.stdin.write(command + "\n")
+        self.process.stdin.flush()
+
+    def set_volume(self, volume_level):
+        command = f"sset {self.control} {int(volume_level * 100)}%"
+        try:
+            if self.process.poll() is not None:
+                raise BrokenPipeError("amixer worker exited")
+            self._send(command)
+        except (BrokenPipeError, OSError, ValueError):
+            logger.warning("amixer worker died, restarting")
+            self.close()
+            self._start_worker()
+            self._send(command)
+
+    def get_volume(self):
+        output = subprocess.check_output(
+            ["amixer", "-D", self.device, "sget", self.control],
+            stderr=subprocess.DEVNULL
+        ).decode('utf-8')
+        match = self._level_pattern.search(output)
+        if match is None:
+            raise RuntimeError(f"Could not parse amixer output for {self.control}")
+        return float(match.group(1)) / 100.0
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.process.kill()
+        self.process = None
+
+
+# PulseAudio's 100% volume (PA_VOLUME_NORM)
+PA_VOLUME_NORM = 65536
+
+SinkInput = collections.namedtuple("SinkInput", "index name binary pid volume")
+
+
+def parse_sink_inputs(text):
+    """Parse `pactl list sink-inputs` output into {index: SinkInput}; volume is 0.0 to 1.0+"""
+    sink_inputs = {}
+    for block in re.split(r"^Sink Input #", text, flags=re.M)[1:]:
+        index = int(block.split(None, 1)[0])
+        properties = dict(re.findall(r'^\s*([\w.]+) = "(.*)"$', block, re.M))
+        volume = re.search(r"^\s*Volume:(.*)$", block, re.M)
+        percents = [int(p) for p in re.findall(r"(\d+)%", volume.group(1))] if volume else []
+        pid = properties.get("application.process.id", "")
+        sink_inputs[index] = SinkInput(
+            index,
+            properties.get("application.name", ""),
+            properties.get("application.process.binary", ""),
+            int(pid) if pid.isdigit() else None,
+            sum(percents) / len(percents) / 100 if percents else None
+        )
+    return sink_inputs
+
+
+class PactlSinkInputMixer:
+    """PulseAudio/PipeWire sink-inputs through pactl, with writes batched into pacmd.
+
+    A long-lived `pactl subscribe` feeds next_event(). apply() writes one
+    `set-sink-input-volume` line per stream to a persistent `pacmd` process
+    in a single pipe write, so a control tick is one transaction however
+    many streams it touches. PipeWire's pulse server has no pacmd, and pactl
+    takes one command per process, so there each stream costs a `pactl`
+    call; PulsectlSinkInputMixer avoids that and is preferred when installed.
+    """
+    _event_pattern = re.compile(r"Event '(\w+)' on sink-input #(\d+)")
+
+    def __init__(self):
+        if shutil.which("pactl") is None:
+            raise RuntimeError("pactl not found")
+        # The C locale keeps `pactl list` parseable
+        self._env = {**os.environ, "LC_ALL": "C"}
+        self._lock = threading.Lock()
+        self._lines = collections.deque()
+        self._partial = b""
+        # Subscribe before anything lists streams, so no event falls in between
+        self.subscription = subprocess.Popen(["pactl", "subscribe"], stdout=subprocess.PIPE,
+                                             stderr=subprocess.DEVNULL, env=self._env)
+        self.worker = None
+        if shutil.which("pacmd"):
+            self._start_worker()
+        if self.worker is None:
+            logger.warning("pacmd unavailable, setting sink-input volumes with one pactl call per stream; "
+                           "install pulsectl for a persistent connection")
+
+    def _start_worker(self):
+        self.worker = subprocess.Popen(["pacmd"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, text=True, env=self._env)
+        try:
+            # pacmd exits straight away when there is no PulseAudio daemon to talk to
+            self.worker.wait(timeout=0.2)
+        except subprocess.TimeoutExpired:
+            return
+        self.worker = None
+
+    def list_sink_inputs(self):
+        output = subprocess.check_output(["pactl", "list", "sink-inputs"], stderr=subprocess.DEVNULL,
+                                         env=self._env)
+        return parse_sink_inputs(output.decode("utf-8", "replace"))
+
+    def next_event(self, timeout=None):
+        """Return the next (kind, index) sink-input event, kind being 'new', 'change' or 'remove'; None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stdout = self.subscription.stdout
+        while True:
+            while self._lines:
+                match = self._event_pattern.search(self._lines.popleft())
+                if match:
+                    return match.group(1), int(match.group(2))
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([stdout], [], [], remaining)
+            if not readable:
+                return None
+            # Raw reads: a buffered readline() could hold back lines that select() no longer sees
+            chunk = os.read(stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError("pactl subscribe exited")
+            *lines, self._partial = (self._partial + chunk).split(b"\n")
+            self._lines.extend(line.decode("utf-8", "replace") for line in lines)
+
+    def apply(self, indices, volume_level):
+        """Set every sink-input in `indices` to `volume_level` (0.0 to 1.0) in one transaction"""
+        volume = int(round(volume_level * PA_VOLUME_NORM))
+        with self._lock:
+            if self.worker is not None:
+                try:
+                    if self.worker.poll() is not None:
+                        raise BrokenPipeError("pacmd exited")
+                    self.worker.stdin.write("".join(f"set-sink-input-volume {index} {volume}\n"
+                                                    for index in indices))
+                    self.worker.stdin.flush()
+                    return
+                except (BrokenPipeError, OSError, ValueError):
+                    logger.warning("pacmd worker died, setting sink-input volumes through pactl")
+                    self._stop_worker()
+            for index in indices:
+                subprocess.run(["pactl", "set-sink-input-volume", str(index), str(volume)],
+                               stderr=subprocess.DEVNULL, check=False)
+
+    def _stop_worker(self):
+        if self.worker is None:
+            return
+        try:
+            self.worker.stdin.close()
+            self.worker.wait(timeout=1)
+        except Exception:
+            self.worker.kill()
+        self.worker = None
+
+    def close(self):
+        with self._lock:
+            self._stop_worker()
+        self.subscription.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            self.subscription.wait(timeout=1)
+
+
+class PulsectlSinkInputMixer:
+    """PulseAudio/PipeWire sink-inputs through the native protocol (pulsectl).
+
+    Writes go over one persistent connection, so a control tick costs one
+    request per stream and no process at all; this works on PipeWire's
+    pulse server, which has no pacmd. Events arrive on a second connection
+    because pulsectl blocks a connection while it listens.
+    """
+    def __init__(self):
+        import pulsectl
+
+        self._pulsectl = pulsectl
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._pulse = pulsectl.Pulse("voice-volume-control")
+        self._events = pulsectl.Pulse("voice-volume-control-events")
+        self._events.event_mask_set("sink_input")
+        self._events.event_callback_set(self._on_event)
+
+    def _on_event(self, event):
+        for kind in ("new", "change", "remove"):
+            if event.t == kind:
+                self._pending.append((kind, event.index))
+        # Hand the event to next_event() straight away instead of listening until the timeout
+        raise self._pulsectl.PulseLoopStop
+
+    def list_sink_inputs(self):
+        with self._lock:
+            streams = self._pulse.sink_input_list()
+        sink_inputs = {}
+        for stream in streams:
+            properties = stream.proplist
+            pid = properties.get("application.process.id", "")
+            sink_inputs[stream.index] = SinkInput(
+                stream.index,
+                properties.get("application.name", ""),
+                properties.get("application.process.binary", ""),
+                int(pid) if pid.isdigit() else None,
+                stream.volume.value_flat
+            )
+        return sink_inputs
+
+    def next_event(self, timeout=None):
+        """Return the next (kind, index) sink-input event, kind being 'new', 'change' or 'remove'; None on timeout"""
+        if not self._pending:
+            self._events.event_listen(timeout=timeout)
+        return self._pending.popleft() if self._pending else None
+
+    def apply(self, indices, volume_level):
+        """Set every sink-input in `indices` to `volume_level` (0.0 to 1.0) over the open connection"""
+        # Like pactl, a one-channel volume is spread over all of a stream's channels
+        volume = self._pulsectl.PulseVolumeInfo(volume_level, 1)
+        with self._lock:
+            for index in indices:
+                try:
+                    self._pulse.sink_input_volume_set(index, volume)
+                except (self._pulsectl.PulseIndexError, self._pulsectl.PulseOperationFailed):
+                    pass  # the stream ended after the last event was handled
+
+    def close(self):
+        with self._lock:
+            self._pulse.close()
+        self._events.close()
+
+
+def open_sink_input_mixer():
+    """The native pulsectl mixer when it can connect, otherwise the pactl/pacmd one"""
+    try:
+        return PulsectlSinkInputMixer()
+    except Exception as e:
+        logger.info(f"pulsectl unavailable, using pactl for sink-input volumes: {e}")
+        return PactlSinkInputMixer()
+
+
+class MemorySinkInputMixer:
+    """In-memory stand-in for PactlSinkInputMixer, used by benchmarks and stress tests.
+
+    Streams are added and removed by hand; like PulseAudio it emits a 'new',
+    'remove' or 'change' event for each, including volume changes it applies.
+    """
+    def __init__(self):
+        self.sink_inputs = {}
+        self.transactions = 0
+        self.lists = 0
+        self._events = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._next_index = 0
+
+    def add(self, name, pid=None, binary="", volume=1.0):
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+            self.sink_inputs[index] = SinkInput(index, name, binary, pid, volume)
+        self._events.put(("new", index))
+        return index
+
+    def remove(self, index):
+        with self._lock:
+            del self.sink_inputs[index]
+        self._events.put(("remove", index))
+
+    def list_sink_inputs(self):
+        with self._lock:
+            self.lists += 1
+            return dict(self.sink_inputs)
+
+    def next_event(self, timeout=None):
+        try:
+            return self._events.get(timeout=timeout) if timeout != 0 else self._events.get_nowait()
+        except queue.Empty:
+            return None
+
+    def apply(self, indices, volume_level):
+        with self._lock:
+            self.transactions += 1
+            changed = [index for index in indices if index in self.sink_inputs]
+            for index in changed:
+                self.sink_inputs[index] = self.sink_inputs[index]._replace(volume=volume_level)
+        for index in changed:
+            self._events.put(("change", index))
+
+    def close(self):
+        pass
+
+
+class SinkInputIndex:
+    """Sink-inputs of the targeted applications, kept current from mixer events.
+
+    The streams are listed once at start. After that, 'remove' events drop
+    entries directly and a burst of 'new' events costs a single re-list, so
+    volume writes never list streams, and 'change' events (including those
+    our own writes cause) need no work. Targets are application names
+    (matched case-insensitively against the name or binary) or PIDs.
+    `on_added` is called with the indices of targeted streams that appear.
+    If the event stream fails, the list is re-read every `poll_interval`.
+    """
+    def __init__(self, mixer, targets, on_added=None, poll_interval=2.0):
+        self.mixer = mixer
+        self.names = {str(target).lower() for target in targets if not isinstance(target, int)}
+        self.pids = {target for target in targets if isinstance(target, int)}
+        self.on_added = on_added
+        self.poll_interval = poll_interval
+        # Both are replaced, never mutated, so other threads can read them without a lock
+        self.sink_inputs = {}
+        self.targets = ()
+        self.relists = 0
+        self._running = False
+        self._thread = None
+
+    def matches(self, sink_input):
+        return (sink_input.pid in self.pids or sink_input.name.lower() in self.names
+                or sink_input.binary.lower() in self.names)
+
+    def start(self):
+        self.refresh()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SinkInputIndex", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def refresh(self):
+        """Re-list the mixer's sink-inputs and recompute the targeted ones"""
+        self.relists += 1
+        sink_inputs = self.mixer.list_sink_inputs()
+        targets = tuple(sorted(index for index, sink_input in sink_inputs.items() if self.matches(sink_input)))
+        added = set(targets).difference(self.targets)
+        self.sink_inputs, self.targets = sink_inputs, targets
+        if added and self.on_added is not None:
+            self.on_added(sorted(added))
+
+    def _remove(self, index):
+        if index not in self.sink_inputs:
+            return
+        sink_inputs = dict(self.sink_inputs)
+        del sink_inputs[index]
+        self.sink_inputs = sink_inputs
+        if index in self.targets:
+            self.targets = tuple(target for target in self.targets if target != index)
+
+    def _run(self):
+        try:
+            self._follow_events()
+        except Exception as e:
+            logger.warning(f"Sink-input events unavailable, re-listing every {self.poll_interval}s: {e}")
+            while self._running:
+                time.sleep(self.poll_interval)
+                if self._running:
+                    self.refresh()
+
+    def _follow_events(self):
+        while self._running:
+            event = self.mixer.next_event(timeout=0.5)
+            stale = False
+            # Handle the whole burst before re-listing once
+            while event is not None:
+                kind, index = event
+                if kind == "remove":
+                    self._remove(index)
+                elif kind == "new":
+                    stale = True
+                event = self.mixer.next_event(timeout=0)
+            if stale:
+                self.refresh()
+
+    def target_volume(self):
+        """Mean listed volume of the targeted streams, or None if there are none"""
+        volumes = [self.sink_inputs[index].volume for index in self.targets
+                   if index in self.sink_inputs and self.sink_inputs[index].volume is not None]
+        return sum(volumes) / len(volumes) if volumes else None
+
+
+class SinkInputVolumeBackend(VolumeBackend):
+    """Linux per-application volume: drives the sink-inputs of the `volume_targets` apps.
+
+    Each set_volume() call, i.e. each VolumeActuator tick, is one batched
+    mixer transaction covering every targeted stream. Streams that start
+    later are set to the current level as soon as they appear.
+    """
+    name = "sink-inputs"
+
+    def __init__(self, targets=(), mixer=None):
+        if not targets:
+            raise ValueError("the sink-inputs backend needs volume_targets")
+        self.mixer = mixer if mixer is not None else open_sink_input_mixer()
+        self.level = None
+        self.index = SinkInputIndex(self.mixer, targets, on_added=self._on_targets_added).start()
+
+    def _on_targets_added(self, indices):
+        if self.level is not None:
+            self.mixer.apply(indices, self.level)
+
+    def set_volume(self, volume_level):
+        self.level = volume_level
+        targets = self.index.targets
+        if targets:
+            self.mixer.apply(targets, volume_level)
+
+    def get_volume(self):
+        """Re-list the streams and return the targets' mean volume.
+
+        This costs one list request, but VolumeController only calls it from
+        refresh(), i.e. at start and at most once per watcher poll interval.
+        """
+        self.index.refresh()
+        volume = self.index.target_volume()
+        if volume is None:
+            # No targeted stream is playing: report what the next one will be set to
+            return self.level if self.level is not None else 1.0
+        return min(1.0, volume)
+
+    def close(self):
+        self.index.stop()
+        self.mixer.close()
+
+
+VOLUME_BACKENDS = {
+    "shell": ShellVolumeBackend,
+    "pycaw": PycawVolumeBackend,
+    "amixer-worker": AmixerWorkerBackend,
+    "sink-inputs": SinkInputVolumeBackend,
+}
+
+
+class VolumeChangeWatcher:
+    """Keeps a VolumeController's cached level fresh.
+
+    On Linux with `pactl` available it follows the PulseAudio/PipeWire event
+    stream and re-reads the mixer only after a change event (at most once
+    per `poll_interval`). Elsewhere, or if the subscription dies, it polls
+    every `poll_interval` seconds.
+    """
+    def __init__(self, controller, poll_interval=1.0):
+        self.controller = controller
+        self.poll_interval = poll_interval
+        self.process = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="VolumeChangeWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self.process is not None:
+            self.process.terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        if self.controller.system == "Linux" and shutil.which("pactl"):
+            try:
+                self._follow_events()
+            except Exception as e:
+                logger.warning(f"Mixer event subscription failed, polling instead: {e}")
+        self._poll()
+
+    def _follow_events(self):
+        self.process = subprocess.Popen(
+            ["pactl", "subscribe"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        fd = self.process.stdout.fileno()
+        partial = b""
+        last_refresh = 0.0
+        pending = False
+        while self._running:
+            # Wake on new events, or when a debounced refresh falls due
+            timeout = None
+            if pending:
+                timeout = max(0.0, last_refresh + self.poll_interval - time.monotonic())
+            readable, _, _ = select.select([fd], [], [], timeout)
+            if readable:
+                # Raw reads: a buffered readline() could hold back lines that select() no longer sees
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    if not self._running:
+                        return
+                    raise RuntimeError("pactl subscribe exited")
+                *lines, partial = (partial + chunk).split(b"\n")
+                if any(b"'change' on sink" in line or b"'change' on server" in line for line in lines):
+                    pending = True
+            if pending and time.monotonic() - last_refresh >= self.poll_interval:
+                self.controller.refresh()
+                last_refresh = time.monotonic()
+                pending = False
+
+    def _poll(self):
+        while self._running:
+            time.sleep(self.poll_interval)
+            if self._running:
+                self.controller.refresh()
+
+
+class VolumeController:
+    """Cross-platform volume control implementation.
+
+    The current level is cached: get_volume() is a memory read, kept fresh by
+    our own writes and, once start_watching() is called, by external changes.
+    With `targets` (application names or PIDs), only those applications'
+    streams are driven instead of the master volume.
+    """
+    def __init__(self, backend="auto", targets=()):
+        self.system = platform.system()
+        self.watcher = None
+        try:
+            self.backend = self._create_backend(backend, targets)
+            logger.info(f"Volume controller initialized for {self.system} "
+                        f"({self.backend.name} backend)")
+        except Exception as e:
+            logger.error(f"Failed to initialize volume controller: {e}")
+            raise
+        self._cached_volume = 0.0
+        self.refresh()
+
+    def _create_backend(self, backend, targets):
+        """Instantiate the requested backend, or the best one for this platform"""
+        if backend == "sink-inputs" or (backend == "auto" and targets):
+            if self.system != "Linux":
+                raise RuntimeError("per-application volume_targets need PulseAudio/PipeWire on Linux")
+            return SinkInputVolumeBackend(targets)
+        if backend != "auto":
+            return VOLUME_BACKENDS[backend]()
+
+        if self.system == "Windows":
+            return PycawVolumeBackend()
+        if self.system == "Linux":
+            try:
+                return AmixerWorkerBackend()
+            except Exception as e:
+                logger.warning(f"Persistent mixer backend unavailable, using shell: {e}")
+        return ShellVolumeBackend(self.system)
+
+    def start_watching(self, poll_interval=1.0):
+        """Track volume changes made outside this controller"""
+        if self.watcher is None:
+            self.watcher = VolumeChangeWatcher(self, poll_interval)
+            self.watcher.start()
+
+    def set_volume(self, volume_level):
+        """Set system volume (0.0 to 1.0)"""
+        volume_level = max(0.0, min(1.0, volume_level))
+        try:
+            self.backend.set_volume(volume_level)
+        except Exception as e:
+            # Falling back to the master volume would duck everything, not just the targets
+            if isinstance(self.backend, (ShellVolumeBackend, SinkInputVolumeBackend)) or self.system == "Windows":
+                logger.error(f"Failed to set volume: {e}")
+                raise
+            logger.warning(f"{self.backend.name} backend failed, falling back to shell: {e}")
+            self.backend.close()
+            self.backend = ShellVolumeBackend(self.system)
+            self.backend.set_volume(volume_level)
+        self._cached_volume = volume_level
+        logger.debug("Volume set to %s", volume_level)
+
+    def get_volume(self):
+        """Get current system volume (0.0 to 1.0) from the cache"""
+        return self._cached_volume
+
+    def refresh(self):
+        """Re-read the mixer level into the cache and return it"""
+        try:
+            self._cached_volume = float(self.backend.get_volume())
+        except Exception as e:
+            logger.error(f"Failed to get volume: {e}")
+        return self._cached_volume
+
+    def close(self):
+        """Shut down the watcher and mixer backend"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.backend.close()
+
+
+class VolumeActuator:
+    """Applies volume targets on a dedicated thread.
+
+    The audio callback only publishes the newest target into a single-slot
+    mailbox; the worker applies the latest value at most `max_write_rate`
+    times per second and drops any targets that were superseded meanwhile.
+    After a failed write the spacing doubles per consecutive failure, up to
+    `max_retry_interval` seconds, so a broken mixer is not hammered.
+    """
+    def __init__(self, volume_controller, max_write_rate=20.0, on_error=None, metrics=None,
+                 max_retry_interval=5.0):
+        self.volume_controller = volume_controller
+        self.metrics = metrics
+        self.min_write_interval = 1.0 / max_write_rate if max_write_rate > 0 else 0.0
+        self.max_retry_interval = max_retry_interval
+        self.on_error = on_error
+
+        # Single-slot mailbox: the producer stores the target, then bumps the
+        # sequence number. Both are plain attribute stores, so no lock is needed.
+        # The worker is woken through a pipe rather than a (locking) Event.
+        self._target_volume = 0.0
+        self._target_time = 0.0
+        self._sequence = 0
+        self._signalled = False
+        self._wake_read, self._wake_write = os.pipe()
+        self._running = False
+        self._thread = None
+
+        self.writes_issued = 0
+        self.writes_coalesced = 0
+        self.write_failures = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="VolumeActuator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        os.write(self._wake_write, b"\0")
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def publish(self, volume_level, captured_at=None):
+        """Offer a new volume target; never blocks and takes no locks.
+
+        Latency is measured from `captured_at` (perf_counter seconds, e.g. the
+        audio capture time) when given, otherwise from this call.
+        """
+        self._target_volume = volume_level
+        self._target_time = captured_at if captured_at is not None else time.perf_counter()
+        self._sequence += 1
+        if not self._signalled:
+            self._signalled = True
+            os.write(self._wake_write, b"\0")
+
+    def _write_interval(self, failures):
+        """Seconds to leave after the last write attempt, given the consecutive failures"""
+        if not failures:
+            return self.min_write_interval
+        return min(self.max_retry_interval, max(self.min_write_interval, 0.05) * 2 ** failures)
+
+    def _run(self):
+        applied_sequence = 0
+        last_write = 0.0
+        failures = 0
+        while self._running:
+            os.read(self._wake_read, 64)
+
+            # Honour the maximum write rate; targets arriving meanwhile replace each other
+            delay = last_write + self._write_interval(failures) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            # Re-arm the wakeup before reading the slot so a newer target is never missed
+            self._signalled = False
+            sequence = self._sequence
+            volume_level = self._target_volume
+            published_at = self._target_time
+            if not self._running or sequence == applied_sequence:
+                continue
+            self.writes_coalesced += sequence - applied_sequence - 1
+            applied_sequence = sequence
+
+            write_start = time.perf_counter()
+            try:
+                self.volume_controller.set_volume(volume_level)
+            except Exception as e:
+                last_write = time.perf_counter()
+                failures += 1
+                self.write_failures += 1
+                logger.error(f"Failed to set volume: {e}")
+                if self.on_error is not None:
+                    self.on_error(e)
+                continue
+            last_write = time.perf_counter()
+            failures = 0
+
+            latency = last_write - published_at
+            metrics = self.metrics
+            if metrics is not None and metrics.enabled:
+                metrics.observe("set_volume", last_write - write_start)
+                metrics.observe("actuation", latency)
+            self.writes_issued += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+
+    def stats(self):
+        """Return actuation counters and target-to-completed-write latency (seconds)"""
+        return {
+            "writes_issued": self.writes_issued,
+            "writes_coalesced": self.writes_coalesced,
+            "write_failures": self.write_failures,
+            "last_latency": self.last_latency,
+            "mean_latency": self._total_latency / self.writes_issued if self.writes_issued else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile using the P-square algorithm.
+
+    Keeps five markers whose heights are adjusted with piecewise-parabolic
+    interpolation as samples arrive (Jain & Chlamtac, 1985): constant memory
+    and O(1) work per sample, with no sample history.
+    """
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+
+        # Find the cell containing x, extending the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        """Current estimate (exact, linearly interpolated, for the first five samples)"""
+        if self.count == 0:
+            return 0.0
+        if self.count <= 5:
+            position = self.p * (len(self.heights) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(self.heights) - 1)
+            fraction = position - lower
+            return self.heights[lower] + (self.heights[upper] - self.heights[lower]) * fraction
+        return self.heights[2]
+
+
+class NoiseFloorTracker:
+    """Follows a low quantile of the intensity during monitoring with constant memory.
+
+    Each sample nudges the estimate down by step * (1 - quantile) dB when it
+    is below the estimate and up by step * quantile dB otherwise, so it
+    settles on the quantile and adapts to slow changes in room noise.
+    """
+    def __init__(self, initial, quantile=0.1, step=0.05):
+        self.value = initial
+        self.quantile = quantile
+        self.step = step
+
+    def update(self, intensity):
+        if intensity < self.value:
+            self.value -= self.step * (1 - self.quantile)
+        else:
+            self.value += self.step * self.quantile
+        return self.value
+
+
+# Quantiles tracked while calibrating: noise floor, min, IQR fences, max
+CALIBRATION_QUANTILES = (0.10, 0.20, 0.25, 0.75, 0.90)
+
+
+class CalibrationManager:
+    """Calibration from streaming quantile estimates; no sample history is kept"""
+    def __init__(self):
+        self.sample_count = 0
+        self.outlier_count = 0
+        self.quantiles = {}
+        self.min_intensity = 0
+        self.max_intensity = 100
+        self.calibration_duration = 15  # Simplified to 15 seconds
+        self.is_calibrating = False
+        self.start_time = None
+        self.noise_floor = None
+        self.required_samples = 50  # Reduced minimum required samples
+        
+    def start_calibration(self):
+        """Start a new calibration session"""
+        self.sample_count = 0
+        self.outlier_count = 0
+        self.quantiles = {p: P2Quantile(p) for p in CALIBRATION_QUANTILES}
+        self.is_calibrating = True
+        self.start_time = time.time()
+        return True
+        
+    def add_sample(self, intensity):
+        """Add a new intensity sample during calibration"""
+        if self.is_calibrating:
+            self.sample_count += 1
+            for estimator in self.quantiles.values():
+                estimator.add(intensity)
+            
+            # Count samples outside the IQR fences as they stand when the sample arrives
+            if self.sample_count > 5:
+                lower_bound, upper_bound = self.iqr_bounds()
+                if not lower_bound <= intensity <= upper_bound:
+                    self.outlier_count += 1
+
+    def iqr_bounds(self):
+        """Current outlier fences (Q1 - 1.5 IQR, Q3 + 1.5 IQR)"""
+        q1 = self.quantiles[0.25].value()
+        q3 = self.quantiles[0.75].value()
+        iqr = q3 - q1
+        return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            
+    def get_progress(self):
+        """Get calibration progress as percentage"""
+        if not self.is_calibrating or not self.start_time:
+            return 100
+        elapsed = time.time() - self.start_time
+        return min(100, (elapsed / self.calibration_duration) * 100)
+        
+    def finish_calibration(self):
+        """Compute thresholds from the streaming estimates"""
+        self.is_calibrating = False
+        if self.sample_count < self.required_samples:
+            return False, f"Insufficient samples collected. Please try again."
+            
+        if self.sample_count - self.outlier_count < self.required_samples // 2:
+            return False, "Too many outliers in calibration data. Please try again."
+            
+        # Percentiles are kept inside the IQR fences, standing in for filtering the samples
+        lower_bound, upper_bound = self.iqr_bounds()
+        
+        def within_bounds(value):
+            return min(max(value, lower_bound), upper_bound)
+            
+        # Calculate noise floor as the 10th percentile
+        self.noise_floor = within_bounds(self.quantiles[0.10].value())
+        
+        # Set min/max thresholds
+        self.min_intensity = within_bounds(self.quantiles[0.20].value())
+        self.max_intensity = within_bounds(self.quantiles[0.90].value())
+        
+        return True, "Calibration completed successfully"
+
+
+LATENCY_BUCKETS = (25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3,
+                   100e-3, 250e-3, 1.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations in seconds"""
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Add the observations of another histogram with the same bounds"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (max for the +Inf bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.bounds), "+Inf"], self.counts)),
+        }
+
+
+class Metrics:
+    """Stage latency histograms, counters and gauges for the audio and GUI loops.
+
+    Instrumented code checks `enabled` once per block or frame and skips the
+    clock reads entirely when it is off. Every metric has a single writer
+    thread, so there is no locking; readers may see a value one update old.
+    Threads that record the same metrics, such as the stream callbacks of
+    several input devices, each write to their own add_shard() instance,
+    and snapshots merge the shards in. Collectors are callables returning
+    extra gauges, sampled at snapshot time.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.collectors = []
+        self.shards = []
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def add_shard(self):
+        """Return a Metrics for one more writer thread; writers check this instance's `enabled`"""
+        shard = Metrics()
+        self.shards.append(shard)
+        return shard
+
+    def snapshot(self):
+        gauges = dict(self.gauges)
+        for collector in self.collectors:
+            gauges.update(collector())
+        histograms = {}
+        counters = dict(self.counters)
+        for source in [self, *self.shards]:
+            for name, histogram in list(source.histograms.items()):
+                merged = histograms.get(name)
+                if merged is None:
+                    merged = histograms[name] = LatencyHistogram(histogram.bounds)
+                merged.merge(histogram)
+            if source is not self:
+                for name, value in list(source.counters.items()):
+                    counters[name] = counters.get(name, 0) + value
+        return {
+            "time": time.time(),
+            "histograms": {name: h.snapshot() for name, h in histograms.items()},
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def to_prometheus(self, snapshot=None, prefix="volume_control"):
+        """Render a snapshot in the Prometheus text exposition format"""
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        for name, histogram in sorted(snapshot["histograms"].items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram['sum']}")
+            lines.append(f"{metric}_count {histogram['count']}")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write a snapshot to `path`: JSON for *.json, Prometheus text otherwise"""
+        snapshot = self.snapshot()
+        if path.endswith(".json"):
+            text = json.dumps(snapshot, indent=2)
+        else:
+            text = self.to_prometheus(snapshot)
+        # Write then rename, so scrapers never read a half-written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+    def summary(self):
+        """Multi-line human-readable table for logs and the stats panel"""
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<14}{'count':>8}{'mean ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+        for name, h in sorted(snapshot["histograms"].items()):
+            mean = h["sum"] / h["count"] if h["count"] else 0.0
+            lines.append(f"{name:<14}{h['count']:>8}{mean * 1e3:>9.2f}{h['p99'] * 1e3:>9.2f}{h['max'] * 1e3:>9.2f}")
+        values = {**snapshot["counters"], **snapshot["gauges"]}
+        lines.extend(f"{name:<26}{value:>10.4g}" if isinstance(value, float) else f"{name:<26}{value:>10}"
+                     for name, value in sorted(values.items()))
+        return "\n".join(lines)
+
+
+class MetricsExporter:
+    """Periodically writes Metrics snapshots to a file on a background thread"""
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="MetricsExporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._export()
+
+    def _export(self):
+        try:
+            self.metrics.export(self.path)
+        except Exception as e:
+            logger.error(f"Failed to export metrics to {self.path}: {e}")
+
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self._export()
+
+
+# Block length (frames) the stored calibration values were measured with: 100 ms at 44.1 kHz
+REFERENCE_BLOCK_FRAMES = 4410
+
+CAPTURE_PRESETS = {
+    "default": {"samplerate": 44100, "blocksize": 4410, "hop_size": 0, "decimation": 1},
+    # 10 ms blocks analysed in 5 ms windows advancing by 2.5 ms (120-frame hops)
+    "low_latency": {"samplerate": 48000, "blocksize": 480, "hop_size": 120, "decimation": 1},
+    # 200 ms blocks at a low rate, analysed on every other sample
+    "low_cpu": {"samplerate": 16000, "blocksize": 3200, "hop_size": 0, "decimation": 2},
+}
+
+
+def capture_settings(settings):
+    """Resolve the capture preset plus any explicit overrides from settings["capture"]"""
+    return {**CAPTURE_PRESETS[settings["capture_preset"]], **settings["capture"]}
+
+
+class IntensityAnalyzer:
+    """Computes block intensity in dB on the scale used by stored calibrations.
+
+    The original scale was 20*log10(10 * ||block||) over 4410-frame blocks.
+    Written through the mean square, 10*log10(100 * 4410 * mean(x^2)), it no
+    longer depends on block size, hop size or decimation, so calibration
+    values stay valid under every capture preset.
+
+    With a hop size the block is split into windows of two hops, advancing
+    one hop at a time, and all of them are reduced in one vectorised pass
+    over a strided view; the block intensity is their energy mean, so a
+    single loud window does not bias it upwards.
+    """
+    def __init__(self, hop_size=0, decimation=1):
+        self.hop_size = int(hop_size)
+        self.window = 2 * self.hop_size
+        self.decimation = max(1, int(decimation))
+        self.scale = 100.0 * REFERENCE_BLOCK_FRAMES
+        self.peak_db = -120.0
+
+    def analyze(self, indata):
+        """Return the block intensity in dB and update `peak_db` (dBFS)"""
+        samples = indata[::self.decimation, 0] if indata.ndim == 2 else indata[::self.decimation]
+        if self.hop_size and len(samples) >= self.window:
+            hops = np.lib.stride_tricks.sliding_window_view(samples, self.window)[::self.hop_size]
+            mean_square = float(np.einsum('ij,ij->i', hops, hops).mean()) / self.window
+        else:
+            mean_square = float(np.dot(samples, samples)) / len(samples)
+
+        peak = max(float(samples.max()), -float(samples.min()))
+        self.peak_db = 20 * math.log10(peak) if peak > 0 else -120.0
+        return 10 * math.log10(self.scale * mean_square) if mean_square > 0 else 0
+
+    def analyze_channels(self, indata):
+        """Return per-channel intensities (dB) of a (frames, channels) block.
+
+        Every channel is reduced in the same vectorised pass; `peak_db` is the
+        loudest channel's peak and `channel_peak_db` holds all of them.
+        """
+        # One channel-major copy makes every reduction below run over contiguous rows;
+        # reducing the interleaved layout along axis 0 is several times slower
+        samples = np.ascontiguousarray(indata[::self.decimation].T)
+        if self.hop_size and samples.shape[1] >= self.window:
+            hops = np.lib.stride_tricks.sliding_window_view(samples, self.window, axis=1)[:, ::self.hop_size]
+            mean_square = np.einsum('chw,chw->ch', hops, hops).mean(axis=1) / self.window
+        else:
+            mean_square = np.einsum('cf,cf->c', samples, samples) / samples.shape[1]
+
+        peak = np.maximum(samples.max(axis=1), -samples.min(axis=1))
+        self.channel_peak_db = 20 * np.log10(np.maximum(peak, 1e-6))
+        self.peak_db = float(self.channel_peak_db.max())
+
+        # Same convention as analyze(): silence is 0 dB
+        scaled = self.scale * mean_square
+        levels = np.zeros(len(scaled))
+        np.log10(scaled, out=levels, where=scaled > 0)
+        levels *= 10
+        return levels
+
+
+class RawIntensityAnalyzer(IntensityAnalyzer):
+    """IntensityAnalyzer for int16 blocks read zero-copy from a RawInputStream buffer.
+
+    Samples are copied into a preallocated channel-major float64 scratch
+    array and every reduction writes into preallocated outputs of the same
+    dtype, so analysing a block allocates no arrays and numpy needs no
+    casting buffers. Hop window energies are differences of a running sum
+    of squares, read through strided views set up once per block shape.
+    PortAudio converts int16 to float by dividing by 32768, so folding
+    1/32768^2 into the scale gives the same dB values as the float path and
+    stored calibrations stay valid.
+    """
+    full_scale = 32768.0
+
+    def __init__(self, hop_size=0, decimation=1):
+        super().__init__(hop_size, decimation)
+        self.scale /= self.full_scale ** 2
+        self._shape = None
+
+    def _allocate(self, frames, channels):
+        self._shape = (frames, channels)
+        length = len(range(0, frames, self.decimation))
+        self._samples = np.empty((channels, length))
+        self._squares = np.empty((channels, length))
+        self._magnitudes = np.empty((channels, length))
+        self._hops = None
+        self._factor = self.scale / length
+        if self.hop_size and length >= self.window:
+            count = len(range(0, length - self.window + 1, self.hop_size))
+            self._hops = np.empty((channels, count))
+            # Running sum of squares after a leading zero: the window starting
+            # at frame i has energy sums[i + window] - sums[i]
+            self._sums = np.zeros((channels, length + 1))
+            self._running = self._sums[:, 1:]
+            self._window_ends = self._sums[:, self.window::self.hop_size][:, :count]
+            self._window_starts = self._sums[:, :-self.window:self.hop_size][:, :count]
+            # The hop energies are summed, so their mean square divides by every window's length
+            self._factor = self.scale / (self.window * count)
+        self._energy = np.empty(channels)
+        self._dot = self._energy[:1].reshape(())
+        self._peak = np.empty(channels)
+        self._levels = np.empty(channels)
+        self.channel_peak_db = np.empty(channels)
+
+    def analyze(self, indata):
+        """Return the intensity (dB) of the first channel of an int16 block"""
+        block = indata[:, :1] if indata.ndim == 2 else indata[:, None]
+        if block.shape != self._shape:
+            self._allocate(*block.shape)
+        samples = self._samples[0]
+        np.copyto(samples, block[::self.decimation, 0])
+        if self._hops is not None:
+            np.multiply(samples, samples, out=self._squares[0])
+            np.add.accumulate(self._squares[0], out=self._running[0])
+            np.subtract(self._window_ends[0], self._window_starts[0], out=self._hops[0])
+            energy = float(np.add.reduce(self._hops[0]))
+        else:
+            energy = float(np.dot(samples, samples, out=self._dot))
+
+        peak = max(float(np.maximum.reduce(samples)), -float(np.minimum.reduce(samples))) / self.full_scale
+        self.peak_db = 20 * math.log10(peak) if peak > 0 else -120.0
+        return 10 * math.log10(self._factor * energy) if energy > 0 else 0
+
+    def analyze_channels(self, indata):
+        """Return per-channel intensities (dB); the array is reused by the next call"""
+        if indata.shape != self._shape:
+            self._allocate(*indata.shape)
+        samples = self._samples
+        np.copyto(samples, indata[::self.decimation].T)
+
+        energy = self._energy
+        np.multiply(samples, samples, out=self._squares)
+        if self._hops is not None:
+            np.add.accumulate(self._squares, axis=1, out=self._running)
+            np.subtract(self._window_ends, self._window_starts, out=self._hops)
+            np.add.reduce(self._hops, axis=1, out=energy)
+        else:
+            np.add.reduce(self._squares, axis=1, out=energy)
+        # Same convention as the float path: silence is 0 dB
+        levels = self._levels
+        np.multiply(energy, self._factor, out=levels)
+        np.log10(levels, out=levels, where=levels > 0)
+        levels *= 10
+
+        np.absolute(samples, out=self._magnitudes)
+        peak = np.maximum.reduce(self._magnitudes, axis=1, out=self._peak)
+        np.maximum(peak, 1e-6 * self.full_scale, out=peak)
+        np.log10(peak, out=self.channel_peak_db)
+        self.channel_peak_db *= 20
+        self.channel_peak_db -= 20 * math.log10(self.full_scale)
+        self.peak_db = float(self.channel_peak_db.max())
+        return levels
+
+
+FUSION_POLICIES = ["max", "weighted", "priority"]
+
+
+class ChannelFusion:
+    """Maps per-channel intensities through per-channel calibrations and fuses them.
+
+    Each channel is normalised against its own calibrated range, so mics with
+    different gains are comparable. `max` follows the loudest channel,
+    `weighted` takes the weighted mean of the normalised levels, and
+    `priority` uses the first channel in `priority` order that is above its
+    calibrated minimum.
+    """
+    def __init__(self, channel_count, policy="max", weights=None, priority=None):
+        if policy not in FUSION_POLICIES:
+            raise ValueError(f"Unknown fusion policy: {policy}")
+        self.channel_count = channel_count
+        self.policy = policy
+        weights = list(weights or [])[:channel_count]
+        weights += [1.0] * (channel_count - len(weights))
+        self.weights = np.asarray(weights, dtype=float) / sum(weights)
+        self.priority = [i for i in (priority or []) if 0 <= i < channel_count]
+        self.priority += [i for i in range(channel_count) if i not in self.priority]
+        # (mins, maxs) replaced as one tuple so the audio thread never sees a mixed pair
+        self.ranges = (np.zeros(channel_count), np.full(channel_count, 100.0))
+        self.selected = 0
+
+    def set_calibrations(self, calibrations):
+        """Install a {min, max} profile per channel"""
+        self.ranges = (np.array([float(c["min"]) for c in calibrations]),
+                       np.array([float(c["max"]) for c in calibrations]))
+
+    def fuse(self, levels, offset=0.0):
+        """Return (normalised level, intensity in dB of the chosen or weighted channels)"""
+        mins, maxs = self.ranges
+        span = maxs - mins
+        normalized = np.divide(levels - mins - offset, span, out=np.zeros(len(levels)), where=span > 0)
+        np.maximum(normalized, 0, out=normalized)
+
+        if self.policy == "weighted":
+            return float(normalized @ self.weights), float(levels @ self.weights)
+        if self.policy == "max":
+            self.selected = int(normalized.argmax())
+        else:
+            self.selected = next((i for i in self.priority if normalized[i] > 0), self.priority[0])
+        return float(normalized[self.selected]), float(levels[self.selected])
+
+
+MAPPING_CURVES = ["linear", "cubic", "log", "spline"]
+
+
+def monotone_spline(points):
+    """Monotone cubic (Fritsch-Carlson) interpolant through [[x, y], ...]; flat outside the points"""
+    points = sorted((float(x), float(y)) for x, y in points)
+    if len(points) < 2:
+        raise ValueError("A spline curve needs at least two points")
+    xs = np.array([p[0] for p in points])
+    ys = np.array([p[1] for p in points])
+    h = np.diff(xs)
+    if (h <= 0).any():
+        raise ValueError("Spline points need distinct x values")
+    slopes = np.diff(ys) / h
+
+    # Tangents: harmonic mean of neighbouring slopes, zero at local extrema, so no overshoot
+    tangents = np.zeros(len(xs))
+    tangents[0], tangents[-1] = slopes[0], slopes[-1]
+    for i in range(1, len(xs) - 1):
+        if slopes[i - 1] * slopes[i] > 0:
+            w1, w2 = 2 * h[i] + h[i - 1], h[i] + 2 * h[i - 1]
+            tangents[i] = (w1 + w2) / (w1 / slopes[i - 1] + w2 / slopes[i])
+
+    def evaluate(x):
+        x = np.clip(x, xs[0], xs[-1])
+        i = np.clip(np.searchsorted(xs, x) - 1, 0, len(h) - 1)
+        t = (x - xs[i]) / h[i]
+        return ((2 * t ** 3 - 3 * t ** 2 + 1) * ys[i] + (t ** 3 - 2 * t ** 2 + t) * h[i] * tangents[i]
+                + (-2 * t ** 3 + 3 * t ** 2) * ys[i + 1] + (t ** 3 - t ** 2) * h[i] * tangents[i + 1])
+    return evaluate
+
+
+class VolumeMapping:
+    """Intensity-to-volume curve compiled into a lookup table.
+
+    The curve (linear, cubic, log or a spline through `points`) is evaluated
+    once over the normalised range together with sensitivity and clamping, so
+    mapping a block is one index computation and one list read. Setters
+    build a new VolumeMapping rather than changing this one, so the audio
+    thread always reads a consistent table.
+    """
+    def __init__(self, calibration_min, calibration_max, sensitivity=1.0, curve="linear",
+                 points=None, lut_size=1024):
+        if curve not in MAPPING_CURVES:
+            raise ValueError(f"Unknown mapping curve: {curve}")
+        self.calibration_min = calibration_min
+        self.curve = curve
+        # Cover the normalised range up to where a linear curve saturates at low sensitivity
+        self.x_max = max(1.0, 1.0 / sensitivity)
+        x = np.linspace(0.0, self.x_max, max(2, int(lut_size)))
+        if curve == "linear":
+            y = x
+        elif curve == "cubic":
+            y = x ** 3
+        elif curve == "log":
+            y = np.log10(1 + 9 * x)
+        else:
+            y = monotone_spline(points or [])(x)
+        self.table = np.clip(y * sensitivity, 0.0, 1.0).tolist()
+        self.last_index = len(self.table) - 1
+
+        span = calibration_max - calibration_min
+        # An empty calibration maps everything to the bottom of the table (silence)
+        self.index_per_db = self.last_index / (self.x_max * span) if span > 0 else 0.0
+        self.index_per_unit = self.last_index / self.x_max
+
+    def lookup(self, intensity, offset=0.0):
+        """Volume (0.0 to 1.0) for an intensity in dB, with the range shifted by `offset` dB"""
+        index = int((intensity - offset - self.calibration_min) * self.index_per_db + 0.5)
+        if index <= 0:
+            return self.table[0]
+        return self.table[index] if index < self.last_index else self.table[self.last_index]
+
+    def lookup_normalized(self, level):
+        """Volume for a level already normalised to the calibrated range (0.0 = min, 1.0 = max)"""
+        index = int(level * self.index_per_unit + 0.5)
+        if index <= 0:
+            return self.table[0]
+        return self.table[index] if index < self.last_index else self.table[self.last_index]
+
+
+class WriteDeadband:
+    """Drops volume targets too close to the last one passed on to the mixer.
+
+    A target passes when it differs from the last passed value by at least
+    `deadband`, or by `deadband + hysteresis` when it reverses the direction
+    of the previous change, so jitter around one level does not keep nudging
+    the mixer. Reaching exactly 0 or 1 always passes.
+    """
+    def __init__(self, deadband=0.01, hysteresis=0.005):
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        self.last = None
+        self.direction = 0
+        self.passed = 0
+        self.suppressed = 0
+
+    def accept(self, volume):
+        last = self.last
+        if last is not None:
+            delta = volume - last
+            threshold = self.deadband
+            if delta * self.direction < 0:
+                threshold += self.hysteresis
+            if abs(delta) < threshold and (volume == last or 0.0 < volume < 1.0):
+                self.suppressed += 1
+                return False
+            self.direction = 1 if delta > 0 else -1
+        self.last = volume
+        self.passed += 1
+        return True
+
+
+class TelemetryRing:
+    """Single-producer ring of (time, intensity, volume, ...) records for the audio thread.
+
+    The audio callback writes a record into a preallocated NumPy record
+    array and then publishes it by advancing `write_index`; a plain attribute
+    store, so the producer takes no locks and allocates no containers.
+    Each consumer reads through its own TelemetryReader cursor. `target` is
+    the mapped volume before smoothing and `latency` the most recent
+    capture-to-write actuation latency; both are NaN when not monitoring.
+    """
+    dtype = [('time', 'f8'), ('intensity', 'f8'), ('volume', 'f8'), ('target', 'f8'), ('latency', 'f8')]
+
+    def __init__(self, capacity=4096, channels=1):
+        self.capacity, dtype = self.layout(capacity, channels)
+        self.mask = self.capacity - 1
+        self._bind(np.zeros(self.capacity, dtype=dtype), channels)
+        self.write_index = 0
+
+    @classmethod
+    def layout(cls, capacity, channels):
+        """Return the (power of two) capacity and record dtype for a ring"""
+        # Round up to a power of two so the slot is a cheap mask
+        capacity = 1 << max(1, int(capacity) - 1).bit_length()
+        # With several input channels every record also carries the per-channel levels
+        dtype = cls.dtype + [('levels', 'f8', (channels,))] if channels > 1 else cls.dtype
+        return capacity, np.dtype(dtype)
+
+    def _bind(self, records, channels):
+        self.channels = channels
+        self.records = records
+        self._time = self.records['time']
+        self._intensity = self.records['intensity']
+        self._volume = self.records['volume']
+        self._target = self.records['target']
+        self._latency = self.records['latency']
+        self._levels = self.records['levels'] if channels > 1 else None
+
+    def push(self, timestamp, intensity, volume, levels=None, target=math.nan, latency=math.nan):
+        """Append one record (producer side only)"""
+        index = self.write_index
+        slot = index & self.mask
+        self._time[slot] = timestamp
+        self._intensity[slot] = intensity
+        self._volume[slot] = volume
+        self._target[slot] = target
+        self._latency[slot] = latency
+        if levels is not None:
+            self._levels[slot] = levels
+        self.write_index = index + 1
+
+    def reader(self):
+        """Create an independent cursor starting at the newest record"""
+        return TelemetryReader(self)
+
+
+class SharedTelemetryRing(TelemetryRing):
+    """TelemetryRing in a shared memory block, so another process can read it.
+
+    The block holds the published write index (int64) followed by the
+    records. The producer creates it; a reader process attaches by `name`
+    and reads through an ordinary TelemetryReader.
+    """
+    def __init__(self, capacity=4096, channels=1, name=None):
+        self.capacity, dtype = self.layout(capacity, channels)
+        self.mask = self.capacity - 1
+        self.owner = name is None
+        size = 8 + dtype.itemsize * self.capacity
+        # Readers are started through multiprocessing, so they share the creator's resource
+        # tracker and the block is removed once, by the creator
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.name = self.shm.name
+        self._published = np.ndarray(1, dtype=np.int64, buffer=self.shm.buf)
+        self._bind(np.ndarray(self.capacity, dtype=dtype, buffer=self.shm.buf, offset=8), channels)
+        if self.owner:
+            self.write_index = 0
+
+    @property
+    def write_index(self):
+        return int(self._published[0])
+
+    @write_index.setter
+    def write_index(self, value):
+        self._published[0] = value
+
+    def close(self):
+        """Drop the mapping; the creator also removes the block"""
+        if self.shm is None:
+            return
+        # Field views pin the buffer, so release them first
+        self.records = self._time = self._intensity = self._volume = None
+        self._target = self._latency = self._levels = self._published = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+
+class TelemetryReader:
+    """Consumer cursor over a TelemetryRing"""
+    def __init__(self, ring):
+        self.ring = ring
+        self.read_index = ring.write_index
+        self.dropped = 0
+
+    def pending(self):
+        return self.ring.write_index - self.read_index
+
+    def read(self):
+        """Return a copy of all records published since the last read, oldest first"""
+        ring = self.ring
+        end = ring.write_index
+        start = max(self.read_index, end - ring.capacity)
+        self.dropped += start - self.read_index
+        if start == end:
+            return ring.records[:0]
+
+        slots = np.arange(start, end) & ring.mask
+        records = ring.records[slots]
+
+        # The producer may have lapped us while we copied; discard overwritten records,
+        # including the slot of write_index itself, which a push may be filling right now
+        overwritten = ring.write_index - ring.capacity - start + 1
+        if overwritten > 0:
+            records = records[overwritten:]
+            self.dropped += overwritten
+        self.read_index = end
+        return records
+
+
+# Session files: a 64-byte header followed by one contiguous little-endian array per
+# column, each `capacity` records long, of which the first `count` are valid
+SESSION_MAGIC = b"VCSESS01"
+SESSION_HEADER = struct.Struct("<8sQQd")  # magic, capacity, count, start time (epoch seconds)
+SESSION_HEADER_SIZE = 64
+SESSION_COLUMNS = (("time", "<f8"), ("intensity", "<f4"), ("target", "<f4"),
+                   ("volume", "<f4"), ("latency", "<f4"))
+
+
+def session_layout(capacity):
+    """Return ({column: byte offset}, file size) for a session file of `capacity` records"""
+    offsets = {}
+    offset = SESSION_HEADER_SIZE
+    for name, dtype in SESSION_COLUMNS:
+        offsets[name] = offset
+        offset += np.dtype(dtype).itemsize * capacity
+    return offsets, offset
+
+
+class SessionRecorder:
+    """Appends telemetry to a columnar session file through a memory map.
+
+    A background thread drains its own TelemetryReader every `interval`
+    seconds and copies each column straight into the mapped file, so the
+    audio thread does no I/O. When the file is full its capacity doubles and
+    the columns are moved apart in place; close() compacts them to the exact
+    record count. The header count is updated after every batch, so a crash
+    loses at most the last `interval` of records.
+    """
+    def __init__(self, path, reader, interval=0.5, initial_capacity=65536):
+        self.path = path
+        self.reader = reader
+        self.interval = interval
+        self.started = time.time()
+        # Telemetry is stamped with perf_counter; the file stores wall-clock time
+        self._clock_offset = self.started - time.perf_counter()
+        self.capacity = 0
+        self.count = 0
+        self._file = open(path, "w+b")
+        self._map = None
+        self._columns = {}
+        self._lock = threading.Lock()  # the replay loop may drain alongside the thread
+        self._stop = threading.Event()
+        self._thread = None
+        self._resize(initial_capacity)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+        logger.info(f"Recording session to {self.path}")
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Session recording stopped: {e}")
+                return
+
+    def drain(self):
+        """Append every telemetry record published since the last drain"""
+        with self._lock:
+            records = self.reader.read()
+            n = len(records)
+            if not n:
+                return
+            if self.count + n > self.capacity:
+                self._resize(max(2 * self.capacity, self.count + n))
+            start, end = self.count, self.count + n
+            columns = self._columns
+            columns["time"][start:end] = records["time"] + self._clock_offset
+            for name in ("intensity", "target", "volume", "latency"):
+                columns[name][start:end] = records[name]
+            self.count = end
+            self._write_header()
+
+    def _write_header(self):
+        SESSION_HEADER.pack_into(self._map, 0, SESSION_MAGIC, self.capacity, self.count, self.started)
+
+    def _resize(self, capacity):
+        """Lay the file out for `capacity` records, moving the recorded ones into place"""
+        old_offsets, _ = session_layout(self.capacity)
+        new_offsets, size = session_layout(capacity)
+        growing = capacity > self.capacity
+        # Views pin the mapping, so drop them before it is closed
+        self._columns = {}
+        if growing:
+            if self._map is not None:
+                self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+
+        # Growing moves columns towards the end of the file and shrinking towards the
+        # start; go in the direction that never overwrites a column not yet moved
+        for name, dtype in (reversed(SESSION_COLUMNS) if growing else SESSION_COLUMNS):
+            length = np.dtype(dtype).itemsize * self.count
+            if length and new_offsets[name] != old_offsets[name]:
+                self._map.move(new_offsets[name], old_offsets[name], length)
+
+        if not growing:
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        self.capacity = capacity
+        self._columns = {
+            name: np.frombuffer(self._map, dtype=dtype, count=capacity, offset=new_offsets[name])
+            for name, dtype in SESSION_COLUMNS
+        }
+        self._write_header()
+
+    def stats(self):
+        return {"session_records": self.count, "session_dropped_records": self.reader.dropped}
+
+    def close(self):
+        """Stop the drain thread, append what is left and compact the file"""
+        if self._map is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.drain()
+        self._resize(self.count)
+        self._columns = {}
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.close()
+        if self.reader.dropped:
+            logger.warning(f"Session recording lost {self.reader.dropped} records "
+                           f"(telemetry ring overran between drains)")
+        logger.info(f"Recorded {self.count} records to {self.path}")
+
+
+class SessionRecording:
+    """A session file mapped read-only; columns are NumPy views into the file"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(SESSION_HEADER.size)
+        if len(header) < SESSION_HEADER.size or header[:8] != SESSION_MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        _, self.capacity, self.count, self.started = SESSION_HEADER.unpack(header)
+        offsets, size = session_layout(self.capacity)
+        if os.path.getsize(path) < size:
+            raise ValueError(f"{path} is truncated")
+        raw = np.memmap(path, dtype=np.uint8, mode="r", shape=(size,))
+        self.columns = {}
+        for name, dtype in SESSION_COLUMNS:
+            start = offsets[name]
+            self.columns[name] = raw[start:start + np.dtype(dtype).itemsize * self.count].view(dtype)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def duration(self):
+        times = self.columns["time"]
+        return float(times[-1] - times[0]) if self.count else 0.0
+
+
+def load_session(path):
+    """Open a recorded session without reading or parsing it"""
+    return SessionRecording(path)
+
+
+class SessionPlayer:
+    """Feeds a SessionRecording into its own TelemetryRing at the recorded pace.
+
+    The GUI reads the ring exactly like live telemetry, so a recording can be
+    shown in the plot; `speed` scales the playback rate.
+    """
+    def __init__(self, recording, speed=1.0, capacity=4096):
+        self.recording = recording
+        self.speed = speed
+        self.ring = TelemetryRing(capacity)
+        self.position = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="SessionPlayer", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        recording = self.recording
+        times = recording["time"]
+        if not len(times):
+            return
+        columns = [times, recording["intensity"], recording["volume"],
+                   recording["target"], recording["latency"]]
+        origin = float(times[0])
+        started = time.perf_counter()
+        push = self.ring.push
+        while self.position < len(times) and not self._stop.wait(0.02):
+            elapsed = (time.perf_counter() - started) * self.speed
+            end = int(np.searchsorted(times, origin + elapsed, side="right"))
+            for timestamp, intensity, volume, target, latency in zip(
+                    *(column[self.position:end].tolist() for column in columns)):
+                push(timestamp, intensity, volume, None, target, latency)
+            self.position = end
+        if self.position == len(times):
+            logger.info(f"Playback of {recording.path} finished ({len(times)} records)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+# Telemetry server messages: a header (message type, payload length) and a payload.
+# Telemetry payloads are packed TELEMETRY_WIRE_FIELDS records, replies are UTF-8 JSON.
+TELEMETRY_FRAME = struct.Struct("<BI")
+FRAME_TELEMETRY = 1
+FRAME_REPLY = 2
+TELEMETRY_WIRE_FIELDS = (("time", "<f8"), ("intensity", "<f4"), ("volume", "<f4"))
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def parse_server_address(address):
+    """Split "unix:PATH", "HOST:PORT" or "PORT" into ("unix", path) or ("tcp", (host, port))"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    host = host.strip("[]") or "127.0.0.1"
+    # Commands are not authenticated, so only local clients may connect
+    if host not in LOOPBACK_HOSTS:
+        raise ValueError(f"Telemetry server must listen on a loopback address, not {host}")
+    return "tcp", (host, int(port))
+
+
+def remove_stale_socket(path):
+    """Unlink a UNIX socket left behind by a crashed run.
+
+    Raises FileExistsError if `path` is not a socket, and OSError if a
+    server still accepts connections on it; a missing path is fine.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"{path} is in use by another server")
+
+
+class _TelemetryClient:
+    """One subscriber: frames go straight to the socket while it keeps up and into a
+    bounded backlog, which drops the oldest frame when full, while it does not"""
+    # Bytes the transport may hold before further frames wait in the backlog
+    high_water = 16384
+
+    def __init__(self, writer, capacity):
+        self.writer = writer
+        self.transport = writer.transport
+        self.backlog = collections.deque(maxlen=capacity)
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, frame):
+        backlog = self.backlog
+        if backlog or self.transport.get_write_buffer_size() > self.high_water:
+            if len(backlog) == backlog.maxlen:
+                self.dropped += 1
+            backlog.append(frame)
+            self.flush()
+            return
+        self.transport.write(frame)
+        self.sent += 1
+
+    def flush(self):
+        """Move backlog frames to the socket while it has room"""
+        backlog = self.backlog
+        transport = self.transport
+        while backlog and transport.get_write_buffer_size() <= self.high_water:
+            transport.write(backlog.popleft())
+            self.sent += 1
+
+
+class TelemetryServer:
+    """Broadcasts telemetry to local subscribers and accepts control commands.
+
+    An asyncio loop on its own thread listens on a UNIX socket or a loopback
+    TCP port. Every `interval` seconds the records published since the last
+    tick are packed into one binary frame that all clients share and written
+    to every socket directly from the tick, without a task per client. A
+    client whose socket is full gets a `client_buffer`-frame backlog, so a
+    slow reader only loses its own oldest frames and never holds up the
+    audio thread or other clients.
+    Clients send newline-delimited JSON such as {"command": "sensitivity",
+    "value": 1.2}; `controls(command, value)` runs them one at a time on a
+    worker thread and its status dict is sent back in a reply frame.
+    """
+    def __init__(self, telemetry, address, controls, interval=0.05, client_buffer=64):
+        self.kind, self.address = parse_server_address(address)
+        self.reader = telemetry.reader()
+        self.controls = controls
+        self.interval = interval
+        self.client_buffer = client_buffer
+        self.wire_dtype = np.dtype(list(TELEMETRY_WIRE_FIELDS))
+        self.clients = set()
+        self.frames_broadcast = 0
+        self.closed_client_drops = 0
+        self._commands = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="TelemetryControl")
+        self._loop = None
+        self._stopping = None
+        self._thread = None
+
+    def start(self):
+        """Bind and start serving; raises if the address cannot be bound"""
+        self._loop = asyncio.new_event_loop()
+        ready = concurrent.futures.Future()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="TelemetryServer",
+                                        daemon=True)
+        self._thread.start()
+        ready.result(timeout=5)
+        logger.info(f"Telemetry server listening on {self.kind}:{self.address}")
+        return self
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve(ready))
+        finally:
+            self._loop.close()
+
+    async def _serve(self, ready):
+        self._stopping = asyncio.Event()
+        try:
+            if self.kind == "unix":
+                remove_stale_socket(self.address)
+                server = await asyncio.start_unix_server(self._handle_client, self.address)
+            else:
+                server = await asyncio.start_server(self._handle_client, *self.address)
+                # Port 0 picks a free port; report the real one
+                self.address = server.sockets[0].getsockname()[:2]
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(None)
+
+        broadcaster = asyncio.ensure_future(self._broadcast())
+        await self._stopping.wait()
+        broadcaster.cancel()
+        server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        await server.wait_closed()
+        if self.kind == "unix":
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.address)
+
+    async def _broadcast(self):
+        wire_dtype = self.wire_dtype
+        while True:
+            await asyncio.sleep(self.interval)
+            # Read even without clients so new subscribers start with fresh records
+            records = self.reader.read()
+            if not len(records):
+                # Nothing new, but slow clients may have made room for their backlog
+                for client in self.clients:
+                    if client.backlog:
+                        client.flush()
+                continue
+            if not self.clients:
+                continue
+            packed = np.empty(len(records), dtype=wire_dtype)
+            for name, _ in TELEMETRY_WIRE_FIELDS:
+                packed[name] = records[name]
+            frame = TELEMETRY_FRAME.pack(FRAME_TELEMETRY, packed.nbytes) + packed.tobytes()
+            for client in self.clients:
+                client.push(frame)
+            self.frames_broadcast += 1
+
+    async def _handle_client(self, reader, writer):
+        client = _TelemetryClient(writer, self.client_buffer)
+        self.clients.add(client)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = json.dumps(await self._run_command(line)).encode()
+                writer.write(TELEMETRY_FRAME.pack(FRAME_REPLY, len(reply)) + reply)
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the stream limit
+            pass
+        finally:
+            self.clients.discard(client)
+            self.closed_client_drops += client.dropped
+            writer.close()
+
+    async def _run_command(self, line):
+        try:
+            message = json.loads(line)
+            command = message["command"]
+            status = await asyncio.get_running_loop().run_in_executor(
+                self._commands, self.controls, command, message.get("value"))
+            return {"ok": True, "command": command, "status": status}
+        except Exception as e:
+            logger.warning(f"Telemetry server command {line[:80]!r} failed: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def stats(self):
+        return {
+            "telemetry_clients": len(self.clients),
+            "telemetry_frames_broadcast": self.frames_broadcast,
+            "telemetry_client_dropped_frames":
+                self.closed_client_drops + sum(client.dropped for client in list(self.clients)),
+        }
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout=2)
+        self._thread = None
+        self._commands.shutdown(wait=False)
+
+
+class StreamSupervisor:
+    """Owns the input streams: opens them, restarts them after faults, closes them.
+
+    Streams are only ever created, stopped and closed on the supervisor
+    thread, so there is at most one set open and PortAudio is never called
+    from inside its own callback. Callbacks report problems through fault(),
+    which only records the reason and enqueues a wakeup. The thread then
+    reopens the streams with exponential backoff (`initial_backoff` doubling
+    up to `max_backoff`) and calls on_failure(message) after `max_attempts`
+    consecutive failed attempts.
+    """
+    def __init__(self, open_streams, on_failure=None, initial_backoff=0.5, max_backoff=30.0,
+                 max_attempts=8):
+        self.open_streams = open_streams  # returns a list of started streams or raises
+        self.on_failure = on_failure
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.streams = []
+        self._commands = queue.SimpleQueue()
+        self._fault_reason = None
+        self._fault_time = None
+        self._wanted = False
+        self._retry_at = None
+        self._thread = None
+
+        self.failures = 0
+        self.restart_attempts = 0
+        self.recoveries = 0
+        self.consecutive_failures = 0
+        self.last_recovery_time = 0.0
+        self.max_recovery_time = 0.0
+
+    @property
+    def active(self):
+        streams = self.streams
+        return bool(streams) and all(stream.active for stream in streams)
+
+    def ensure_running(self, timeout=10.0):
+        """Open the streams unless they already run; raises if they cannot be opened"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="StreamSupervisor", daemon=True)
+            self._thread.start()
+        result = concurrent.futures.Future()
+        self._commands.put(("start", result))
+        result.result(timeout)
+
+    def fault(self, reason):
+        """Report a broken stream; safe to call from the audio callback"""
+        if self._fault_reason is None:
+            self._fault_time = time.perf_counter()
+            self._fault_reason = reason
+            self._commands.put(("fault", None))
+
+    def close(self):
+        """Close the streams and stop the thread"""
+        if self._thread is None:
+            return
+        if not self._thread.is_alive():
+            # Nobody left to answer, e.g. daemon threads already gone at interpreter exit
+            self._thread = None
+            return
+        result = concurrent.futures.Future()
+        self._commands.put(("close", result))
+        result.result(5)
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            timeout = None if self._retry_at is None else max(0.0, self._retry_at - time.perf_counter())
+            try:
+                command, result = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                self._retry()
+                continue
+
+            if command == "start":
+                try:
+                    if not self.active:
+                        self._reopen()
+                        self._retry_at = None
+                        self.consecutive_failures = 0
+                    self._wanted = True
+                    result.set_result(True)
+                except Exception as e:
+                    result.set_exception(e)
+            elif command == "fault":
+                self._handle_fault()
+            elif command == "close":
+                self._wanted = False
+                self._retry_at = None
+                self._close_streams()
+                result.set_result(True)
+                return
+
+    def _handle_fault(self):
+        reason = self._fault_reason
+        if reason is None or not self._wanted:
+            # Raised by streams we already replaced or closed on purpose
+            self._fault_reason = None
+            return
+        self.failures += 1
+        logger.warning(f"Audio stream fault ({reason}); restarting")
+        self._close_streams()
+        self._schedule_retry()
+
+    def _schedule_retry(self):
+        backoff = min(self.max_backoff, self.initial_backoff * 2 ** self.consecutive_failures)
+        self._retry_at = time.perf_counter() + backoff
+
+    def _retry(self):
+        self._retry_at = None
+        if not self._wanted:
+            return
+        self.restart_attempts += 1
+        try:
+            self._reopen()
+        except Exception as e:
+            self.consecutive_failures += 1
+            logger.error(f"Stream restart attempt {self.consecutive_failures} failed: {e}")
+            if self.consecutive_failures >= self.max_attempts:
+                self._wanted = False
+                if self.on_failure is not None:
+                    self.on_failure(f"Audio stream recovery failed after {self.consecutive_failures} attempts: {e}")
+                return
+            self._schedule_retry()
+            return
+
+        recovery_time = time.perf_counter() - self._fault_time
+        self.recoveries += 1
+        self.consecutive_failures = 0
+        self.last_recovery_time = recovery_time
+        self.max_recovery_time = max(self.max_recovery_time, recovery_time)
+        logger.info(f"Audio stream recovered in {recovery_time * 1000:.0f} ms")
+
+    def _reopen(self):
+        self._close_streams()
+        self.streams = self.open_streams()
+
+    def _close_streams(self):
+        streams, self.streams = self.streams, []
+        for stream in streams:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                logger.warning(f"Failed to close audio stream: {e}")
+        # Faults raised by these streams, including while stopping, are now moot
+        self._fault_reason = None
+
+    def stats(self):
+        return {
+            "stream_failures": self.failures,
+            "stream_restart_attempts": self.restart_attempts,
+            "stream_recoveries": self.recoveries,
+            "stream_consecutive_failures": self.consecutive_failures,
+            "stream_last_recovery_time": self.last_recovery_time,
+            "stream_max_recovery_time": self.max_recovery_time,
+        }
+
+
+EngineParameters = collections.namedtuple(
+    "EngineParameters", ["sensitivity", "calibration_min", "calibration_max", "noise_floor"]
+)
+
+CONTROLLER_REBUILD_INTERVAL = 5.0  # seconds between rebuilds of a failing volume controller
+
+
+class VolumeEngine:
+    """GUI-independent capture -> map -> smooth -> actuate pipeline.
+
+    Front ends (the Tk app or the headless daemon) drive it through the
+    monitoring/calibration methods and read processed samples from
+    `telemetry`. `on_error(message)` is called when monitoring had to stop
+    because of an unrecoverable error.
+
+    Parameters the audio thread needs live in `params`, an immutable
+    EngineParameters snapshot that setters replace as a whole, so the
+    callback always sees a consistent set without locking.
+    """
+    def __init__(self, config, on_error=None, volume_controller=None):
+        self.config = config
+        self.on_error = on_error
+        settings = config.settings
+
+        self.calibration = CalibrationManager()
+        self.params = EngineParameters(
+            sensitivity=settings["sensitivity"],
+            calibration_min=settings["calibration"]["min"],
+            calibration_max=settings["calibration"]["max"],
+            noise_floor=settings["calibration"].get("noise_floor")
+        )
+        capture = capture_settings(settings)
+        self.samplerate = capture["samplerate"]
+        self.blocksize = capture["blocksize"]
+        # int16 capture reads PortAudio's buffer zero-copy and analyses it allocation-free
+        self.raw_capture = settings["capture_dtype"] == "int16"
+        analyzer_class = RawIntensityAnalyzer if self.raw_capture else IntensityAnalyzer
+        
+        # One input stream per device. Channel numbers in the config are 1-based; fusion
+        # weights and priorities refer to channels numbered across all inputs in order.
+        # Each input gets its own analyzer: stream callbacks run on separate PortAudio
+        # threads, and analyzer scratch is sized for one stream's block shape.
+        self.inputs = []
+        offset = 0
+        for spec in settings["inputs"] or [{"device": None, "channels": [1]}]:
+            channels = [int(channel) - 1 for channel in spec.get("channels", [1])]
+            self.inputs.append({
+                "device": spec.get("device"),
+                "stream_channels": max(channels) + 1,
+                "columns": None if channels == list(range(len(channels))) else channels,
+                "slice": slice(offset, offset + len(channels)),
+                "analyzer": analyzer_class(capture["hop_size"], capture["decimation"]),
+            })
+            offset += len(channels)
+        self.analyzer = self.inputs[0]["analyzer"]
+        self.channel_count = offset
+        self.channel_calibrations = [self.calibration] + [
+            CalibrationManager() for _ in range(self.channel_count - 1)
+        ]
+        self.fusion = None
+        if self.channel_count > 1:
+            fusion = settings["fusion"]
+            self.channel_levels = np.zeros(self.channel_count)
+            self.fusion = ChannelFusion(self.channel_count, fusion["policy"], fusion["weights"],
+                                        [int(channel) - 1 for channel in fusion["priority"]])
+            self._apply_channel_calibrations()
+        # Shared with the plot process when it renders out of process
+        ring_class = SharedTelemetryRing if settings["renderer_process"] else TelemetryRing
+        self.telemetry = ring_class(settings["telemetry_capacity"], self.channel_count)
+        self.metrics = Metrics(settings["metrics_enabled"])
+        self.metrics.add_collector(self._collect_metrics)
+        # Stream callbacks run concurrently, so each input records into its own shard
+        for spec in self.inputs:
+            spec["metrics"] = self.metrics.add_shard()
+        self.recorder = None
+        if settings["session_record_path"]:
+            self.recorder = SessionRecorder(settings["session_record_path"], self.telemetry.reader()).start()
+        self.metrics_exporter = None
+        if settings["metrics_export_path"]:
+            self.metrics_exporter = MetricsExporter(
+                self.metrics, settings["metrics_export_path"], settings["metrics_export_interval"]
+            ).start()
+
+        if volume_controller is None:
+            volume_controller = VolumeController(settings["volume_backend"], settings["volume_targets"])
+            volume_controller.start_watching(settings["volume_poll_interval"])
+        self.volume_controller = volume_controller
+        self.last_controller_rebuild = -math.inf
+
+        # Volume writes happen on their own thread so the audio callback never waits on the mixer
+        self.volume_actuator = VolumeActuator(
+            self.volume_controller,
+            max_write_rate=settings["max_write_rate"],
+            on_error=lambda e: self._handle_volume_control_error(),
+            metrics=self.metrics
+        )
+        self.volume_actuator.start()
+
+        # The one-euro smoother needs the block rate; explicit settings win
+        self.volume_filter = VolumeFilter(**{"rate": self.samplerate / self.blocksize,
+                                             **settings["smoothing"]})
+        
+        # Curve, sensitivity and calibration bounds compiled into one lookup table, and a
+        # deadband that drops writes below the mixer's resolution (1%)
+        self.mapping_settings = settings["mapping"]
+        self.deadband = WriteDeadband(self.mapping_settings["deadband"], self.mapping_settings["hysteresis"])
+        self._compile_mapping()
+
+        # Continuous calibration: shift the calibrated range with the room's noise floor.
+        # noise_offset is written only by the audio thread, so it never races the GUI's
+        # parameter snapshots.
+        self.continuous_calibration = settings["continuous_calibration"]
+        self.noise_tracking_step = settings["noise_tracking_step"]
+        self.noise_tracker = None
+        self.noise_offset = 0.0
+        self._reset_noise_tracking()
+        self.is_monitoring = False
+        # The only owner of the input streams; callbacks just report faults to it
+        self.supervisor = StreamSupervisor(self._open_streams, on_failure=self._fail)
+        
+        # Sensitivity and calibration changes arrive from the config store, whether made
+        # in the GUI or by editing the file on disk
+        config.subscribe("sensitivity", self.set_sensitivity)
+        config.subscribe("calibration", self._on_calibration_changed)
+        config.subscribe("channel_calibrations", self._on_channel_calibrations_changed)
+        config.subscribe("mapping", self._on_mapping_changed)
+        
+        # Per-block problems on the audio thread are aggregated instead of logged every block
+        self._log_callback_status = LogAggregator("Audio callback status")
+        self._log_callback_error = LogAggregator("Audio callback error", level=logging.ERROR)
+
+    @property
+    def sensitivity(self):
+        return self.params.sensitivity
+
+    @property
+    def calibration_min(self):
+        return self.params.calibration_min
+
+    @property
+    def calibration_max(self):
+        return self.params.calibration_max
+
+    @property
+    def stream_active(self):
+        return self.supervisor.active
+
+    def start_monitoring(self):
+        """Start driving the system volume; raises if the audio stream cannot start"""
+        # The mixer may have been changed meanwhile, so the first target always goes through
+        self.deadband.last = None
+        self.is_monitoring = True
+        try:
+            self._start_stream()
+        except Exception:
+            self.is_monitoring = False
+            raise
+
+    def stop_monitoring(self):
+        self.is_monitoring = False
+        self._log_callback_status.flush()
+        self._log_callback_error.flush()
+        logger.info(f"Volume actuation stats: {self.volume_actuator.stats()}")
+        if self.supervisor.failures:
+            logger.info(f"Audio stream stats: {self.supervisor.stats()}")
+        stats = self.write_stats()
+        logger.info(f"Volume writes avoided: {stats['writes_avoided_percent']:.1f}% of "
+                    f"{stats['targets']} targets ({stats['suppressed_by_deadband']} below the deadband, "
+                    f"{stats['coalesced_by_actuator']} coalesced by the actuator)")
+        if self.metrics.enabled:
+            logger.info(f"Pipeline metrics:\n{self.metrics.summary()}")
+
+    def start_calibration(self):
+        """Start a calibration session, opening the audio stream if needed"""
+        self._start_stream()
+        # Secondary channels first: the primary manager's flag gates sample collection
+        for manager in reversed(self.channel_calibrations):
+            manager.start_calibration()
+
+    def cancel_calibration(self):
+        for manager in self.channel_calibrations:
+            manager.is_calibrating = False
+
+    def finish_calibration(self):
+        """Finish calibration of every channel; on success apply and persist the new thresholds"""
+        results = [manager.finish_calibration() for manager in self.channel_calibrations]
+        if self.fusion is None:
+            success, message = results[0]
+        else:
+            failures = [f"Channel {i + 1}: {message}" for i, (ok, message) in enumerate(results) if not ok]
+            success = not failures
+            message = "\n".join(failures) if failures else results[0][1]
+        if success:
+            profiles = [
+                {"min": m.min_intensity, "max": m.max_intensity, "noise_floor": m.noise_floor}
+                for m in self.channel_calibrations
+            ]
+            # Applied through the config subscription, like a hot-reloaded calibration
+            changes = {"calibration": profiles[0]}
+            if self.fusion is not None:
+                changes["channel_calibrations"] = profiles
+            self.config.update(changes)
+        return success, message
+
+    def status(self):
+        return {
+            "monitoring": self.is_monitoring,
+            "calibrating": self.calibration.is_calibrating,
+            "sensitivity": self.sensitivity,
+            "stream_active": self.stream_active,
+        }
+
+    def handle_command(self, command, value=None):
+        """Apply a remote control command (telemetry server) and return the new status"""
+        if command == "sensitivity":
+            self.config.set("sensitivity", float(value))
+        elif command == "start":
+            if not self.is_monitoring:
+                self.start_monitoring()
+        elif command == "stop":
+            if self.is_monitoring:
+                self.stop_monitoring()
+        elif command == "calibrate":
+            if not self.calibration.is_calibrating:
+                self.start_calibration()
+                timer = threading.Timer(self.calibration.calibration_duration, self._finish_remote_calibration)
+                timer.daemon = True
+                timer.start()
+        elif command != "status":
+            raise ValueError(f"Unknown command: {command}")
+        return self.status()
+
+    def _finish_remote_calibration(self):
+        if self.calibration.is_calibrating:
+            success, message = self.finish_calibration()
+            logger.log(logging.INFO if success else logging.WARNING,
+                       f"Calibration {'complete' if success else 'failed'}: {message}")
+
+    def _on_calibration_changed(self, calibration):
+        self.params = self.params._replace(
+            calibration_min=calibration["min"],
+            calibration_max=calibration["max"],
+            noise_floor=calibration.get("noise_floor")
+        )
+        self._reset_noise_tracking()
+        self._compile_mapping()
+        if self.fusion is not None:
+            self._apply_channel_calibrations()
+
+    def _on_mapping_changed(self, mapping):
+        self.mapping_settings = mapping
+        self.deadband.deadband = mapping["deadband"]
+        self.deadband.hysteresis = mapping["hysteresis"]
+        self._compile_mapping()
+
+    def _compile_mapping(self):
+        """Rebuild the lookup table after the curve, sensitivity or calibration changed"""
+        params = self.params
+        mapping = self.mapping_settings
+        self.mapping = VolumeMapping(
+            params.calibration_min, params.calibration_max, params.sensitivity,
+            curve=mapping["curve"], points=mapping["points"], lut_size=mapping["lut_size"]
+        )
+
+    def write_stats(self):
+        """Volume targets produced while monitoring, and how many never reached the mixer"""
+        deadband = self.deadband
+        actuator = self.volume_actuator
+        targets = deadband.passed + deadband.suppressed
+        return {
+            "targets": targets,
+            "suppressed_by_deadband": deadband.suppressed,
+            "coalesced_by_actuator": actuator.writes_coalesced,
+            "writes_issued": actuator.writes_issued,
+            "writes_avoided_percent": 100.0 * (targets - actuator.writes_issued) / targets if targets else 0.0,
+        }
+
+    def _on_channel_calibrations_changed(self, profiles):
+        if self.fusion is not None:
+            self._apply_channel_calibrations()
+
+    def _apply_channel_calibrations(self):
+        """Give each channel its own profile, falling back to the main calibration"""
+        settings = self.config.settings
+        profiles = settings["channel_calibrations"]
+        self.fusion.set_calibrations([
+            profiles[i] if i < len(profiles) else settings["calibration"]
+            for i in range(self.channel_count)
+        ])
+
+    def _reset_noise_tracking(self):
+        self.noise_offset = 0.0
+        self.noise_tracker = None
+        if not self.continuous_calibration:
+            return
+        if self.params.noise_floor is None:
+            logger.warning("Continuous calibration needs a calibrated noise floor; run calibration first")
+            return
+        self.noise_tracker = NoiseFloorTracker(self.params.noise_floor, step=self.noise_tracking_step)
+
+    @property
+    def noise_floor(self):
+        """Current noise floor estimate in dB (None until calibrated)"""
+        if self.noise_tracker is not None:
+            return self.noise_tracker.value
+        return self.params.noise_floor
+
+    def set_sensitivity(self, value):
+        self.params = self.params._replace(sensitivity=max(0.1, min(2.0, value)))
+        self._compile_mapping()
+        return self.params.sensitivity
+
+    def map_intensity(self, intensity):
+        """Map an intensity (dB) to a volume level (0.0 to 1.0)"""
+        return self.mapping.lookup(intensity, self.noise_offset)
+
+    def process_block(self, indata, captured_at=None, input_index=0):
+        """Run one audio block through the pipeline and return (intensity, volume).
+
+        `captured_at` is the perf_counter time the block was captured; volume
+        actuation latency is measured from it. With several inputs, blocks from
+        the other devices (`input_index` > 0) only refresh their channel levels
+        and return (None, None); the first input's blocks drive the pipeline.
+        """
+        metrics = self.inputs[input_index]["metrics"]
+        timed = self.metrics.enabled
+        if timed:
+            start = time.perf_counter()
+        
+        # Calculate intensity regardless of monitoring state
+        if self.fusion is None:
+            levels = None
+            intensity = self.analyzer.analyze(indata)
+        else:
+            spec = self.inputs[input_index]
+            block = indata if spec["columns"] is None else indata[:, spec["columns"]]
+            levels = self.channel_levels
+            levels[spec["slice"]] = spec["analyzer"].analyze_channels(block)
+            if input_index:
+                return None, None
+            intensity = float(levels.max())
+        if timed:
+            analyzed = time.perf_counter()
+            metrics.observe("analyze", analyzed - start)
+        
+        # Always process samples during calibration
+        if self.calibration.is_calibrating:
+            if levels is None:
+                self.calibration.add_sample(intensity)
+            else:
+                for manager, level in zip(self.channel_calibrations, levels.tolist()):
+                    manager.add_sample(level)
+            volume = self.volume_controller.get_volume()
+            target = math.nan
+        # Only process volume changes if monitoring
+        elif self.is_monitoring:
+            tracker = self.noise_tracker
+            if tracker is not None:
+                self.noise_offset = tracker.update(intensity) - self.params.noise_floor
+            if levels is None:
+                new_volume = self.map_intensity(intensity)
+            else:
+                normalized, intensity = self.fusion.fuse(levels, self.noise_offset)
+                new_volume = self.mapping.lookup_normalized(normalized)
+            
+            # Apply smoothing filter
+            volume = self.volume_filter.smooth_volume(new_volume)
+            target = new_volume
+            
+            if self.deadband.accept(volume):
+                self.volume_actuator.publish(volume, captured_at)
+        else:
+            return intensity, None
+        
+        self.telemetry.push(time.perf_counter(), intensity, volume, levels, target,
+                            self.volume_actuator.last_latency)
+        if timed:
+            metrics.observe("map_smooth", time.perf_counter() - analyzed)
+        return intensity, volume
+
+    def _audio_callback(self, indata, frames, time_info, status, input_index=0):
+        try:
+            timed = self.metrics.enabled
+            metrics = self.inputs[input_index]["metrics"]
+            if status:
+                self._log_callback_status(str(status))
+                if timed:
+                    metrics.increment("callback_status")
+                    if status.input_overflow:
+                        metrics.increment("xruns")
+            
+            # Map the ADC capture time of the block onto our perf_counter clock
+            started = captured_at = time.perf_counter()
+            if time_info is not None:
+                buffer_age = time_info.currentTime - time_info.inputBufferAdcTime
+                if 0 < buffer_age < 1:
+                    captured_at -= buffer_age
+            self.process_block(indata, captured_at, input_index)
+            if timed:
+                elapsed = time.perf_counter() - started
+                metrics.observe("callback", elapsed)
+                if elapsed > frames / self.samplerate:
+                    metrics.increment("callback_overruns")
+        except Exception as e:
+            self._log_callback_error(repr(e))
+            self.supervisor.fault(repr(e))
+
+    def _raw_audio_callback(self, indata, frames, time_info, status, input_index=0):
+        # View PortAudio's int16 buffer as (frames, channels) without copying it
+        block = np.frombuffer(indata, dtype=np.int16).reshape(frames, -1)
+        self._audio_callback(block, frames, time_info, status, input_index)
+
+    def _collect_metrics(self):
+        """Gauges sampled from the actuator and telemetry ring at snapshot time"""
+        actuator = self.volume_actuator
+        return {
+            "volume_writes_issued": actuator.writes_issued,
+            "volume_writes_coalesced": actuator.writes_coalesced,
+            "volume_write_failures": actuator.write_failures,
+            "volume_writes_below_deadband": self.deadband.suppressed,
+            "telemetry_records": self.telemetry.write_index,
+            **self.supervisor.stats(),
+            **(self.recorder.stats() if self.recorder is not None else {}),
+        }
+
+    def _start_stream(self):
+        """Make sure the input streams run; a no-op if they already do"""
+        if not self.stream_active:
+            self.supervisor.ensure_running()
+
+    def _open_streams(self):
+        """Create and start one stream per input device (called on the supervisor thread)"""
+        # Import numpy here rather than on the first audio block
+        preload(np)
+        
+        if self.raw_capture:
+            stream_class, callback, dtype = sd.RawInputStream, self._raw_audio_callback, "int16"
+        else:
+            stream_class, callback, dtype = sd.InputStream, self._audio_callback, "float32"
+        streams = []
+        try:
+            for index, spec in enumerate(self.inputs):
+                streams.append(stream_class(
+                    callback=functools.partial(callback, input_index=index),
+                    finished_callback=self._on_stream_finished,
+                    device=spec["device"],
+                    channels=spec["stream_channels"],
+                    dtype=dtype,
+                    samplerate=self.samplerate,
+                    blocksize=self.blocksize
+                ))
+            for stream in streams:
+                stream.start()
+        except Exception:
+            for stream in streams:
+                stream.close()
+            raise
+        logger.info(f"Audio monitoring started ({self.channel_count} channel(s) "
+                    f"from {len(streams)} device(s))")
+        return streams
+
+    def _on_stream_finished(self):
+        # Also runs when the supervisor stops a stream on purpose; it ignores those
+        self.supervisor.fault("input stream stopped")
+
+    def _handle_volume_control_error(self):
+        """Rebuild the volume controller, at most once per CONTROLLER_REBUILD_INTERVAL"""
+        now = time.monotonic()
+        if now - self.last_controller_rebuild < CONTROLLER_REBUILD_INTERVAL:
+            return
+        self.last_controller_rebuild = now
+        try:
+            self.volume_controller.close()
+            self.volume_controller = VolumeController(self.config.settings["volume_backend"],
+                                                      self.config.settings["volume_targets"])
+            self.volume_controller.start_watching(self.config.settings["volume_poll_interval"])
+            self.volume_actuator.volume_controller = self.volume_controller
+            logger.info("Volume controller reinitialized")
+        except Exception as e:
+            logger.error(f"Failed to reinitialize volume controller: {e}")
+            self._fail(f"Volume control failed: {e}")
+
+    def _fail(self, message):
+        self.is_monitoring = False
+        if self.on_error is not None:
+            self.on_error(message)
+
+    def close(self):
+        """Stop the stream and release the mixer"""
+        self.is_monitoring = False
+        self.supervisor.close()
+        self.volume_actuator.stop()
+        self.volume_controller.close()
+        self.config.unsubscribe("sensitivity", self.set_sensitivity)
+        self.config.unsubscribe("calibration", self._on_calibration_changed)
+        self.config.unsubscribe("channel_calibrations", self._on_channel_calibrations_changed)
+        self.config.unsubscribe("mapping", self._on_mapping_changed)
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        if isinstance(self.telemetry, SharedTelemetryRing):
+            self.telemetry.close()
+
+
+class MemoryVolumeController:
+    """In-memory stand-in for VolumeController, used for replay and benchmarks"""
+    def __init__(self, level=0.5):
+        self.level = level
+        self.writes = 0
+
+    def start_watching(self, poll_interval=1.0):
+        pass
+
+    def set_volume(self, volume_level):
+        self.level = max(0.0, min(1.0, volume_level))
+        self.writes += 1
+
+    def get_volume(self):
+        return self.level
+
+    def refresh(self):
+        return self.level
+
+    def close(self):
+        pass
+
+
+SYNTHETIC_SIGNALS = ["tone", "noise", "speech"]
+
+
+def synthetic_signal(kind, seconds, samplerate, seed=0):
+    """Generate a mono float32 test signal: a tone, steady noise, or speech-like bursts"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    if kind == "tone":
+        signal = 0.2 * np.sin(2 * np.pi * 440 * t)
+    elif kind == "noise":
+        signal = 0.05 * rng.standard_normal(len(t))
+    elif kind == "speech":
+        # Noise shaped by ~4 Hz syllables, in half-second phrases of varying loudness and pauses
+        syllables = (0.5 - 0.5 * np.cos(2 * np.pi * 4 * t)) ** 2
+        phrases = rng.choice([0.0, 0.05, 0.2, 0.5], size=int(seconds * 2) + 1)
+        signal = 0.005 * rng.standard_normal(len(t))
+        signal += phrases[(t * 2).astype(int)] * syllables * rng.standard_normal(len(t))
+    else:
+        raise ValueError(f"Unknown synthetic signal: {kind}")
+    return signal.astype(np.float32)
+
+
+def to_int16(signal):
+    """Convert float samples in [-1, 1) to int16 the way PortAudio does (full scale 32768)"""
+    return np.clip(np.round(np.asarray(signal) * 32768.0), -32768, 32767).astype(np.int16)
+
+
+def load_wav(path):
+    """Read a PCM WAV file as (mono float32 samples in [-1, 1], samplerate)"""
+    with wave.open(path, 'rb') as wav:
+        samplerate = wav.getframerate()
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width * 8} bits")
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32), samplerate
+
+
+class _StageTimer:
+    """Wraps one pipeline stage callable and accumulates its run time"""
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        result = self.function(*args)
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        return result
+
+
+class ReplaySession:
+    """Feeds WAV or synthetic audio through VolumeEngine as fast as possible.
+
+    Blocks go through the same process_block() the audio callback uses, with
+    a MemoryVolumeController instead of the system mixer. Each stage is
+    wrapped with a timer so per-stage cost can be reported.
+    """
+    def __init__(self, config, volume_controller=None):
+        self.volume_controller = volume_controller or MemoryVolumeController()
+        self.engine = VolumeEngine(config, volume_controller=self.volume_controller)
+        engine = self.engine
+        self.stages = {
+            "analyze": _StageTimer(engine.analyzer.analyze),
+            "calibrate": _StageTimer(engine.calibration.add_sample),
+            "map": _StageTimer(engine.map_intensity),
+            "smooth": _StageTimer(engine.volume_filter.smooth_volume),
+            "actuate": _StageTimer(engine.volume_actuator.publish),
+            "telemetry": _StageTimer(engine.telemetry.push),
+        }
+        engine.analyzer.analyze = self.stages["analyze"]
+        engine.calibration.add_sample = self.stages["calibrate"]
+        engine.map_intensity = self.stages["map"]
+        engine.volume_filter.smooth_volume = self.stages["smooth"]
+        engine.volume_actuator.publish = self.stages["actuate"]
+        engine.telemetry.push = self.stages["telemetry"]
+
+    def blocks(self, signal):
+        """Split a mono signal into (frames, 1) block views of the engine's block size"""
+        blocksize = self.engine.blocksize
+        if self.engine.raw_capture:
+            signal = to_int16(signal)
+        usable = len(signal) - len(signal) % blocksize
+        return signal[:usable].reshape(-1, blocksize, 1)
+
+    def calibrate(self, signal):
+        """Run a calibration pass over `signal`; returns (success, message)"""
+        self.engine.calibration.start_calibration()
+        for block in self.blocks(signal):
+            self.engine.process_block(block)
+        return self.engine.finish_calibration()
+
+    def run(self, signal, trace_allocations=False):
+        """Monitor `signal` block by block and return throughput and per-stage statistics"""
+        engine = self.engine
+        for stage in self.stages.values():
+            stage.calls = 0
+            stage.seconds = 0.0
+        blocks = self.blocks(signal)
+        engine.is_monitoring = True
+        deadband = engine.deadband
+        deadband.last = None
+        deadband.passed = deadband.suppressed = 0
+
+        if trace_allocations:
+            tracemalloc.start()
+        allocated_before = sys.getallocatedblocks()
+        # A recorder, if configured, is drained before the telemetry ring can wrap
+        recorder = engine.recorder
+        step = engine.telemetry.capacity // 2 if recorder is not None else max(1, len(blocks))
+        start = time.perf_counter()
+        for first in range(0, len(blocks), step):
+            for block in blocks[first:first + step]:
+                engine.process_block(block)
+            if recorder is not None:
+                recorder.drain()
+        elapsed = time.perf_counter() - start
+        allocated_after = sys.getallocatedblocks()
+        peak_bytes = tracemalloc.get_traced_memory()[1] if trace_allocations else None
+        if trace_allocations:
+            tracemalloc.stop()
+        engine.is_monitoring = False
+
+        count = max(1, len(blocks))
+        return {
+            "blocks": len(blocks),
+            "seconds": elapsed,
+            "blocks_per_second": len(blocks) / elapsed if elapsed > 0 else 0.0,
+            "realtime_factor": len(blocks) * engine.blocksize / engine.samplerate / elapsed if elapsed > 0 else 0.0,
+            "stage_us": {name: stage.seconds / count * 1e6 for name, stage in self.stages.items()},
+            "net_allocated_blocks": allocated_after - allocated_before,
+            "traced_peak_bytes": peak_bytes,
+            "deadband_avoided_percent": 100.0 * deadband.suppressed / count,
+        }
+
+    def close(self):
+        self.engine.close()
+
+
+def run_replay(config, source, calibrate_seconds=0.0):
+    """Replay a WAV file or `synthetic:<kind>` through the pipeline and log the statistics"""
+    capture = capture_settings(config.settings)
+    samplerate = capture["samplerate"]
+    if source.startswith("synthetic:"):
+        signal = synthetic_signal(source.split(":", 1)[1], 60, samplerate)
+    else:
+        signal, file_rate = load_wav(source)
+        if file_rate != samplerate:
+            # Keep block and hop durations, not frame counts, so timing matches live capture
+            ratio = file_rate / samplerate
+            config.set("capture", {
+                **config.settings["capture"],
+                "samplerate": file_rate,
+                "blocksize": max(1, round(capture["blocksize"] * ratio)),
+                "hop_size": round(capture["hop_size"] * ratio),
+            }, save=False)
+
+    session = ReplaySession(config)
+    try:
+        if calibrate_seconds > 0:
+            samplerate = session.engine.samplerate
+            success, message = session.calibrate(signal[:int(calibrate_seconds * samplerate)])
+            logger.info(f"Replay calibration: {message}")
+        stats = session.run(signal)
+    finally:
+        session.close()
+
+    stages = ", ".join(f"{name} {us:.1f} us" for name, us in stats["stage_us"].items())
+    logger.info(f"Replayed {stats['blocks']} blocks in {stats['seconds']:.3f} s "
+                f"({stats['blocks_per_second']:.0f} blocks/s, {stats['realtime_factor']:.0f}x realtime); "
+                f"per block: {stages}; deadband skipped {stats['deadband_avoided_percent']:.1f}% of "
+                f"volume targets; mixer writes: {session.volume_controller.writes}")
+    return 0
+
+
+class HistoryBuffer:
+    """Fixed-size intensity/volume history on preallocated NumPy arrays.
+
+    Every sample is written twice, at `index` and `index + capacity`, so the
+    newest `capacity` samples always form one contiguous slice and views()
+    can hand them to matplotlib without copying. Volume is stored in percent.
+    With `channels`, per-channel intensities are kept alongside; with a
+    `pyramid`, batches passed to extend() with their times also feed it.
+    """
+    def __init__(self, capacity, channels=0, pyramid=None):
+        self.capacity = max(1, int(capacity))
+        self.channels = channels
+        self.pyramid = pyramid
+        self.intensity = np.zeros(2 * self.capacity)
+        self.volume = np.zeros(2 * self.capacity)
+        self.levels = np.zeros((2 * self.capacity, channels)) if channels else None
+        self.x = np.arange(self.capacity, dtype=float)
+        self.index = 0
+        self.count = 0
+
+    def append(self, intensity, volume, levels=None):
+        i = self.index
+        self.intensity[i] = self.intensity[i + self.capacity] = intensity
+        self.volume[i] = self.volume[i + self.capacity] = volume * 100
+        if levels is not None:
+            self.levels[i] = self.levels[i + self.capacity] = levels
+        self.index = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def extend(self, intensities, volumes, levels=None, times=None):
+        """Append a batch of samples with one vectorised write per array"""
+        if self.pyramid is not None and times is not None:
+            self.pyramid.extend(times, intensities, volumes)
+        intensities = np.asarray(intensities, dtype=float)[-self.capacity:]
+        volumes = np.asarray(volumes, dtype=float)[-self.capacity:] * 100
+        n = len(intensities)
+        if n == 0:
+            return
+        indices = (self.index + np.arange(n)) % self.capacity
+        self.intensity[indices] = self.intensity[indices + self.capacity] = intensities
+        self.volume[indices] = self.volume[indices + self.capacity] = volumes
+        if levels is not None:
+            self.levels[indices] = self.levels[indices + self.capacity] = levels[-self.capacity:]
+        self.index = (self.index + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    def views(self):
+        """Return (x, intensity, volume_percent) as zero-copy views, oldest first"""
+        start = self.index if self.count == self.capacity else 0
+        end = start + self.count
+        return self.x[:self.count], self.intensity[start:end], self.volume[start:end]
+
+    def level_views(self):
+        """Return per-channel intensities as a zero-copy (samples, channels) view, oldest first"""
+        start = self.index if self.count == self.capacity else 0
+        return self.levels[start:start + self.count]
+
+    def __len__(self):
+        return self.count
+
+
+# Bucket widths (seconds) of the HistoryPyramid levels; neighbours differ by at most 4x,
+# so a query always gets between a quarter of and all of the pixels it asks for
+HISTORY_RESOLUTIONS = (0.25, 1.0, 4.0, 15.0, 60.0, 240.0, 900.0)
+
+# Line graph zoom levels; "Recent" plots the last `max_history` samples one by one
+HISTORY_SPANS = {"Recent": 0, "1 min": 60, "10 min": 600, "1 hour": 3600, "8 hours": 28800}
+
+
+class HistoryPyramid:
+    """Min/max/mean history of intensity and volume at several time resolutions.
+
+    Each level is a ring of `slots` fixed-width time buckets holding the
+    min, max, sum and count of both signals. extend() folds a batch into
+    every level with one segmented reduction per level, so memory is fixed
+    and the update cost depends only on the batch size. query() answers from
+    the finest level that covers the span in at most `pixels` buckets, so
+    drawing the last minute and the last eight hours costs the same. Canvases
+    up to `slots` pixels wide are served at full resolution.
+    """
+    def __init__(self, resolutions=HISTORY_RESOLUTIONS, slots=2048):
+        self.resolutions = tuple(resolutions)
+        self.slots = slots
+        count = len(self.resolutions)
+        self.ids = np.zeros((count, slots), dtype=np.int64)
+        self.counts = np.zeros((count, slots))
+        # Columns: intensity (dB), volume (percent)
+        self.low = np.zeros((count, slots, 2))
+        self.high = np.zeros((count, slots, 2))
+        self.sums = np.zeros((count, slots, 2))
+        self.heads = [slots - 1] * count
+        self.sizes = [0] * count
+        self.latest = 0.0
+
+    def extend(self, times, intensities, volumes):
+        """Fold a batch of samples (times in seconds, volume 0.0 to 1.0) into every level"""
+        times = np.asarray(times, dtype=float)
+        if not len(times):
+            return
+        values = np.column_stack((intensities, np.asarray(volumes, dtype=float) * 100))
+        first, self.latest = float(times[0]), float(times[-1])
+        totals = None
+        for level, resolution in enumerate(self.resolutions):
+            bucket = math.floor(first / resolution)
+            if bucket == math.floor(self.latest / resolution):
+                # Usual case on all but the finest levels: the whole batch is one bucket
+                if totals is None:
+                    totals = (values.min(axis=0), values.max(axis=0), values.sum(axis=0))
+                low, high, sums = totals
+                self._merge(level, (bucket,), (len(values),), (low,), (high,), (sums,))
+                continue
+            ids = np.floor(times / resolution).astype(np.int64)
+            # Samples arrive in time order, so each bucket is one contiguous run
+            starts = np.flatnonzero(np.diff(ids, prepend=ids[0] - 1))
+            ends = np.append(starts[1:], len(ids))
+            self._merge(level, ids[starts], ends - starts,
+                        np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts),
+                        np.add.reduceat(values, starts))
+
+    def _merge(self, level, ids, counts, low, high, sums):
+        head = self.heads[level]
+        if self.sizes[level] and ids[0] == self.ids[level, head]:
+            # The batch continues the newest bucket
+            self.counts[level, head] += counts[0]
+            np.minimum(self.low[level, head], low[0], out=self.low[level, head])
+            np.maximum(self.high[level, head], high[0], out=self.high[level, head])
+            self.sums[level, head] += sums[0]
+            ids, counts, low, high, sums = ids[1:], counts[1:], low[1:], high[1:], sums[1:]
+        n = min(len(ids), self.slots)
+        if not n:
+            return
+        if n == 1:
+            slots = (head + 1) % self.slots
+            ids, counts, low, high, sums = ids[-1], counts[-1], low[-1], high[-1], sums[-1]
+        else:
+            slots = (head + 1 + np.arange(n)) % self.slots
+            ids, counts, low, high, sums = ids[-n:], counts[-n:], low[-n:], high[-n:], sums[-n:]
+        self.ids[level, slots] = ids
+        self.counts[level, slots] = counts
+        self.low[level, slots] = low
+        self.high[level, slots] = high
+        self.sums[level, slots] = sums
+        self.heads[level] = int(slots if n == 1 else slots[-1])
+        self.sizes[level] = min(self.slots, self.sizes[level] + n)
 
+    def level_for(self, span, pixels):
+        """Index of the finest level that covers `span` seconds in at most `pixels` buckets"""
+        for level, resolution in enumerate(self.resolutions):
+            if span / resolution > pixels:
+                continue
+            size = self.sizes[level]
+            if size < self.slots:
+                return level  # still holds everything since the first sample
+            head = self.heads[level]
+            oldest = self.ids[level, (head + 1) % self.slots]
+            if (self.ids[level, head] - oldest + 1) * resolution >= span:
+                return level
+        return len(self.resolutions) - 1
 
-# Set up logging
-def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('volume_control.log'),
-            logging.StreamHandler()
+    def query(self, span, pixels):
+        """Return (seconds_ago, mean, low, high) for the last `span` seconds, oldest first.
+
+        mean, low and high are (buckets, 2) arrays of intensity (dB) and
+        volume (percent); seconds_ago is each bucket's midpoint relative to
+        the newest sample, so it is negative. At most `pixels` buckets are
+        returned (a few more only if the coarsest level is still too fine).
+        """
+        level = self.level_for(span, max(1, int(pixels)))
+        resolution = self.resolutions[level]
+        wanted = min(self.sizes[level], int(math.ceil(span / resolution)) + 1)
+        slots = (self.heads[level] - np.arange(wanted)[::-1]) % self.slots
+        ids = self.ids[level, slots]
+        keep = ids >= math.floor((self.latest - span) / resolution)
+        slots, ids = slots[keep], ids[keep]
+        mean = self.sums[level, slots] / self.counts[level, slots][:, None]
+        seconds_ago = (ids + 0.5) * resolution - self.latest
+        return seconds_ago, mean, self.low[level, slots], self.high[level, slots]
+
+    def nbytes(self):
+        return self.ids.nbytes + self.counts.nbytes + self.low.nbytes + self.high.nbytes + self.sums.nbytes
+
+
+class PlotRenderer:
+    """Draws one visualization mode with persistent artists and blitting.
+
+    The static parts of the axes (ticks, grid, legend) are rendered once and
+    cached as a background; each frame restores that background and redraws
+    only the animated artists. The cache is rebuilt on every full draw,
+    e.g. after the window is resized.
+
+    `span` is the history zoom in seconds (0 for the recent raw samples);
+    only modes that plot history use it.
+    """
+    mode = None
+
+    def __init__(self, figure, history, span=0):
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.history = history
+        self.span = span
+        self.background = None
+
+        figure.clear()
+        self.ax = figure.add_subplot(111)
+        self.artists = self._create_artists()
+        for artist in self.artists:
+            artist.set_animated(True)
+
+        self._draw_cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.draw()
+
+    def _create_artists(self):
+        """Set up the static axes and return the artists updated every frame"""
+        raise NotImplementedError
+
+    def _update_artists(self, intensity, volume):
+        raise NotImplementedError
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def render(self, intensity, volume):
+        """Draw a frame for the latest intensity (dB) and volume (0.0 to 1.0)"""
+        self._update_artists(intensity, volume)
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.figure.bbox)
+
+    def set_span(self, span):
+        self.span = span
+
+    def close(self):
+        self.canvas.mpl_disconnect(self._draw_cid)
+
+
+class LinePlotRenderer(PlotRenderer):
+    mode = "Line Graph"
+
+    def _create_artists(self):
+        self.intensity_line, = self.ax.plot([], [], label='Intensity', color='blue')
+        self.volume_line, = self.ax.plot([], [], label='Volume', color='red')
+        # Min/max envelopes around the means when zoomed out to aggregated history. A plain
+        # Polygon patch rasterizes several times faster than fill_between's collection
+        self.intensity_band = self.ax.add_patch(
+            mpl_patches.Polygon(np.zeros((1, 2)), color='blue', alpha=0.2, linewidth=0))
+        self.volume_band = self.ax.add_patch(
+            mpl_patches.Polygon(np.zeros((1, 2)), color='red', alpha=0.2, linewidth=0))
+        # A thinner line per input channel when capturing several
+        self.channel_lines = [
+            self.ax.plot([], [], label=f'Ch {i + 1}', linewidth=0.8, alpha=0.6)[0]
+            for i in range(self.history.channels)
         ]
-    )
-    return logging.getLogger('VolumeControl')
+        self._set_time_axis()
+        self.ax.set_ylim(-10, 100)
+        self.ax.set_ylabel('Level')
+        self.ax.legend()
+        self.ax.grid(True)
+        return [self.intensity_band, self.volume_band, self.intensity_line, self.volume_line,
+                *self.channel_lines]
 
-logger = setup_logging()
+    def _set_time_axis(self):
+        if not self.span or self.history.pyramid is None:
+            self.ax.set_xlim(0, self.history.capacity)
+            self.ax.set_xlabel('Time')
+            return
+        unit, self.time_divisor = (("hours", 3600.0) if self.span > 3600 else
+                                   ("minutes", 60.0) if self.span > 60 else ("seconds", 1.0))
+        self.ax.set_xlim(-self.span / self.time_divisor, 0)
+        self.ax.set_xlabel(f'Time ({unit} ago)')
 
+    def set_span(self, span):
+        super().set_span(span)
+        self._set_time_axis()
+        self.canvas.draw()
 
-class Config:
-    def __init__(self):
-        self.config_file = "volume_control_config.json"
-        self.defaults = {
-            "sensitivity": 1.0,
-            "max_history": 100,
-            "update_interval": 100,
-            "audio_feedback": True,
-            "visualization_mode": "Line Graph",
-            "calibration": {
-                "min": 0,
-                "max": 100
-            }
-        }
-        self.settings = self.load_config()
+    def _update_artists(self, intensity, volume):
+        if self.span and self.history.pyramid is not None:
+            self._update_zoomed()
+            return
+        x, intensity_history, volume_history = self.history.views()
+        self.intensity_line.set_data(x, intensity_history)
+        self.volume_line.set_data(x, volume_history)
+        if self.channel_lines:
+            levels = self.history.level_views()
+            for i, line in enumerate(self.channel_lines):
+                line.set_data(x, levels[:, i])
+        self.intensity_band.set_visible(False)
+        self.volume_band.set_visible(False)
 
-    def load_config(self):
-        try:
-            with open(self.config_file, 'r') as f:
-                return {**self.defaults, **json.load(f)}
-        except FileNotFoundError:
-            return self.defaults
+    def _update_zoomed(self):
+        # One bucket per horizontal pixel at most, whatever the span
+        seconds_ago, mean, low, high = self.history.pyramid.query(self.span, self.ax.bbox.width)
+        x = seconds_ago / self.time_divisor
+        for column, line, band in ((0, self.intensity_line, self.intensity_band),
+                                   (1, self.volume_line, self.volume_band)):
+            line.set_data(x, mean[:, column])
+            if len(x):
+                # Upper edge left to right, then the lower edge back
+                band.set_xy(np.column_stack((np.concatenate((x, x[::-1])),
+                                             np.concatenate((high[:, column], low[::-1, column])))))
+            band.set_visible(len(x) > 0)
+        for line in self.channel_lines:
+            line.set_data([], [])
 
-    def save_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.settings, f, indent=4)
-        except Exception as e:
-            logger.error(f"Failed to save config: {e}")
 
-class VolumeFilter:
-    def __init__(self, window_size=5):
-        self.window_size = window_size
-        self.volume_history = []
+class BarPlotRenderer(PlotRenderer):
+    mode = "Bar Graph"
 
-    def smooth_volume(self, new_volume):
-        self.volume_history.append(new_volume)
-        if len(self.volume_history) > self.window_size:
-            self.volume_history.pop(0)
-        return sum(self.volume_history) / len(self.volume_history)
+    def _create_artists(self):
+        self.bars = self.ax.bar(['Intensity', 'Volume'], [0, 0], color=['blue', 'red'])
+        self.ax.set_ylim(0, 100)
+        return list(self.bars)
 
-    
-                
+    def _update_artists(self, intensity, volume):
+        self.bars[0].set_height(intensity)
+        self.bars[1].set_height(volume * 100)
 
-class VolumeController:
-    """Cross-platform volume control implementation"""
-    def __init__(self):
-        self.system = platform.system()
-        try:
-            if self.system == "Windows":
-                from ctypes import cast, POINTER
-                from comtypes import CLSCTX_ALL
-                from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-                
-                devices = AudioUtilities.GetSpeakers()
-                interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-                self.volume = cast(interface, POINTER(IAudioEndpointVolume))
-            logger.info(f"Volume controller initialized for {self.system}")
-        except Exception as e:
-            logger.error(f"Failed to initialize volume controller: {e}")
-            raise
 
-    def set_volume(self, volume_level):
-        """Set system volume (0.0 to 1.0)"""
-        try:
-            volume_level = max(0.0, min(1.0, volume_level))
-            
-            if self.system == "Windows":
-                self.volume.SetMasterVolumeLevelScalar(volume_level, None)
-            elif self.system == "Darwin":  # macOS
-                volume_level_percent = int(volume_level * 100)
-                os.system(f"osascript -e 'set volume output volume {volume_level_percent}'")
-            elif self.system == "Linux":
-                volume_level_percent = int(volume_level * 100)
-                os.system(f"amixer -D pulse sset Master {volume_level_percent}%")
-            logger.debug(f"Volume set to {volume_level}")
-        except Exception as e:
-            logger.error(f"Failed to set volume: {e}")
-            raise
+class MeterPlotRenderer(PlotRenderer):
+    mode = "Meter"
 
-    def get_volume(self):
-        """Get current system volume (0.0 to 1.0)"""
+    def _create_artists(self):
+        # VU meter style visualization
+        self.intensity_bar = self.ax.add_patch(mpl_patches.Rectangle((0, 0), 0, 0.3, color='blue', alpha=0.6))
+        self.volume_bar = self.ax.add_patch(mpl_patches.Rectangle((0, 0.7), 0, 0.3, color='red', alpha=0.6))
+        self.ax.set_xlim(0, 100)
+        self.ax.set_ylim(0, 1)
+        self.ax.set_xticks(range(0, 101, 10))
+        self.ax.set_yticks([0.15, 0.85])
+        self.ax.set_yticklabels(['Intensity', 'Volume'])
+        return [self.intensity_bar, self.volume_bar]
+
+    def _update_artists(self, intensity, volume):
+        self.intensity_bar.set_width(intensity)
+        self.volume_bar.set_width(volume * 100)
+
+
+PLOT_RENDERERS = {
+    renderer.mode: renderer
+    for renderer in (LinePlotRenderer, BarPlotRenderer, MeterPlotRenderer)
+}
+
+
+def run_renderer_process(ring_name, capacity, channels, mode, max_history, target_fps, span, commands):
+    """Plot window process: renders a SharedTelemetryRing until told to close"""
+    ring = SharedTelemetryRing(capacity, channels, name=ring_name)
+    reader = ring.reader()
+    history = HistoryBuffer(max_history, channels if channels > 1 else 0, HistoryPyramid())
+
+    root = tk.Tk()
+    root.title("Voice Volume Controller - Visualization")
+    figure = mpl_figure.Figure(figsize=(8, 4), dpi=100)
+    canvas = backend_tkagg.FigureCanvasTkAgg(figure, master=root)
+    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    renderer = PLOT_RENDERERS[mode](figure, history, span)
+    interval = max(1, int(1000 / target_fps))
+
+    def tick():
+        nonlocal renderer
         try:
-            if self.system == "Windows":
-                return self.volume.GetMasterVolumeLevelScalar()
-            elif self.system == "Darwin":  # macOS
-                cmd = "osascript -e 'output volume of (get volume settings)'"
-                result = subprocess.check_output(cmd, shell=True).strip()
-                return float(result) / 100.0
-            elif self.system == "Linux":
-                cmd = "amixer -D pulse sget Master | grep 'Left:' | awk -F'[][]' '{ print $2 }'"
-                result = subprocess.check_output(cmd, shell=True).strip()
-                return float(result.decode('utf-8').replace('%', '')) / 100.0
-        except Exception as e:
-            logger.error(f"Failed to get volume: {e}")
-            return 0.0
-class CalibrationManager:
-    def __init__(self):
-        self.samples = []
-        self.min_intensity = 0
-        self.max_intensity = 100
-        self.calibration_duration = 15  # Simplified to 15 seconds
-        self.is_calibrating = False
-        self.start_time = None
-        self.noise_floor = None
-        self.required_samples = 50  # Reduced minimum required samples
-        
-    def start_calibration(self):
-        """Start a new calibration session"""
-        self.samples = []
-        self.is_calibrating = True
-        self.start_time = time.time()
-        return True
-        
-    def add_sample(self, intensity):
-        """Add a new intensity sample during calibration"""
-        if self.is_calibrating:
-            self.samples.append(intensity)
-            
-    def get_progress(self):
-        """Get calibration progress as percentage"""
-        if not self.is_calibrating or not self.start_time:
-            return 100
-        elapsed = time.time() - self.start_time
-        return min(100, (elapsed / self.calibration_duration) * 100)
-        
-    def finish_calibration(self):
-        """Process calibration data and compute thresholds"""
-        if len(self.samples) < self.required_samples:
-            return False, f"Insufficient samples collected. Please try again."
-            
-        # Remove outliers using IQR method
-        samples = np.array(self.samples)
-        q1 = np.percentile(samples, 25)
-        q3 = np.percentile(samples, 75)
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-        filtered_samples = samples[(samples >= lower_bound) & (samples <= upper_bound)]
-        
-        if len(filtered_samples) < self.required_samples // 2:
-            return False, "Too many outliers in calibration data. Please try again."
-            
-        # Calculate noise floor as the 10th percentile
-        self.noise_floor = np.percentile(filtered_samples, 10)
-        
-        # Set min/max thresholds
-        self.min_intensity = np.percentile(filtered_samples, 20)
-        self.max_intensity = np.percentile(filtered_samples, 90)
-        
-        self.is_calibrating = False
-        return True, "Calibration completed successfully"
+            while commands.poll():
+                command, value = commands.recv()
+                if command == "close":
+                    root.quit()
+                    return
+                if command == "mode" and value != renderer.mode:
+                    renderer.close()
+                    renderer = PLOT_RENDERERS[value](figure, history, renderer.span)
+                elif command == "span":
+                    renderer.set_span(value)
+        except EOFError:
+            # The main process is gone
+            root.quit()
+            return
+        records = reader.read()
+        if len(records):
+            history.extend(records['intensity'], records['volume'],
+                           records['levels'] if history.channels else None, records['time'])
+            renderer.render(float(records['intensity'][-1]), float(records['volume'][-1]))
+        root.after(interval, tick)
+
+    root.after(interval, tick)
+    root.mainloop()
+    renderer.close()
+    del reader
+    ring.close()
+
+
+class RendererProcess:
+    """Runs the plot in its own process, fed through the engine's SharedTelemetryRing.
+
+    Agg rasterization then holds the renderer's GIL rather than the one the
+    audio callback needs. The child opens its own window; mode changes and
+    shutdown are sent over a pipe.
+    """
+    def __init__(self, ring, mode, max_history, target_fps, span=0):
+        context = multiprocessing.get_context("spawn")
+        self._commands, child_commands = context.Pipe()
+        self.process = context.Process(
+            target=run_renderer_process, name="PlotRenderer", daemon=True,
+            args=(ring.name, ring.capacity, ring.channels, mode, max_history, target_fps, span, child_commands)
+        )
+        self.mode = mode
+
+    def start(self):
+        self.process.start()
+        logger.info(f"Plot renderer running in process {self.process.pid}")
+        return self
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self._commands.send(("mode", mode))
+
+    def set_span(self, span):
+        self._commands.send(("span", span))
+
+    def close(self):
+        if self.process.is_alive():
+            with contextlib.suppress(OSError):
+                self._commands.send(("close", None))
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+        self._commands.close()
 
 
 class VolumeControlApp:
-    def __init__(self, root):
+    """Tk front end over VolumeEngine; with `playback` (a SessionPlayer) the plot shows a recording"""
+    def __init__(self, root, config=None, playback=None):
         self.root = root
         self.root.title("Voice Volume Controller")
         self.root.geometry("1000x800")
-        self.calibration = CalibrationManager()
         self.calibration_progress = tk.DoubleVar(value=0)
+        self.closed = False
         
         # Initialize configuration
-        self.config = Config()
+        self.config = config or Config()
         
-        # Initialize volume controller
+        # Initialize the processing engine (volume controller, filter, calibration)
         try:
-            self.volume_controller = VolumeController()
+            self.engine = VolumeEngine(
+                self.config,
+                on_error=lambda message: self.root.after(0, self._update_monitoring_state)
+            )
         except Exception as e:
             messagebox.showerror("Error", f"Failed to initialize volume controller: {str(e)}")
             self.root.destroy()
             return
+        self.calibration = self.engine.calibration
+        self.metrics = self.engine.metrics
+        self.metrics.add_collector(self._collect_metrics)
+        self.playback = playback
+        self.telemetry = (playback.ring if playback else self.engine.telemetry).reader()
             
-        # Initialize pygame mixer for audio feedback
-        try:
-            mixer.init()
-        except Exception as e:
-            logger.warning(f"Failed to initialize audio feedback: {e}")
-        
-        # Initialize volume filter
-        self.volume_filter = VolumeFilter()
-        
         # Variables
-        self.is_monitoring = False
-        self.is_calibrating = False
-        self.sensitivity = tk.DoubleVar(value=self.config.settings["sensitivity"])
-        self.current_volume = tk.DoubleVar(value=self.volume_controller.get_volume())
+        self.sensitivity = tk.DoubleVar(value=self.engine.sensitivity)
+        self.sensitivity.trace_add('write', self._on_sensitivity_changed)
+        self.config.subscribe("sensitivity", self._on_config_changed(self.sensitivity))
+        self.current_volume = tk.DoubleVar(value=self.engine.volume_controller.get_volume())
         self.current_intensity = tk.DoubleVar(value=0.0)
         self.visualization_mode = tk.StringVar(value=self.config.settings["visualization_mode"])
-        self.audio_feedback = tk.BooleanVar(value=self.config.settings["audio_feedback"])
-        self.data_queue = queue.Queue()
+        self.config.subscribe("visualization_mode",
+                              lambda mode: self.root.after(0, self._change_visualization, mode))
+        span = self.config.settings["history_span"]
+        self.history_span = tk.StringVar(value=span if span in HISTORY_SPANS else "Recent")
+        self.config.subscribe("history_span",
+                              lambda span: self.root.after(0, self._change_history_span, span))
         
         # Performance optimization variables
         self.update_interval = self.config.settings["update_interval"]
+        self.target_fps = self.config.settings["target_fps"]
         self.last_plot_update = 0
-        self.plot_update_interval = 250  # ms
+        self.plot_update_interval = 1000.0 / self.target_fps  # ms, widened when rendering overruns
+        self.plot_dirty = False
+        self.frame_due = None  # when the oldest unrendered samples should have been drawn (ms)
+        self.last_render_ms = 0.0
+        self.render_times = collections.deque(maxlen=240)  # ms timestamps of recent frames
+        self.max_queue_depth = 0
+        self.dropped_frames = 0
+        self.stats_panel = None
         
-        # Calibration variables
-        self.calibration_samples = []
-        self.calibration_min = self.config.settings["calibration"]["min"]
-        self.calibration_max = self.config.settings["calibration"]["max"]
-        
-        # History for plotting
-        self.intensity_history = []
-        self.volume_history = []
+        # History for plotting; the figure itself is created when the panel is first shown
         self.max_history = self.config.settings["max_history"]
+        self.history = HistoryBuffer(self.max_history,
+                                     self.engine.channel_count if self.engine.fusion and not playback else 0,
+                                     HistoryPyramid())
+        self.fig = None
+        self.renderer = None
+        # Out-of-process plotting needs the engine's shared ring, so not for playback
+        self.renderer_process = None
+        self.plot_out_of_process = (self.config.settings["renderer_process"] and playback is None)
         
         # Create GUI
         self._create_gui()
-        self._setup_plot()
         self._setup_shortcuts()
         
+        if self.config.settings["show_stats_panel"]:
+            self._toggle_stats_panel()
+        
+        if playback is not None:
+            self.root.title(f"Voice Volume Controller - playback of {playback.recording.path}")
+            playback.start()
+        
         # Start update loop
         self.root.after(self.update_interval, self._update_gui)
         
@@ -286,12 +4204,13 @@ class VolumeControlApp:
     def _toggle_calibration(self):
         """Start or stop simplified calibration process"""
         if not self.calibration.is_calibrating:
-            # Start the audio stream if it's not already running
-            if not hasattr(self, 'stream') or not self.stream.active:
-                self._start_monitoring()
-            
-            # Start calibration
-            self.calibration.start_calibration()
+            # Start calibration (opens the audio stream if it's not already running)
+            try:
+                self.engine.start_calibration()
+            except Exception as e:
+                logger.error(f"Failed to start audio stream: {e}")
+                messagebox.showerror("Error", f"Failed to start audio stream: {str(e)}")
+                return
             self.calibrate_button.configure(text="Cancel Calibration")
             self.calibration_status.configure(
                 text="Calibrating... Please wait while we measure ambient sound levels."
@@ -307,7 +4226,7 @@ class VolumeControlApp:
             )
         else:
             # Cancel calibration
-            self.calibration.is_calibrating = False
+            self.engine.cancel_calibration()
             self._reset_calibration_gui()
             
                 
@@ -323,7 +4242,7 @@ class VolumeControlApp:
             
             self.calibration_status.configure(
                 text=f"Calibrating... {remaining_time:.1f} seconds remaining\n"
-                    f"Samples collected: {len(self.calibration.samples)}"
+                    f"Samples collected: {self.calibration.sample_count}"
             )
         
             if progress < 100:
@@ -334,30 +4253,19 @@ class VolumeControlApp:
         if not self.calibration.is_calibrating:
             return
             
-        success, message = self.calibration.finish_calibration()
+        # Applies and saves the new thresholds on success
+        success, message = self.engine.finish_calibration()
         
         if success:
-            # Update thresholds
-            self.calibration_min = self.calibration.min_intensity
-            self.calibration_max = self.calibration.max_intensity
-            
             # Update GUI
             self.calibration_status.configure(
-                text=f"Calibrated: {self.calibration_min:.1f}dB - {self.calibration_max:.1f}dB"
+                text=f"Calibrated: {self.engine.calibration_min:.1f}dB - {self.engine.calibration_max:.1f}dB"
             )
             
-            # Save to config
-            self.config.settings["calibration"] = {
-                "min": self.calibration_min,
-                "max": self.calibration_max,
-                "noise_floor": self.calibration.noise_floor
-            }
-            self.config.save_config()
-            
             messagebox.showinfo("Calibration Complete", 
                               "Calibration successful!\n\n"
                               f"Noise floor: {self.calibration.noise_floor:.1f}dB\n"
-                              f"Dynamic range: {self.calibration_min:.1f}dB - {self.calibration_max:.1f}dB")
+                              f"Dynamic range: {self.engine.calibration_min:.1f}dB - {self.engine.calibration_max:.1f}dB")
         else:
             messagebox.showerror("Calibration Failed", message)
             
@@ -371,117 +4279,59 @@ class VolumeControlApp:
             text="Click 'Start Calibration' to detect ambient sound levels"
         )
         
-    def _calculate_volume_from_intensity(self, intensity):
-        """Calculate volume level with improved noise handling"""
-        if self.calibration.is_calibrating:
-            self.calibration.add_sample(intensity)
-            return self.current_volume.get()
-        
-        # Apply noise floor
-        if hasattr(self.calibration, 'noise_floor') and intensity <= self.calibration.noise_floor:
-            return 0.0
-        
-        # Calculate normalized volume
-        min_intensity = self.calibration_min
-        max_intensity = self.calibration_max
-        
-        if max_intensity <= min_intensity:
-            return 0.0
-            
-        # Apply non-linear mapping for better control
-        normalized = (intensity - min_intensity) / (max_intensity - min_intensity)
-        normalized = max(0.0, min(1.0, normalized))
-        
-        # Apply cubic mapping for more natural response
-        mapped = normalized ** 3
-        
-        # Apply sensitivity
-        return min(1.0, mapped * self.sensitivity.get())
     def _setup_shortcuts(self):
         self.root.bind('<space>', lambda e: self._toggle_monitoring())
-        self.root.bind('<c>', lambda e: self._start_calibration())
-        self.root.bind('<Escape>', lambda e: self.root.quit())
+        self.root.bind('<c>', lambda e: self._toggle_calibration())
+        self.root.bind('<Escape>', lambda e: self._quit())
+        self.root.protocol("WM_DELETE_WINDOW", self._quit)
         self.root.bind('<Up>', lambda e: self._adjust_sensitivity(0.1))
         self.root.bind('<Down>', lambda e: self._adjust_sensitivity(-0.1))
+        self.root.bind('<F2>', lambda e: self._toggle_stats_panel())
+        self.root.bind('<bracketleft>', lambda e: self._zoom_history(-1))
+        self.root.bind('<bracketright>', lambda e: self._zoom_history(1))
 
     def _adjust_sensitivity(self, delta):
         new_value = self.sensitivity.get() + delta
         self.sensitivity.set(max(0.1, min(2.0, new_value)))
-        self.config.settings["sensitivity"] = self.sensitivity.get()
-        self.config.save_config()
 
-    def _start_monitoring(self):
-        def audio_callback(indata, frames, time, status):
+    def _remote_command(self, command, value=None):
+        """Telemetry server command: run it on the Tk thread like the matching key or button"""
+        done = concurrent.futures.Future()
+
+        def run():
             try:
-                if status:
-                    logger.warning(f"Audio callback status: {status}")
-                
-                # Calculate intensity regardless of monitoring state
-                volume_norm = np.linalg.norm(indata) * 10
-                intensity = 20 * math.log10(volume_norm) if volume_norm > 0 else 0
-                
-                # Always process samples during calibration
-                if self.calibration.is_calibrating:
-                    self.calibration.add_sample(intensity)
-                    self.data_queue.put((intensity, self.current_volume.get()))
-                # Only process volume changes if monitoring
-                elif self.is_monitoring:
-                    new_volume = self._calculate_volume_from_intensity(intensity)
-                    
-                    # Apply smoothing filter
-                    smoothed_volume = self.volume_filter.smooth_volume(new_volume)
-                    
-                    try:
-                        self.volume_controller.set_volume(smoothed_volume)
-                    except Exception as e:
-                        logger.error(f"Failed to set volume: {e}")
-                        self._handle_volume_control_error()
-                    
-                    self.data_queue.put((intensity, smoothed_volume))
-                    
+                if command == "sensitivity":
+                    self._adjust_sensitivity(float(value) - self.sensitivity.get())
+                elif command in ("start", "stop"):
+                    if self.engine.is_monitoring != (command == "start"):
+                        self._toggle_monitoring()
+                elif command == "calibrate":
+                    if not self.calibration.is_calibrating:
+                        self._toggle_calibration()
+                elif command != "status":
+                    raise ValueError(f"Unknown command: {command}")
+                done.set_result(self.engine.status())
             except Exception as e:
-                logger.error(f"Audio callback error: {e}")
-                self._attempt_stream_recovery()
+                done.set_exception(e)
 
-        try:
-            # Create and start the stream
-            self.stream = sd.InputStream(
-                callback=audio_callback,
-                channels=1,
-                samplerate=44100,
-                blocksize=int(44100 * 0.1)  # 100ms blocks
-            )
-            self.stream.start()
-            logger.info("Audio monitoring started")
-        except Exception as e:
-            logger.error(f"Failed to start audio stream: {e}")
-            self.is_monitoring = False
-            self.toggle_button.configure(text="Start Monitoring")
-            messagebox.showerror("Error", f"Failed to start audio monitoring: {str(e)}")
+        self.root.after(0, run)
+        return done.result(timeout=10)
 
-    def _attempt_stream_recovery(self):
-        """Attempt to recover from stream errors"""
-        try:
-            if hasattr(self, 'stream'):
-                self.stream.stop()
-            time.sleep(1)
-            self._start_monitoring()
-            logger.info("Stream recovery successful")
-        except Exception as e:
-            logger.error(f"Stream recovery failed: {e}")
-            self.is_monitoring = False
-            self.root.after(0, self._update_monitoring_state)
+    def _on_sensitivity_changed(self, *args):
+        # The config store notifies the engine and saves in the background,
+        # so holding a key down never blocks on disk writes
+        self.config.set("sensitivity", self.sensitivity.get())
 
-    def _handle_volume_control_error(self):
-        """Handle volume control errors"""
-        try:
-            self.volume_controller = VolumeController()
-            logger.info("Volume controller reinitialized")
-        except Exception as e:
-            logger.error(f"Failed to reinitialize volume controller: {e}")
-            self.is_monitoring = False
-            self.root.after(0, self._update_monitoring_state)
-        
+    def _on_config_changed(self, variable):
+        """Subscriber that mirrors a setting into a Tk variable on the Tk thread"""
+        return lambda value: self.root.after(0, variable.set, value)
+
+    def _update_monitoring_state(self):
+        """Sync the monitoring button with the engine after it stopped on its own"""
+        if self.engine.is_monitoring:
+            self.toggle_button.configure(text="Stop Monitoring")
+        else:
+            self.toggle_button.configure(text="Start Monitoring")
 
     def _create_gui(self):
         # Main frame
@@ -526,152 +4376,419 @@ class VolumeControlApp:
         self.intensity_bar = ttk.Progressbar(intensity_frame, length=200, mode='determinate')
         self.intensity_bar.pack(side=tk.LEFT, padx=5)
         
+        # UI scheduler statistics
+        self.ui_stats_label = ttk.Label(metrics_frame, text="")
+        self.ui_stats_label.pack(fill=tk.X, padx=5, pady=2)
+        self.metrics_frame = metrics_frame
+        
         # Visualization frame
         viz_frame = ttk.LabelFrame(self.main_frame, text="Visualization", padding="10")
         viz_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Visualization mode selector
-        viz_modes = ["Line Graph", "Bar Graph", "Meter"]
+        viz_modes = list(PLOT_RENDERERS)
         viz_selector = ttk.OptionMenu(viz_frame, self.visualization_mode, 
                                     self.visualization_mode.get(), *viz_modes,
                                     command=self._change_visualization)
         viz_selector.pack(side=tk.TOP, padx=5, pady=5)
+        span_selector = ttk.OptionMenu(viz_frame, self.history_span,
+                                       self.history_span.get(), *HISTORY_SPANS,
+                                       command=self._change_history_span)
+        span_selector.pack(side=tk.TOP, padx=5, pady=5)
         
-        # Plot frame
+        # Plot frame; matplotlib is loaded when it is first mapped on screen
         self.plot_frame = ttk.Frame(viz_frame)
         self.plot_frame.pack(fill=tk.BOTH, expand=True)
+        self.plot_frame.bind('<Map>', lambda e: self._setup_plot())
 
     def _toggle_monitoring(self):
-        if not self.is_monitoring:
-            self.is_monitoring = True
+        if not self.engine.is_monitoring:
+            try:
+                self.engine.start_monitoring()
+            except Exception as e:
+                logger.error(f"Failed to start audio stream: {e}")
+                messagebox.showerror("Error", f"Failed to start audio monitoring: {str(e)}")
+                return
             self.toggle_button.configure(text="Stop Monitoring")
-            self._start_monitoring()
         else:
-            self.is_monitoring = False
+            self.engine.stop_monitoring()
             self.toggle_button.configure(text="Start Monitoring")
-
-    def _calculate_volume_from_intensity(self, intensity):
-        if self.is_calibrating:
-            self.calibration_samples.append(intensity)
-            return self.current_volume.get()
-        
-        min_intensity = self.calibration_min if self.calibration_min != 0 else 0
-        max_intensity = self.calibration_max if self.calibration_max != 100 else 100
-        
-        normalized = (intensity - min_intensity) / (max_intensity - min_intensity)
-        normalized *= self.sensitivity.get()
-        return min(max(normalized, 0), 1)
-
+            logger.info(f"UI stats: max queue depth {self.max_queue_depth}, "
+                        f"dropped frames {self.dropped_frames}, last render {self.last_render_ms:.1f} ms")
 
     def _setup_plot(self):
-        self.fig = Figure(figsize=(8, 4), dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        self._setup_line_plot()
-
-    def _setup_line_plot(self):
-        self.ax.clear()
-        self.intensity_line, = self.ax.plot([], [], label='Intensity', color='blue')
-        self.volume_line, = self.ax.plot([], [], label='Volume', color='red')
-        self.ax.set_ylim(-10, 100)
-        self.ax.set_xlabel('Time')
-        self.ax.set_ylabel('Level')
-        self.ax.legend()
-        self.ax.grid(True)
+        if self.fig is not None or self.renderer_process is not None:
+            return
+        if self.plot_out_of_process:
+            with startup_profiler.phase("renderer process start"):
+                self.renderer_process = RendererProcess(
+                    self.engine.telemetry, self.visualization_mode.get(), self.max_history, self.target_fps,
+                    HISTORY_SPANS[self.history_span.get()]
+                ).start()
+            ttk.Label(self.plot_frame, text="The plot is drawn in a separate window").pack(pady=20)
+            startup_profiler.report()
+            return
+        with startup_profiler.phase("plot setup"):
+            self.fig = mpl_figure.Figure(figsize=(8, 4), dpi=100)
+            self.canvas = backend_tkagg.FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            
+            self.renderer = PLOT_RENDERERS[self.visualization_mode.get()](
+                self.fig, self.history, HISTORY_SPANS[self.history_span.get()])
+            # Full canvas draws (resizes, mode changes) are the expensive path next to blitting
+            self.canvas.mpl_connect('draw_event', lambda e: self._count_canvas_draw())
+        startup_profiler.report()
 
     def _change_visualization(self, mode):
-        self._setup_plot()  # Reset plot for new visualization mode
+        if mode not in PLOT_RENDERERS:
+            return
+        self.visualization_mode.set(mode)
+        self.config.set("visualization_mode", mode)
+        if self.renderer_process is not None:
+            if mode != self.renderer_process.mode:
+                self.renderer_process.set_mode(mode)
+            return
+        # Artists and the cached background are only rebuilt when the mode actually changes
+        if self.renderer is None or mode == self.renderer.mode:
+            return
+        self.renderer.close()
+        self.renderer = PLOT_RENDERERS[mode](self.fig, self.history, self.renderer.span)
+
+    def _change_history_span(self, name):
+        if name not in HISTORY_SPANS:
+            return
+        self.history_span.set(name)
+        self.config.set("history_span", name)
+        span = HISTORY_SPANS[name]
+        if self.renderer_process is not None:
+            self.renderer_process.set_span(span)
+        elif self.renderer is not None and span != self.renderer.span:
+            self.renderer.set_span(span)
+            self.plot_dirty = True
+
+    def _zoom_history(self, step):
+        """Step to the next shorter (-1) or longer (+1) history span"""
+        names = list(HISTORY_SPANS)
+        index = names.index(self.history_span.get()) + step
+        if 0 <= index < len(names):
+            self._change_history_span(names[index])
 
     def _update_plot(self):
-        mode = self.visualization_mode.get()
+        if self.renderer is not None:
+            self.renderer.render(self.current_intensity.get(), self.current_volume.get())
+
+    def _count_canvas_draw(self):
+        if self.metrics.enabled:
+            self.metrics.increment("canvas_draws")
+
+    def _collect_metrics(self):
+        return {
+            "queue_depth_max": self.max_queue_depth,
+            "dropped_frames": self.dropped_frames,
+            "gui_dropped_samples": self.telemetry.dropped,
+        }
+
+    def _toggle_stats_panel(self):
+        """Show or hide the performance panel; showing it turns instrumentation on"""
+        if self.stats_panel is not None:
+            self.stats_panel.destroy()
+            self.stats_panel = None
+            return
+        self.metrics.enabled = True
+        self.stats_panel = ttk.Label(self.metrics_frame, text="", font=("TkFixedFont", 9),
+                                     justify=tk.LEFT)
+        self.stats_panel.pack(fill=tk.X, padx=5, pady=2)
+        self._refresh_stats_panel()
+
+    def _refresh_stats_panel(self):
+        if self.stats_panel is None:
+            return
+        self.stats_panel.configure(text=self.metrics.summary())
+        self.root.after(1000, self._refresh_stats_panel)
+
+    def _update_gui(self):
+        """Drain new telemetry in one batch and render at most one frame per tick"""
+        timed = self.metrics.enabled
+        if timed:
+            start = time.perf_counter()
+        records = self.telemetry.read()
         
-        if mode == "Line Graph":
-            if len(self.intensity_history) > self.max_history:
-                self.intensity_history = self.intensity_history[-self.max_history:]
-                self.volume_history = self.volume_history[-self.max_history:]
-                
-            x = range(len(self.intensity_history))
-            self.intensity_line.set_data(x, self.intensity_history)
-            self.volume_line.set_data(x, [v * 100 for v in self.volume_history])
-            self.ax.set_xlim(0, max(self.max_history, len(x)))
-        
-        elif mode == "Bar Graph":
-            self.ax.clear()
-            self.ax.bar(['Intensity', 'Volume'], 
-                       [self.current_intensity.get(), self.current_volume.get() * 100],
-                       color=['blue', 'red'])
-            self.ax.set_ylim(0, 100)
-        
-        elif mode == "Meter":
-            self.ax.clear()
-            intensity = self.current_intensity.get()
-            volume = self.current_volume.get() * 100
+        if timed:
+            self.metrics.set_gauge("queue_depth", len(records))
+        if len(records):
+            self.max_queue_depth = max(self.max_queue_depth, len(records))
+            self.history.extend(records['intensity'], records['volume'],
+                                records['levels'] if self.history.channels else None, records['time'])
             
-            # Create VU meter style visualization
-            self.ax.add_patch(plt.Rectangle((0, 0), intensity, 0.3, color='blue', alpha=0.6))
-            self.ax.add_patch(plt.Rectangle((0, 0.7), volume, 0.3, color='red', alpha=0.6))
+            intensity = float(records['intensity'][-1])
+            volume = float(records['volume'][-1])
+            self.current_intensity.set(intensity)
+            self.current_volume.set(volume)
             
-            self.ax.set_xlim(0, 100)
-            self.ax.set_ylim(0, 1)
-            self.ax.set_xticks(range(0, 101, 10))
-            self.ax.set_yticks([0.15, 0.85])
-            self.ax.set_yticklabels(['Intensity', 'Volume'])
+            # Update progress bars
+            self.volume_bar['value'] = volume * 100
+            self.intensity_bar['value'] = min(100, intensity)
+            self.plot_dirty = True
+        if timed:
+            self.metrics.observe("gui_drain", time.perf_counter() - start)
         
-        self.canvas.draw()
+        now = time.perf_counter() * 1000
+        next_frame = self.last_plot_update + self.plot_update_interval
+        if len(records) and self.frame_due is None:
+            # Records are stamped with perf_counter, so the oldest one says how long samples waited
+            arrived = float(records['time'][0]) * 1000
+            self.frame_due = min(now, max(arrived, self.last_plot_update + 1000.0 / self.target_fps))
+        # Tk timers have 1 ms granularity, so a frame due within the next millisecond renders now
+        if self.plot_dirty and now >= next_frame - 1:
+            self._render_frame(now, len(records))
+            next_frame = self.last_plot_update + self.plot_update_interval
+            now = time.perf_counter() * 1000
+        
+        # Poll at least once per frame interval, so target_fps above 1000 / update_interval is reachable
+        delay = min(self.update_interval, next_frame - now if next_frame > now else self.plot_update_interval)
+        self.root.after(max(1, int(delay)), self._update_gui)
 
-    def _update_gui(self):
-        try:
-            while True:
-                intensity, volume = self.data_queue.get_nowait()
-                self.current_intensity.set(intensity)
-                self.current_volume.set(volume)
-                
-                self.intensity_history.append(intensity)
-                self.volume_history.append(volume)
-                
-                # Update progress bars
-                self.volume_bar['value'] = volume * 100
-                self.intensity_bar['value'] = min(100, intensity)
-                
-                self._update_plot()
-                
-        except queue.Empty:
-            pass
+    def _render_frame(self, now, queue_depth):
+        """Render one frame and adapt the frame interval to the measured render time"""
+        target_interval = 1000.0 / self.target_fps
+        # Only frame slots that passed while samples were waiting count as dropped, not idle time
+        if self.frame_due is not None:
+            self.dropped_frames += int(max(0.0, now - self.frame_due - 1) / target_interval)
+            self.frame_due = None
+        
+        self._update_plot()
+        self.last_render_ms = time.perf_counter() * 1000 - now
+        if self.metrics.enabled:
+            self.metrics.observe("gui_render", self.last_render_ms / 1000)
+        self.last_plot_update = now
+        self.plot_dirty = False
+        self.render_times.append(now)
+        while now - self.render_times[0] > 1000:
+            self.render_times.popleft()
+        
+        # Keep rendering under half of the frame interval: back off when it overruns,
+        # then creep back towards the target frame rate once it fits again
+        if self.last_render_ms > self.plot_update_interval / 2:
+            self.plot_update_interval = min(1000.0, self.last_render_ms * 2)
+        else:
+            self.plot_update_interval = max(target_interval, self.plot_update_interval * 0.9)
         
-        self.root.after(100, self._update_gui)
+        self.ui_stats_label.configure(
+            text=f"Queue depth: {queue_depth} (max {self.max_queue_depth})  |  "
+                 f"Render: {self.last_render_ms:.1f} ms, {len(self.render_times)} fps "
+                 f"(cap {1000.0 / self.plot_update_interval:.0f})  |  "
+                 f"Dropped frames: {self.dropped_frames}  |  Dropped samples: {self.telemetry.dropped}  |  "
+                 f"Capture-to-volume latency: {self.engine.volume_actuator.last_latency * 1000:.0f} ms  |  "
+                 f"Writes avoided: {self.engine.write_stats()['writes_avoided_percent']:.0f}%"
+        )
 
     def _save_current_state(self):
         """Save current state before closing"""
-        self.config.settings.update({
+        self.config.update({
             "sensitivity": self.sensitivity.get(),
             "visualization_mode": self.visualization_mode.get(),
-            "audio_feedback": self.audio_feedback.get(),
-            "calibration": {
-                "min": self.calibration_min,
-                "max": self.calibration_max
-            }
+            "history_span": self.history_span.get()
         })
-        self.config.save_config()
+        self.config.flush()
         logger.info("Application state saved")
 
-    def __del__(self):
-        """Cleanup on destruction"""
+    def _quit(self):
+        self.close()
+        self.root.quit()
+
+    def close(self):
+        """Save state and shut the engine down; safe to call more than once"""
+        if self.closed or not hasattr(self, 'engine'):
+            return
+        self.closed = True
+        if self.playback is not None:
+            self.playback.stop()
+        if self.renderer_process is not None:
+            self.renderer_process.close()
         self._save_current_state()
-        if hasattr(self, 'stream'):
-            self.stream.stop()
+        self.engine.close()
         logger.info("Application shutdown complete")
 
-def main():
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Voice Volume Controller")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="log per-phase import and initialisation times")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the capture and volume loop without the GUI")
+    parser.add_argument("--config", default="volume_control_config.json",
+                        help="configuration file (default: %(default)s)")
+    parser.add_argument("--sensitivity", type=float, help="volume sensitivity (0.1 to 2.0)")
+    parser.add_argument("--preset", choices=list(CAPTURE_PRESETS),
+                        help="capture preset (samplerate, blocksize, hop size, decimation)")
+    parser.add_argument("--blocksize", type=int, help="audio frames per processing block")
+    parser.add_argument("--capture-dtype", choices=["float32", "int16"],
+                        help="sample format; int16 reads the raw driver buffer without conversion")
+    parser.add_argument("--calibration-profile", metavar="PATH",
+                        help="JSON file with calibration min/max/noise_floor, or a saved config")
+    parser.add_argument("--input", action="append", metavar="DEVICE[@CH,...]",
+                        help="capture from DEVICE (index, name or 'default'), optionally only the "
+                             "given 1-based channels; repeat for several devices")
+    parser.add_argument("--curve", choices=MAPPING_CURVES,
+                        help="intensity to volume curve (spline points come from the config)")
+    parser.add_argument("--fusion", choices=FUSION_POLICIES,
+                        help="how several channels drive the volume (default: max)")
+    parser.add_argument("--target", action="append", metavar="APP",
+                        help="drive only this application's streams (name or PID) instead of the "
+                             "master volume; repeat for several (Linux, PulseAudio/PipeWire)")
+    parser.add_argument("--list-devices", action="store_true", help="list audio devices and exit")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="enable instrumentation and export it to PATH periodically "
+                             "(JSON for *.json, Prometheus text otherwise)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record intensity, volume and actuation latency to a session file")
+    parser.add_argument("--play-session", metavar="PATH",
+                        help="show a recorded session in the plot instead of live telemetry")
+    parser.add_argument("--playback-speed", metavar="FACTOR", type=float, default=1.0,
+                        help="session playback speed (default: %(default)s)")
+    parser.add_argument("--renderer-process", action="store_true",
+                        help="draw the plot in a separate process and window")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="stream telemetry and accept commands on unix:PATH or [HOST:]PORT (loopback only)")
+    parser.add_argument("--replay", metavar="SOURCE",
+                        help="process a WAV file or synthetic:{tone,noise,speech} offline, "
+                             "as fast as possible, with an in-memory mixer")
+    parser.add_argument("--replay-calibrate", metavar="SECONDS", type=float, default=0.0,
+                        help="calibrate on the first SECONDS of the replayed audio")
+    return parser.parse_args(argv)
+
+
+def parse_input(spec):
+    """Parse a --input value such as "2@1,2", "USB Mic" or "default@2" """
+    device, _, channels = spec.partition("@")
+    if device == "default":
+        device = None
+    elif device.isdigit():
+        device = int(device)
+    channels = [int(channel) for channel in channels.split(",")] if channels else [1]
+    return {"device": device, "channels": channels}
+
+
+def load_config(args):
+    """Build the Config for a run, applying command line overrides"""
+    config = Config(args.config)
+    if args.sensitivity is not None:
+        config.set("sensitivity", args.sensitivity, save=False)
+    if args.preset is not None:
+        config.set("capture_preset", args.preset, save=False)
+    if args.blocksize is not None:
+        config.set("capture", {**config.settings["capture"], "blocksize": args.blocksize}, save=False)
+    if args.capture_dtype is not None:
+        config.set("capture_dtype", args.capture_dtype, save=False)
+    if args.input:
+        config.set("inputs", [parse_input(spec) for spec in args.input], save=False)
+    if args.target:
+        config.set("volume_targets", [int(target) if target.isdigit() else target for target in args.target],
+                   save=False)
+    if args.curve is not None:
+        config.set("mapping", {**config.settings["mapping"], "curve": args.curve}, save=False)
+    if args.fusion is not None:
+        config.set("fusion", {**config.settings["fusion"], "policy": args.fusion}, save=False)
+    if args.metrics:
+        config.update({"metrics_enabled": True, "metrics_export_path": args.metrics}, save=False)
+    if args.renderer_process:
+        config.set("renderer_process", True, save=False)
+    if args.serve:
+        config.set("telemetry_server", args.serve, save=False)
+    if args.record:
+        config.set("session_record_path", args.record, save=False)
+    if args.calibration_profile:
+        with open(args.calibration_profile, 'r') as f:
+            profile = json.load(f)
+        config.set("calibration", profile.get("calibration", profile), save=False)
+    return config
+
+
+def start_telemetry_server(config, engine, controls):
+    """Start the configured telemetry server over `engine`; returns None if none is configured"""
+    settings = config.settings
+    if not settings["telemetry_server"]:
+        return None
+    server = TelemetryServer(engine.telemetry, settings["telemetry_server"], controls,
+                             settings["telemetry_server_interval"],
+                             settings["telemetry_client_buffer"]).start()
+    engine.metrics.add_collector(server.stats)
+    return server
+
+
+def run_headless(config):
+    """Run the volume control loop without Tk or matplotlib until interrupted"""
+    failure = []
+    stop_event = threading.Event()
+
+    def on_error(message):
+        failure.append(message)
+        stop_event.set()
+
+    with startup_profiler.phase("engine init"):
+        engine = VolumeEngine(config, on_error=on_error)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop_event.set())
+
+    config.start_watching()
+    server = None
+    try:
+        server = start_telemetry_server(config, engine, engine.handle_command)
+        with startup_profiler.phase("audio stream start"):
+            engine.start_monitoring()
+        startup_profiler.report()
+        logger.info("Headless monitoring started (Ctrl+C to stop)")
+        stop_event.wait()
+    finally:
+        if server is not None:
+            server.stop()
+        engine.stop_monitoring()
+        engine.close()
+        config.close()
+        logger.info("Headless monitoring stopped")
+
+    if failure:
+        logger.error(failure[0])
+        return 1
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    startup_profiler.enabled = args.profile_startup
+    startup_profiler.record("import main", _import_finished - _import_started)
     try:
-        root = tk.Tk()
-        app = VolumeControlApp(root)
+        with startup_profiler.phase("config"):
+            config = load_config(args)
+        if args.list_devices:
+            print(sd.query_devices())
+            return 0
+        if args.replay:
+            return run_replay(config, args.replay, args.replay_calibrate)
+        if args.headless:
+            return run_headless(config)
+        
+        with startup_profiler.phase("tk root"):
+            root = tk.Tk()
+        playback = None
+        if args.play_session:
+            playback = SessionPlayer(load_session(args.play_session), args.playback_speed)
+        with startup_profiler.phase("app init"):
+            app = VolumeControlApp(root, config, playback)
+        server = None
+        if hasattr(app, "engine"):
+            server = start_telemetry_server(config, app.engine, app._remote_command)
+        config.start_watching()
         root.mainloop()
+        if server is not None:
+            server.stop()
+        app.close()
+        config.close()
     except Exception as e:
         logger.critical(f"Application crashed: {e}")
         raise
 
+_import_finished = time.perf_counter()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Importing main sets up logging; keep the tests from writing volume_control.log into the checkout
+os.environ["VOLUME_CONTROL_LOG"] = ""
+
+# main.py and benchmark.py live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
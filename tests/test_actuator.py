@@ -0,0 +1,59 @@
+"""VolumeActuator write pacing and recovery from mixer failures"""
+import time
+
+from main import Config, MemoryVolumeController, VolumeActuator, VolumeEngine
+
+
+class BrokenController(MemoryVolumeController):
+    def set_volume(self, volume_level):
+        self.writes += 1
+        raise OSError("mixer gone")
+
+
+def publish_for(actuator, seconds, interval=0.005):
+    end = time.perf_counter() + seconds
+    published = 0
+    while time.perf_counter() < end:
+        actuator.publish(published / 1000)
+        published += 1
+        time.sleep(interval)
+    return published
+
+
+def test_writes_are_rate_limited_and_the_newest_target_wins():
+    controller = MemoryVolumeController()
+    actuator = VolumeActuator(controller, max_write_rate=20.0)
+    actuator.start()
+    try:
+        published = publish_for(actuator, 0.5)
+        time.sleep(0.1)
+    finally:
+        actuator.stop()
+    assert controller.writes <= 0.5 * 20 + 2
+    assert controller.level == (published - 1) / 1000
+
+
+def test_failing_writes_back_off():
+    controller = BrokenController()
+    errors = []
+    actuator = VolumeActuator(controller, max_write_rate=100.0, on_error=errors.append)
+    actuator.start()
+    try:
+        published = publish_for(actuator, 0.6)
+    finally:
+        actuator.stop()
+    # 50 ms doubling per failure: attempts at roughly 0, 0.1, 0.3 s and 0.7 s
+    assert published > 50
+    assert controller.writes <= 4
+    assert len(errors) == controller.writes == actuator.stats()["write_failures"]
+
+
+def test_controller_rebuilds_are_rate_limited(tmp_path):
+    controller = MemoryVolumeController()
+    engine = VolumeEngine(Config(str(tmp_path / "config.json")), volume_controller=controller)
+    try:
+        engine.last_controller_rebuild = time.monotonic()
+        engine._handle_volume_control_error()
+        assert engine.volume_controller is controller
+    finally:
+        engine.close()
@@ -0,0 +1,88 @@
+"""Config type coercion, load fallbacks and subscriptions"""
+import json
+import math
+
+import pytest
+
+from main import Config
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = Config(str(tmp_path / "config.json"), save_delay=0.01)
+    yield config
+    config.close()
+
+
+def test_integer_settings_take_whole_floats_as_int(config):
+    value = config.coerce("max_history", 250.0)
+    assert value == 250 and isinstance(value, int)
+
+
+@pytest.mark.parametrize("value", [2.5, math.inf, math.nan])
+def test_integer_settings_reject_fractional_floats(config, value):
+    with pytest.raises(TypeError):
+        config.coerce("max_history", value)
+
+
+def test_float_settings_take_ints_as_float(config):
+    value = config.coerce("sensitivity", 1)
+    assert value == 1.0 and isinstance(value, float)
+
+
+def test_ranges_are_clamped(config):
+    assert config.coerce("sensitivity", 5.0) == 2.0
+    assert config.coerce("sensitivity", 0.0) == 0.1
+
+
+def test_bools_are_not_numbers(config):
+    with pytest.raises(TypeError):
+        config.coerce("max_history", True)
+    with pytest.raises(TypeError):
+        config.coerce("show_stats_panel", 1)
+
+
+def test_optional_settings_accept_none_or_their_type(config):
+    assert config.coerce("telemetry_server", None) is None
+    assert config.coerce("telemetry_server", "unix:/tmp/x.sock") == "unix:/tmp/x.sock"
+    with pytest.raises(TypeError):
+        config.coerce("telemetry_server", 8080)
+
+
+def test_partial_sections_are_completed_from_defaults(config):
+    calibration = config.coerce("calibration", {"min": 12.0})
+    assert calibration["min"] == 12.0
+    assert set(calibration) == set(config.defaults["calibration"])
+
+
+def test_unknown_keys_pass_through(config):
+    assert config.coerce("not_a_setting", [1, 2]) == [1, 2]
+
+
+def test_invalid_values_on_disk_fall_back_to_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"max_history": 2.5, "update_interval": 50.0, "sensitivity": "high"}))
+    config = Config(str(path))
+    try:
+        assert config.settings["max_history"] == config.defaults["max_history"]
+        assert config.settings["update_interval"] == 50
+        assert config.settings["sensitivity"] == config.defaults["sensitivity"]
+    finally:
+        config.close()
+
+
+def test_update_notifies_only_changed_keys_and_saves(config):
+    seen = []
+    config.subscribe("max_history", seen.append)
+    config.set("max_history", 300)
+    config.set("max_history", 300)
+    config.close()
+    assert seen == [300]
+    with open(config.config_file) as f:
+        assert json.load(f)["max_history"] == 300
+
+
+def test_invalid_update_leaves_settings_unchanged(config):
+    with pytest.raises(TypeError):
+        config.update({"max_history": 300, "target_fps": 12.5})
+    assert config.settings["max_history"] == config.defaults["max_history"]
@@ -0,0 +1,100 @@
+"""Plot history: the flat HistoryBuffer and the multi-resolution HistoryPyramid"""
+import math
+
+import numpy as np
+import pytest
+
+from main import HistoryBuffer, HistoryPyramid
+
+
+def test_history_buffer_views_are_the_newest_samples_oldest_first():
+    history = HistoryBuffer(4)
+    for i in range(6):
+        history.append(float(i), i / 10)
+    x, intensity, volume = history.views()
+    assert intensity.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert volume.tolist() == pytest.approx([20.0, 30.0, 40.0, 50.0])
+    assert x.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert len(history) == 4
+
+
+def test_history_buffer_extend_matches_append():
+    appended, extended = HistoryBuffer(5, channels=2), HistoryBuffer(5, channels=2)
+    levels = np.arange(14.0).reshape(7, 2)
+    for i in range(7):
+        appended.append(float(i), 0.1, levels[i])
+    extended.extend(np.arange(3.0), [0.1] * 3, levels[:3])
+    extended.extend(np.arange(3.0, 7.0), [0.1] * 4, levels[3:])
+    for a, b in zip(appended.views(), extended.views()):
+        assert a.tolist() == b.tolist()
+    assert appended.level_views().tolist() == extended.level_views().tolist()
+
+
+def test_history_buffer_feeds_the_pyramid_when_given_times():
+    pyramid = HistoryPyramid((1.0,), slots=8)
+    history = HistoryBuffer(4, pyramid=pyramid)
+    history.extend([10.0, 20.0], [0.5, 0.5], times=[0.1, 0.2])
+    history.extend([30.0], [0.5])
+    assert pyramid.latest == 0.2
+    _, mean, _, _ = pyramid.query(1.0, 10)
+    assert mean[:, 0].tolist() == [15.0]
+
+
+def brute_force(times, values, resolution, since):
+    """{bucket id: (mean, low, high)} over samples in buckets at or after `since`"""
+    ids = np.floor(times / resolution).astype(np.int64)
+    buckets = {}
+    for bucket in np.unique(ids[ids >= math.floor(since / resolution)]):
+        selected = values[ids == bucket]
+        buckets[int(bucket)] = (selected.mean(axis=0), selected.min(axis=0), selected.max(axis=0))
+    return buckets
+
+
+@pytest.mark.parametrize("span", [30, 600, 3600])
+def test_pyramid_query_matches_brute_force(span):
+    rng = np.random.default_rng(span)
+    times = np.cumsum(rng.uniform(0.05, 0.15, 40000))  # about 4000 s at 10 blocks/s
+    intensities = rng.uniform(20, 80, len(times))
+    volumes = rng.uniform(0, 1, len(times))
+    pyramid = HistoryPyramid(slots=256)
+    start = 0
+    while start < len(times):
+        end = start + int(rng.integers(1, 40))
+        pyramid.extend(times[start:end], intensities[start:end], volumes[start:end])
+        start = end
+
+    seconds_ago, mean, low, high = pyramid.query(span, 200)
+    assert len(seconds_ago) <= 200 + 2
+    resolution = pyramid.resolutions[pyramid.level_for(span, 200)]
+    assert span / resolution <= 200
+    expected = brute_force(times, np.column_stack((intensities, volumes * 100)), resolution, times[-1] - span)
+    ids = np.round((seconds_ago + times[-1]) / resolution - 0.5).astype(np.int64)
+    assert ids.tolist() == sorted(expected)
+    for i, bucket in enumerate(ids.tolist()):
+        expected_mean, expected_low, expected_high = expected[bucket]
+        np.testing.assert_allclose(mean[i], expected_mean)
+        np.testing.assert_allclose(low[i], expected_low)
+        np.testing.assert_allclose(high[i], expected_high)
+    # Bucket midpoints, so the newest may lie up to half a bucket after the newest sample
+    assert (seconds_ago < resolution / 2).all() and (np.diff(seconds_ago) > 0).all()
+
+
+def test_pyramid_memory_is_fixed():
+    pyramid = HistoryPyramid(slots=64)
+    size = pyramid.nbytes()
+    times = np.arange(0, 100000, 0.1)
+    pyramid.extend(times, np.ones(len(times)), np.ones(len(times)))
+    assert pyramid.nbytes() == size
+    assert all(size == 64 for size in pyramid.sizes)
+
+
+def test_pyramid_answers_long_spans_from_coarse_levels():
+    pyramid = HistoryPyramid(slots=64)
+    times = np.arange(0, 30000, 0.1)
+    pyramid.extend(times, np.full(len(times), 50.0), np.full(len(times), 0.5))
+    assert pyramid.level_for(15, 64) == 0
+    assert pyramid.level_for(60, 64) == 1
+    assert pyramid.resolutions[pyramid.level_for(28800, 64)] >= 28800 / 64
+    seconds_ago, mean, _, _ = pyramid.query(28800, 64)
+    assert 0 < len(seconds_ago) <= 66
+    np.testing.assert_allclose(mean, [[50.0, 50.0]] * len(mean))
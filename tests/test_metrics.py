@@ -0,0 +1,60 @@
+"""Metrics histograms, counters and per-writer shards"""
+import threading
+
+import numpy as np
+
+from main import Config, LatencyHistogram, MemoryVolumeController, Metrics, VolumeEngine
+
+
+def test_histogram_merge_adds_observations():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for seconds in (30e-6, 2e-3):
+        first.observe(seconds)
+    second.observe(0.5)
+    first.merge(second)
+    assert first.count == 3
+    assert first.max == 0.5
+    assert first.snapshot()["sum"] == 30e-6 + 2e-3 + 0.5
+    assert sum(first.counts) == 3
+
+
+def test_snapshot_merges_shards():
+    metrics = Metrics(enabled=True)
+    shards = [metrics.add_shard(), metrics.add_shard()]
+    metrics.observe("callback", 1e-3)
+    metrics.increment("xruns")
+    for shard in shards:
+        shard.observe("callback", 2e-3)
+        shard.increment("xruns", 2)
+    snapshot = metrics.snapshot()
+    assert snapshot["histograms"]["callback"]["count"] == 3
+    assert snapshot["histograms"]["callback"]["max"] == 2e-3
+    assert snapshot["counters"]["xruns"] == 5
+    # Merging happens on a copy; the writers' own metrics are untouched
+    assert metrics.histograms["callback"].count == 1
+
+
+def test_concurrent_inputs_record_every_block(tmp_path):
+    config = Config(str(tmp_path / "config.json"))
+    config.settings.update(metrics_enabled=True,
+                           inputs=[{"device": 0, "channels": [1]}, {"device": 1, "channels": [1]}])
+    engine = VolumeEngine(config, volume_controller=MemoryVolumeController())
+    blocks = 2000
+    block = np.full((engine.blocksize, 1), 0.01, dtype=np.float32)
+
+    def stream(input_index):
+        for _ in range(blocks):
+            engine._audio_callback(block, engine.blocksize, None, None, input_index)
+
+    try:
+        threads = [threading.Thread(target=stream, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        histograms = engine.metrics.snapshot()["histograms"]
+        assert histograms["callback"]["count"] == 2 * blocks
+        assert histograms["analyze"]["count"] == blocks  # only the first input drives the pipeline
+        assert engine.inputs[0]["metrics"] is not engine.inputs[1]["metrics"]
+    finally:
+        engine.close()
@@ -0,0 +1,195 @@
+"""Processing stages without a microphone, Tk or mixer: analysis, calibration, smoothing, deadband, replay"""
+import math
+import random
+import statistics
+import wave
+
+import numpy as np
+import pytest
+
+from main import (CAPTURE_PRESETS, CalibrationManager, Config, IntensityAnalyzer, P2Quantile,
+                  RawIntensityAnalyzer, ReplaySession, RunningMedianSmoother, WriteDeadband,
+                  capture_settings, run_replay, synthetic_signal, to_int16)
+
+
+@pytest.mark.parametrize("p", [0.1, 0.25, 0.5, 0.9])
+def test_p2_quantile_tracks_the_exact_quantile(p):
+    rng = random.Random(1)
+    samples = [rng.gauss(50, 10) for _ in range(20000)]
+    estimator = P2Quantile(p)
+    for x in samples:
+        estimator.add(x)
+    exact = float(np.quantile(samples, p))
+    assert estimator.value() == pytest.approx(exact, abs=0.5)
+
+
+def test_p2_quantile_is_exact_for_the_first_five_samples():
+    estimator = P2Quantile(0.5)
+    for x in (5.0, 1.0, 4.0):
+        estimator.add(x)
+    assert estimator.value() == 4.0
+    assert P2Quantile(0.5).value() == 0.0
+
+
+def test_calibration_thresholds_come_from_the_quantiles():
+    calibration = CalibrationManager()
+    calibration.start_calibration()
+    rng = random.Random(2)
+    samples = [rng.uniform(20, 80) for _ in range(5000)]
+    for x in samples:
+        calibration.add_sample(x)
+    success, _ = calibration.finish_calibration()
+    assert success
+    assert calibration.min_intensity == pytest.approx(np.quantile(samples, 0.2), abs=1.0)
+    assert calibration.max_intensity == pytest.approx(np.quantile(samples, 0.9), abs=1.0)
+    assert calibration.noise_floor == pytest.approx(np.quantile(samples, 0.1), abs=1.0)
+
+
+def test_calibration_needs_enough_samples():
+    calibration = CalibrationManager()
+    calibration.start_calibration()
+    for x in range(10):
+        calibration.add_sample(float(x))
+    success, _ = calibration.finish_calibration()
+    assert not success
+    assert not calibration.is_calibrating
+
+
+def test_deadband_drops_small_steps():
+    deadband = WriteDeadband(deadband=0.05, hysteresis=0.0)
+    assert deadband.accept(0.5)
+    assert not deadband.accept(0.52)
+    assert deadband.accept(0.56)
+    assert (deadband.passed, deadband.suppressed) == (2, 1)
+
+
+def test_deadband_needs_more_to_reverse_direction():
+    deadband = WriteDeadband(deadband=0.05, hysteresis=0.03)
+    assert deadband.accept(0.5)
+    assert deadband.accept(0.56)
+    assert not deadband.accept(0.5)  # reversal: 0.06 < 0.05 + 0.03
+    assert deadband.accept(0.47)
+    assert deadband.accept(0.41)  # same direction again: the plain deadband is enough
+
+
+def test_deadband_always_passes_the_ends():
+    deadband = WriteDeadband(deadband=0.05)
+    assert deadband.accept(0.99)
+    assert deadband.accept(1.0)
+    assert not deadband.accept(1.0)
+    assert deadband.accept(0.01)
+    assert deadband.accept(0.0)
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 50])
+def test_running_median_matches_statistics_median(window):
+    smoother = RunningMedianSmoother(window)
+    rng = random.Random(window)
+    values = [rng.random() for _ in range(500)]
+    for i, value in enumerate(values):
+        assert smoother.update(value) == pytest.approx(statistics.median(values[max(0, i - window + 1):i + 1]))
+    assert smoother.low_size + smoother.high_size == window
+
+
+@pytest.mark.parametrize("stream", ["rising", "falling", "repeated"])
+def test_running_median_heaps_stay_bounded(stream):
+    # Monotonic input buries expired samples below the heap tops, where lazy deletion never reaches them
+    window = 16
+    values = {"rising": list(range(2000)), "falling": list(range(2000, 0, -1)),
+              "repeated": [i % 3 for i in range(2000)]}[stream]
+    smoother = RunningMedianSmoother(window)
+    for i, value in enumerate(values):
+        assert smoother.update(value) == statistics.median(values[max(0, i - window + 1):i + 1])
+        assert len(smoother.low) + len(smoother.high) <= 2 * window
+        assert len(smoother.delayed) <= window
+
+
+def test_hop_intensity_is_the_energy_mean_of_the_windows():
+    block = np.random.default_rng(3).standard_normal((480, 1)).astype(np.float32) * 0.05
+    block[200:240] *= 20  # one loud burst must not set the whole block's level
+    analyzer = IntensityAnalyzer(hop_size=120)
+    windows = np.lib.stride_tricks.sliding_window_view(block[:, 0].astype(np.float64), 240)[::120]
+    expected = 10 * math.log10(analyzer.scale * float(np.mean((windows ** 2).mean(axis=1))))
+    loudest = 10 * math.log10(analyzer.scale * float((windows ** 2).mean(axis=1).max()))
+    assert analyzer.analyze(block) == pytest.approx(expected, abs=1e-3)
+    assert analyzer.analyze(block) < loudest - 1
+
+
+@pytest.mark.parametrize("preset", list(CAPTURE_PRESETS))
+@pytest.mark.parametrize("channels", [1, 2])
+def test_raw_int16_path_matches_float_path(preset, channels):
+    settings = CAPTURE_PRESETS[preset]
+    raw = to_int16(np.random.default_rng(4).standard_normal((settings["blocksize"], channels)) * 0.05)
+    samples = raw.astype(np.float32) / 32768
+    float_analyzer = IntensityAnalyzer(settings["hop_size"], settings["decimation"])
+    raw_analyzer = RawIntensityAnalyzer(settings["hop_size"], settings["decimation"])
+    assert raw_analyzer.analyze(raw) == pytest.approx(float_analyzer.analyze(samples), abs=1e-3)
+    assert raw_analyzer.peak_db == pytest.approx(float_analyzer.peak_db, abs=1e-3)
+    np.testing.assert_allclose(raw_analyzer.analyze_channels(raw), float_analyzer.analyze_channels(samples),
+                               atol=1e-3)
+
+
+def test_silence_is_zero_db():
+    assert IntensityAnalyzer().analyze(np.zeros((100, 1), dtype=np.float32)) == 0
+    assert RawIntensityAnalyzer(hop_size=10).analyze(np.zeros((100, 1), dtype=np.int16)) == 0
+
+
+@pytest.fixture
+def session(tmp_path):
+    session = ReplaySession(Config(str(tmp_path / "config.json")))
+    yield session
+    session.close()
+
+
+def test_replay_calibrates_and_drives_the_volume(session):
+    engine = session.engine
+    signal = synthetic_signal("speech", 30, engine.samplerate)
+    success, message = session.calibrate(signal[:len(signal) // 2])
+    assert success, message
+    assert engine.calibration_min < engine.calibration_max
+
+    reader = engine.telemetry.reader()
+    stats = session.run(signal)
+    records = reader.read()
+    assert stats["blocks"] == len(signal) // engine.blocksize == len(records)
+    assert stats["blocks_per_second"] > 0
+    volumes = records["volume"]
+    assert ((0.0 <= volumes) & (volumes <= 1.0)).all()
+    # Speech-like phrases and pauses must move the volume, not pin it
+    assert volumes.max() - volumes.min() > 0.2
+    assert 0 < stats["deadband_avoided_percent"] < 100
+
+
+def test_replay_of_a_steady_tone_settles_on_its_mapped_volume(session):
+    engine = session.engine
+    signal = synthetic_signal("tone", 5, engine.samplerate)
+    reader = engine.telemetry.reader()
+    session.run(signal)
+    records = reader.read()
+    expected = engine.map_intensity(float(records["intensity"][-1]))
+    assert records["volume"][-1] == pytest.approx(expected, abs=1e-6)
+    assert np.ptp(records["intensity"]) < 0.01
+
+
+def test_replay_of_a_wav_keeps_block_duration_at_the_file_rate(tmp_path):
+    path = str(tmp_path / "tone.wav")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(to_int16(synthetic_signal("tone", 1, 16000)).tobytes())
+    config = Config(str(tmp_path / "config.json"))
+    config.settings["capture_preset"] = "low_latency"
+    changes = []
+    config.subscribe("capture", changes.append)
+    assert run_replay(config, path) == 0
+    capture = capture_settings(config.settings)
+    assert (capture["samplerate"], capture["blocksize"], capture["hop_size"]) == (16000, 160, 40)
+    assert changes == [config.settings["capture"]]
+    config.close()
+
+
+def test_presets_resolve_with_overrides(tmp_path):
+    config = Config(str(tmp_path / "config.json"))
+    config.settings.update(capture_preset="low_latency", capture={"hop_size": 60})
+    assert capture_settings(config.settings) == {**CAPTURE_PRESETS["low_latency"], "hop_size": 60}
@@ -0,0 +1,80 @@
+"""Session recording: memory-mapped append, growth, compaction and reload"""
+import os
+
+import numpy as np
+import pytest
+
+from main import SESSION_HEADER_SIZE, SessionRecorder, TelemetryRing, load_session, session_layout
+
+
+def record(path, batches, capacity=4):
+    ring = TelemetryRing(1024)
+    recorder = SessionRecorder(str(path), ring.reader(), initial_capacity=capacity)
+    pushed = []
+    for batch in batches:
+        for i in batch:
+            ring.push(1000.0 + i, 40.0 + i, i / 100, None, i / 50, i / 1000)
+            pushed.append(i)
+        recorder.drain()
+    return recorder, pushed
+
+
+def test_round_trip_keeps_every_column(tmp_path):
+    path = tmp_path / "session.bin"
+    recorder, pushed = record(path, [range(3), range(3, 20), range(20, 21)])
+    offset = recorder._clock_offset
+    recorder.close()
+
+    session = load_session(str(path))
+    assert len(session) == len(pushed) == 21
+    expected = np.array(pushed, dtype=float)
+    np.testing.assert_allclose(session["time"], 1000.0 + expected + offset)
+    np.testing.assert_allclose(session["intensity"], 40.0 + expected, rtol=1e-6)
+    np.testing.assert_allclose(session["volume"], expected / 100, rtol=1e-6)
+    np.testing.assert_allclose(session["target"], expected / 50, rtol=1e-6)
+    np.testing.assert_allclose(session["latency"], expected / 1000, rtol=1e-6)
+    assert session.duration == pytest.approx(20.0)
+
+
+def test_growth_doubles_and_close_compacts(tmp_path):
+    path = tmp_path / "session.bin"
+    recorder, _ = record(path, [range(5)], capacity=4)
+    assert recorder.capacity == 8
+    recorder.close()
+    assert os.path.getsize(path) == session_layout(5)[1]
+
+
+def test_header_count_survives_a_crash(tmp_path):
+    """Without close() the header still covers every drained batch"""
+    path = tmp_path / "session.bin"
+    recorder, _ = record(path, [range(3), range(3, 7)], capacity=16)
+    recorder._map.flush()
+    session = load_session(str(path))
+    assert len(session) == 7
+    assert session["intensity"].tolist() == pytest.approx([40.0 + i for i in range(7)])
+    recorder.close()
+
+
+def test_empty_session(tmp_path):
+    path = tmp_path / "session.bin"
+    recorder, _ = record(path, [])
+    recorder.close()
+    session = load_session(str(path))
+    assert len(session) == 0 and session.duration == 0.0
+
+
+def test_rejects_files_that_are_not_sessions(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * SESSION_HEADER_SIZE)
+    with pytest.raises(ValueError):
+        load_session(str(path))
+
+
+def test_rejects_truncated_sessions(tmp_path):
+    path = tmp_path / "session.bin"
+    recorder, _ = record(path, [range(10)])
+    recorder.close()
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 8)
+    with pytest.raises(ValueError):
+        load_session(str(path))
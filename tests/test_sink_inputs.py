@@ -0,0 +1,136 @@
+"""Per-application volume: pactl parsing, the sink-input index and the sink-inputs backend"""
+import time
+
+import pytest
+
+from main import MemorySinkInputMixer, SinkInput, SinkInputIndex, SinkInputVolumeBackend, parse_sink_inputs
+
+PACTL_LIST = """Sink Input #12
+\tDriver: protocol-native.c
+\tOwner Module: 9
+\tClient: 31
+\tSink: 0
+\tSample Specification: float32le 2ch 48000Hz
+\tMute: no
+\tVolume: front-left: 52428 /  80% / -5.81 dB,   front-right: 39322 /  60% / -13.31 dB
+\t        balance -0.25
+\tProperties:
+\t\tmedia.name = "Playback"
+\t\tapplication.name = "Spotify"
+\t\tapplication.process.id = "4242"
+\t\tapplication.process.binary = "spotify"
+
+Sink Input #13
+\tDriver: PipeWire
+\tVolume: mono: 65536 / 100% / 0.00 dB
+\tProperties:
+\t\tapplication.name = "Firefox"
+\t\tapplication.process.binary = "firefox"
+
+Sink Input #14
+\tDriver: PipeWire
+\tProperties:
+\t\tapplication.process.id = "n/a"
+"""
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_parse_sink_inputs():
+    sink_inputs = parse_sink_inputs(PACTL_LIST)
+    assert sink_inputs[12] == SinkInput(12, "Spotify", "spotify", 4242, 0.7)
+    assert sink_inputs[13] == SinkInput(13, "Firefox", "firefox", None, 1.0)
+    # Missing properties and volume do not break the listing
+    assert sink_inputs[14] == SinkInput(14, "", "", None, None)
+
+
+def test_parse_empty_listing():
+    assert parse_sink_inputs("") == {}
+
+
+@pytest.fixture
+def mixer():
+    mixer = MemorySinkInputMixer()
+    mixer.add("Spotify", pid=4242, binary="spotify")
+    mixer.add("Firefox", pid=777, binary="firefox")
+    mixer.add("Discord", pid=999, binary="discord")
+    return mixer
+
+
+def test_index_matches_names_binaries_and_pids(mixer):
+    index = SinkInputIndex(mixer, ["SPOTIFY", 999])
+    index.refresh()
+    assert index.targets == (0, 2)
+
+
+def test_index_follows_streams_with_one_relist_per_burst(mixer):
+    added = []
+    index = SinkInputIndex(mixer, ["firefox"], on_added=added.extend).start()
+    try:
+        assert index.targets == (1,)
+        relists = index.relists
+        late = [mixer.add("firefox", pid=pid) for pid in (1, 2, 3)]
+        assert wait_for(lambda: set(late) <= set(index.targets))
+        assert index.relists - relists <= 2
+        assert sorted(added) == [1] + late
+        mixer.remove(1)
+        assert wait_for(lambda: 1 not in index.targets)
+    finally:
+        index.stop()
+
+
+def test_backend_sets_every_target_in_one_transaction(mixer):
+    backend = SinkInputVolumeBackend(["spotify", "firefox"], mixer=mixer)
+    try:
+        transactions = mixer.transactions
+        backend.set_volume(0.25)
+        assert mixer.transactions == transactions + 1
+        volumes = {index: stream.volume for index, stream in mixer.list_sink_inputs().items()}
+        assert volumes == {0: 0.25, 1: 0.25, 2: 1.0}
+    finally:
+        backend.close()
+
+
+def test_backend_sets_late_streams_to_the_current_level(mixer):
+    backend = SinkInputVolumeBackend(["spotify"], mixer=mixer)
+    try:
+        backend.set_volume(0.4)
+        late = mixer.add("Spotify", pid=5000)
+        assert wait_for(lambda: mixer.sink_inputs[late].volume == 0.4)
+    finally:
+        backend.close()
+
+
+def test_backend_reads_the_volume_back_from_the_streams(mixer):
+    backend = SinkInputVolumeBackend(["spotify", "firefox"], mixer=mixer)
+    try:
+        backend.set_volume(0.5)
+        # Someone turns one stream down in another mixer
+        mixer.sink_inputs[1] = mixer.sink_inputs[1]._replace(volume=0.3)
+        assert backend.get_volume() == pytest.approx(0.4)
+    finally:
+        backend.close()
+
+
+def test_backend_without_playing_targets_reports_the_pending_level():
+    mixer = MemorySinkInputMixer()
+    backend = SinkInputVolumeBackend(["spotify"], mixer=mixer)
+    try:
+        assert backend.get_volume() == 1.0
+        backend.set_volume(0.6)
+        assert mixer.transactions == 0
+        assert backend.get_volume() == 0.6
+    finally:
+        backend.close()
+
+
+def test_backend_needs_targets():
+    with pytest.raises(ValueError):
+        SinkInputVolumeBackend([], mixer=MemorySinkInputMixer())
@@ -0,0 +1,39 @@
+"""Cold-start regression tests: `import main` stays within budget and loads no heavy module"""
+import os
+import statistics
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET = 0.25  # seconds, median over fresh interpreters
+HEAVY_MODULES = ("numpy", "sounddevice", "tkinter", "matplotlib", "asyncio")
+
+
+def cold_import(code=""):
+    """Import main in a fresh interpreter; returns (seconds, heavy modules loaded)"""
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"{code}\n"
+        "print(elapsed)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=REPO, text=True).splitlines()
+    return float(output[-2]), set(filter(None, output[-1].split(",")))
+
+
+def test_cold_import_within_budget():
+    timings = [cold_import()[0] for _ in range(5)]
+    assert statistics.median(timings) < BUDGET
+
+
+def test_import_loads_no_heavy_module():
+    assert cold_import()[1] == set()
+
+
+def test_config_and_cli_load_no_heavy_module(tmp_path):
+    config = tmp_path / "config.json"
+    _, loaded = cold_import(f"main.Config({str(config)!r}); main.parse_args(['--headless'])")
+    assert loaded == set()
@@ -0,0 +1,39 @@
+"""StreamSupervisor lifecycle"""
+import threading
+import time
+
+from main import StreamSupervisor
+
+
+class FakeStream:
+    def __init__(self):
+        self.active = True
+        self.closed = False
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_stops_the_thread_and_closes_the_streams():
+    streams = [FakeStream()]
+    supervisor = StreamSupervisor(lambda: streams)
+    supervisor.ensure_running()
+    thread = supervisor._thread
+    supervisor.close()
+    assert not thread.is_alive()
+    assert streams[0].closed
+
+
+def test_close_returns_at_once_when_the_thread_is_gone():
+    supervisor = StreamSupervisor(lambda: [FakeStream()])
+    # What interpreter exit leaves behind: a daemon thread that no longer answers
+    supervisor._thread = threading.Thread(target=lambda: None)
+    supervisor._thread.start()
+    supervisor._thread.join()
+    started = time.perf_counter()
+    supervisor.close()
+    assert time.perf_counter() - started < 1
+    assert supervisor._thread is None
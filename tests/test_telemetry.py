@@ -0,0 +1,134 @@
+"""TelemetryRing handoff between the audio callback and its readers"""
+import threading
+import time
+
+import numpy as np
+
+from main import Config, MemoryVolumeController, TelemetryRing, VolumeEngine
+
+
+def push_many(ring, count, start=0):
+    for i in range(start, start + count):
+        ring.push(float(i), i * 0.5, i / 1000)
+
+
+def test_capacity_rounds_up_to_power_of_two():
+    assert TelemetryRing(1000).capacity == 1024
+    assert TelemetryRing(4096).capacity == 4096
+
+
+def test_reader_returns_new_records_oldest_first():
+    ring = TelemetryRing(16)
+    reader = ring.reader()
+    push_many(ring, 5)
+    records = reader.read()
+    assert records["time"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert records["intensity"].tolist() == [0.0, 0.5, 1.0, 1.5, 2.0]
+    assert np.isnan(records["target"]).all()
+    assert len(reader.read()) == 0
+    push_many(ring, 2, start=5)
+    assert reader.read()["time"].tolist() == [5.0, 6.0]
+    assert reader.dropped == 0
+
+
+def test_reader_starts_at_newest_record():
+    ring = TelemetryRing(16)
+    push_many(ring, 3)
+    reader = ring.reader()
+    push_many(ring, 1, start=3)
+    assert reader.read()["time"].tolist() == [3.0]
+
+
+def test_overrun_keeps_newest_records_and_counts_dropped():
+    ring = TelemetryRing(16)
+    reader = ring.reader()
+    push_many(ring, 26)
+    records = reader.read()
+    # The oldest slot is also the next one written, so a full lap is never returned
+    assert records["time"].tolist() == [float(i) for i in range(11, 26)]
+    assert reader.dropped == 11
+
+
+class TearingRecords:
+    """Record array whose copy races with a push that has filled only the time field"""
+    def __init__(self, ring):
+        self.ring = ring
+        self.array = ring.records
+
+    def __getitem__(self, slots):
+        ring = self.ring
+        ring._time[ring.write_index & ring.mask] = -1.0
+        return self.array[slots]
+
+
+def test_reading_one_lap_behind_skips_the_slot_being_written():
+    ring = TelemetryRing(16)
+    reader = ring.reader()
+    push_many(ring, 16)
+    ring.records = TearingRecords(ring)
+    records = reader.read()
+    assert records["time"].tolist() == [float(i) for i in range(1, 16)]
+    assert reader.dropped == 1
+
+
+def test_readers_are_independent():
+    ring = TelemetryRing(16)
+    first, second = ring.reader(), ring.reader()
+    push_many(ring, 4)
+    assert len(first.read()) == 4
+    push_many(ring, 2, start=4)
+    assert first.read()["time"].tolist() == [4.0, 5.0]
+    assert second.read()["time"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_read_returns_a_copy():
+    ring = TelemetryRing(4)
+    reader = ring.reader()
+    push_many(ring, 2)
+    records = reader.read()
+    push_many(ring, 4, start=2)
+    assert records["time"].tolist() == [0.0, 1.0]
+
+
+def test_channel_levels_travel_with_records():
+    ring = TelemetryRing(8, channels=3)
+    reader = ring.reader()
+    ring.push(1.0, 60.0, 0.5, np.array([10.0, 20.0, 30.0]))
+    assert reader.read()["levels"].tolist() == [[10.0, 20.0, 30.0]]
+
+
+def test_callback_at_1khz_loses_no_records(tmp_path):
+    """Stress: the audio callback runs at a 1 kHz block rate while a GUI-like reader drains"""
+    rate = 1000
+    engine = VolumeEngine(Config(str(tmp_path / "config.json")), volume_controller=MemoryVolumeController())
+    engine.is_monitoring = True
+    reader = engine.telemetry.reader()
+    frames = max(1, engine.samplerate // rate)
+    block = (np.random.default_rng(0).standard_normal((frames, 1)) * 0.05).astype(np.float32)
+    blocks = rate  # one second
+    times = []
+    running = True
+
+    def consume():
+        while running:
+            time.sleep(0.01)
+            times.extend(reader.read()["time"].tolist())
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    try:
+        start = time.perf_counter()
+        for i in range(blocks):
+            engine._audio_callback(block, frames, None, None)
+            delay = start + (i + 1) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        running = False
+        consumer.join()
+        engine.close()
+    times.extend(reader.read()["time"].tolist())
+
+    assert reader.dropped == 0
+    assert len(times) == blocks
+    assert all(earlier < later for earlier, later in zip(times, times[1:]))